@@ -0,0 +1,278 @@
+"""
+Offline benchmarks for the dev-cli AWS commands.
+
+Runs `aws s3 ls/index/find/copy/upload/verify/download/sync/delete` and `aws ec2 describe/terminate/tag/utilization`
+in-process against fake_aws, a stateful stand-in for the S3 and EC2 APIs, on
+synthetic datasets. No network access or AWS credentials are needed.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_aws
+    python -m benchmarks.bench_aws --objects 10000 --instances 1000
+    python -m benchmarks.bench_aws --update-baseline
+
+Results are compared with benchmarks/baselines/aws.json and the run exits
+non-zero when a case regresses (see harness.compare).
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import click
+
+# dummy credentials so botocore never looks further (instance metadata, SSO, ...)
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ["AWS_EC2_METADATA_DISABLED"] = "true"
+
+from benchmarks import harness  # noqa: E402
+from benchmarks.fake_aws import FakeAWS  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "aws.json"
+BUCKET = "dev-cli-bench"
+
+# =============== CASES
+
+
+def write_files(root, count, size):
+    """Create `count` files of `size` bytes spread over 10 sub-directories."""
+    payload = os.urandom(size)
+    for i in range(count):
+        path = Path(root) / f"dir-{i % 10}" / f"file-{i:06d}.bin"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(payload)
+
+
+def write_logs(root, count, size):
+    """Create `count` log-like text files of about `size` bytes, for the compression cases."""
+    words = ("GET", "POST", "/api/v1/items", "status=200", "status=404", "user", "latency_ms", "INFO", "WARN")
+    line = " ".join(words)
+    for i in range(count):
+        path = Path(root) / f"logs-{i % 10}" / f"app-{i:06d}.log"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = (f"2024-01-01T00:{n // 60 % 60:02d}:{n % 60:02d} {n} {line[n % len(words):]}" for n in range(size // 64))
+        path.write_text("\n".join(lines))
+
+
+def check(condition, message):
+    # commands log errors instead of raising, so verify the outcome explicitly
+    if not condition:
+        raise click.ClickException(f"benchmark sanity check failed: {message}")
+
+
+def s3_cases(fake, objects, files, file_size, workdir):
+    results = []
+    region = "us-east-1"
+
+    fake.add_bucket(BUCKET, region)
+    fake.seed_objects(BUCKET, objects)
+    results.append(harness.run_case(
+        "s3_ls", lambda: harness.run_cli(["aws", "s3", "ls", "-bn", BUCKET, "-r", region]),
+        objects, {"objects": objects}))
+
+    results.append(harness.run_case(
+        "s3_summarize", lambda: harness.run_cli(["aws", "s3", "ls", "-bn", BUCKET, "-r", region, "--summarize"]),
+        objects, {"objects": objects}))
+    manifest = fake.write_inventory(BUCKET, "bench-inventory", "Parquet", files=8)
+    results.append(harness.run_case(
+        "s3_summarize_inventory",
+        lambda: harness.run_cli(["aws", "s3", "ls", "-bn", BUCKET, "-r", region, "--summarize", "--inventory", manifest]),
+        objects, {"objects": objects, "format": "Parquet"}))
+
+    # the index lives in the cache directory, kept inside the benchmark's workdir
+    os.environ["DEV_CLI_CACHE_DIR"] = str(Path(workdir) / "cache")
+    results.append(harness.run_case(
+        "s3_index", lambda: harness.run_cli(["aws", "s3", "index", "-bn", BUCKET, "-r", region]),
+        objects, {"objects": objects}))
+    results.append(harness.run_case(
+        "s3_find",
+        lambda: harness.run_cli(["aws", "s3", "find", "-bn", BUCKET, "-g", "data/0[0-4]*/*.bin", "--min-size", "4K"]),
+        objects, {"objects": objects}))
+
+    fake.add_bucket(f"{BUCKET}-copy", region)
+    copy_args = ["aws", "s3", "copy", "-sb", BUCKET, "-db", f"{BUCKET}-copy", "-r", region]
+    results.append(harness.run_case("s3_copy", lambda: harness.run_cli(copy_args), objects, {"objects": objects}))
+    check(len(fake.buckets[f"{BUCKET}-copy"].objects) == objects, "copy did not reach every object")
+    results.append(harness.run_case("s3_copy_noop", lambda: harness.run_cli(copy_args), objects, {"objects": objects}))
+
+    source = Path(workdir) / "upload"
+    write_files(source, files, file_size)
+    results.append(harness.run_case(
+        "s3_upload",
+        lambda: harness.run_cli(["aws", "s3", "upload", "-bn", BUCKET, "-s", str(source), "-p", "up", "-r", region]),
+        files, {"files": files, "file_size": file_size}))
+    check(sum(k.startswith("up/") for k in fake.buckets[BUCKET].objects) == files, "upload did not store every file")
+
+    results.append(harness.run_case(
+        "s3_verify",
+        lambda: harness.run_cli(["aws", "s3", "verify", "-bn", BUCKET, "-s", str(source), "-p", "up", "-r", region]),
+        files, {"files": files, "file_size": file_size}))
+
+    logs = Path(workdir) / "logs"
+    write_logs(logs, files // 10, file_size * 64)
+    results.append(harness.run_case(
+        "s3_upload_zstd",
+        lambda: harness.run_cli(["aws", "s3", "upload", "-bn", BUCKET, "-s", str(logs), "-p", "logs", "-r", region,
+                                 "--compress", "zstd"]),
+        files // 10, {"files": files // 10, "file_size": file_size * 64}))
+    check(all(k.endswith(".zst") for k in fake.buckets[BUCKET].objects if k.startswith("logs/")),
+          "upload --compress did not compress every file")
+
+    dest = Path(workdir) / "download"
+    results.append(harness.run_case(
+        "s3_download",
+        lambda: harness.run_cli(["aws", "s3", "download", "-bn", BUCKET, "-p", "up/", "-d", str(dest), "-r", region]),
+        files, {"files": files, "file_size": file_size}))
+    check(sum(1 for p in dest.rglob("*") if p.is_file()) == files, "download did not fetch every object")
+
+    results.append(harness.run_case(
+        "s3_sync_noop",
+        lambda: harness.run_cli(["aws", "s3", "sync", "-bn", BUCKET, "-s", str(source), "-p", "up", "-r", region]),
+        files, {"files": files}))
+
+    total = len(fake.buckets[BUCKET].objects)
+    results.append(harness.run_case(
+        "s3_delete_force",
+        lambda: harness.run_cli(["aws", "s3", "delete", "-bn", BUCKET, "-r", region, "--force"]),
+        total, {"objects": total}))
+    check(BUCKET not in fake.buckets, "delete --force left the bucket behind")
+    return results
+
+
+def ec2_cases(fake, instances, regions, terminations):
+    results = []
+    per_region = instances // len(regions)
+    ids = {region: fake.seed_instances(region, per_region) for region in regions}
+
+    def describe_all():
+        for region in regions:
+            harness.run_cli(["aws", "ec2", "describe", "-r", region])
+
+    results.append(harness.run_case(
+        "ec2_describe", describe_all, per_region * len(regions),
+        {"instances": per_region * len(regions), "regions": len(regions)}))
+
+    def describe_running():
+        for region in regions:
+            harness.run_cli(["aws", "ec2", "describe", "-r", region, "-s", "running"])
+
+    results.append(harness.run_case(
+        "ec2_describe_state", describe_running, per_region * len(regions),
+        {"instances": per_region * len(regions), "regions": len(regions)}))
+
+    targets = ids[regions[0]][:terminations]
+
+    def terminate_some():
+        for instance_id in targets:
+            harness.run_cli(["aws", "ec2", "terminate", "-i", instance_id, "-r", regions[0], "--yes"])
+
+    results.append(harness.run_case(
+        "ec2_terminate", terminate_some, len(targets), {"instances": len(targets)}))
+    check(all(fake.instances[regions[0]][i]["State"]["Name"] == "shutting-down" for i in targets),
+          "terminate did not reach every instance")
+
+    # the nightly stop: every running instance tagged env=dev, all regions at once
+    tagged = {region: fake.seed_instances(region, per_region // 2, states=("running",), tags={"env": "dev"})
+              for region in regions}
+
+    def stop_tagged():
+        args = ["aws", "ec2", "stop", "-t", "env=dev", "--yes"]
+        for region in regions:
+            args += ["-r", region]
+        harness.run_cli(args)
+
+    stopped = sum(len(ids) for ids in tagged.values())
+    results.append(harness.run_case(
+        "ec2_stop_tagged", stop_tagged, stopped, {"instances": stopped, "regions": len(regions)}))
+    check(all(fake.instances[region][i]["State"]["Name"] == "stopping" for region, ids in tagged.items() for i in ids),
+          "stop did not reach every tagged instance")
+
+    # the tag-compliance job: the first run writes the missing tags, the second finds nothing to do
+    def tag_compliance():
+        harness.run_cli(["aws", "ec2", "tag", "--set", "owner=platform", "--set", "env=dev", "-r", regions[0]])
+
+    tagged_count = len(fake.instances[regions[0]])
+    results.append(harness.run_case(
+        "ec2_tag", tag_compliance, tagged_count, {"instances": tagged_count}))
+    results.append(harness.run_case(
+        "ec2_tag_compliant", tag_compliance, tagged_count, {"instances": tagged_count}))
+    check(all({"Key": "owner", "Value": "platform"} in i["Tags"] for i in fake.instances[regions[0]].values()),
+          "tag did not reach every instance")
+
+    def utilization():
+        args = ["aws", "ec2", "utilization", "--days", "7"]
+        for region in regions:
+            args += ["-r", region]
+        harness.run_cli(args)
+
+    running = sum(i["State"]["Name"] == "running" for region in regions for i in fake.instances[region].values())
+    results.append(harness.run_case(
+        "ec2_utilization", utilization, running, {"instances": running, "regions": len(regions)}))
+
+    def utilization_default():
+        harness.run_cli(["aws", "ec2", "utilization", "-r", regions[0]])
+
+    # the default 14 days at 1h is 336 points per series; an instance returns two series (CPU,
+    # network in + out) from four queries, so a call fits 125 instances and never needs a second page
+    running = sum(i["State"]["Name"] == "running" for i in fake.instances[regions[0]].values())
+    per_call = min(500 // 4, 100_800 // (336 * 2))
+    result = harness.run_case(
+        "ec2_utilization_default", utilization_default, running, {"instances": running})
+    results.append(result)
+    metric_calls = result["api_calls_by_operation"].get("cloudwatch.GetMetricData", 0)
+    check(metric_calls == -(-running // per_call),
+          f"utilization made {metric_calls} GetMetricData calls for {running} instances, expected {-(-running // per_call)}")
+    return results
+
+# =============== CLI
+
+
+@click.command(help="Benchmark the dev-cli AWS commands against an in-process fake.")
+@click.option("--objects", default=100_000, show_default=True, help="Objects seeded into the bucket.")
+@click.option("--files", default=2_000, show_default=True, help="Local files for upload/download/sync.")
+@click.option("--file-size", default=4096, show_default=True, help="Size in bytes of each local file.")
+@click.option("--instances", default=10_000, show_default=True, help="EC2 instances, split across the regions.")
+@click.option("--regions", default="us-east-1,eu-west-1,ap-southeast-2", show_default=True, help="Comma-separated regions.")
+@click.option("--terminations", default=50, show_default=True, help="Instances terminated one by one.")
+@click.option("--only", type=click.Choice(["s3", "ec2"]), help="Run only the S3 or EC2 cases.")
+@click.option("--baseline", type=click.Path(dir_okay=False), default=str(DEFAULT_BASELINE), show_default=True,
+              help="Baseline results to compare against.")
+@click.option("--update-baseline", is_flag=True, help="Write this run's results as the new baseline.")
+@click.option("--tolerance", default=0.5, show_default=True, help="Allowed wall time / RSS growth over baseline (0.5 = 50%).")
+@click.option("--json", "as_json", is_flag=True, help="Print the results as JSON instead of a table.")
+def main(objects, files, file_size, instances, regions, terminations, only, baseline, update_baseline, tolerance, as_json):
+    fake = FakeAWS().install()
+    # s3 summarize/index and ec2 utilization import pyarrow, pandas and numpy on first use
+    harness.warm_up(["s3", "ec2"], modules=["commands.aws.s3_inventory", "pandas", "numpy"])
+    regions = [r.strip() for r in regions.split(",") if r.strip()]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="dev-cli-bench-") as workdir:
+        if only in (None, "s3"):
+            results += s3_cases(fake, objects, files, file_size, workdir)
+        if only in (None, "ec2"):
+            results += ec2_cases(fake, instances, regions, terminations)
+
+    if as_json:
+        click.echo(json.dumps(results, indent=2))
+    else:
+        click.echo(harness.format_results(results), nl=False)
+
+    if update_baseline:
+        harness.save_baseline(baseline, results)
+        click.echo(f"baseline written to {baseline}", err=True)
+        return
+
+    regressions, skipped = harness.compare(results, harness.load_baseline(baseline), tolerance)
+    for case in skipped:
+        click.echo(f"SKIPPED {case}", err=True)
+    for regression in regressions:
+        click.echo(f"REGRESSION {regression}", err=True)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
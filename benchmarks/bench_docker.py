@@ -0,0 +1,155 @@
+"""
+Offline benchmarks for `dev-cli docker cleanup`.
+
+Starts benchmarks/fake_docker.py in a separate process (so its memory and CPU
+don't count against the CLI) on a unix socket, seeds it at each scale and runs
+the dry-run, prune and prune-all paths in-process against it. Each case
+records the Engine API requests made, client-side request latency, wall time
+and memory of both the CLI and the fake daemon.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_docker
+    python -m benchmarks.bench_docker --scales 1000,5000
+    python -m benchmarks.bench_docker --update-baseline
+"""
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import click
+
+from benchmarks import harness
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "docker.json"
+
+# =============== FAKE DAEMON PROCESS
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=300):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class FakeDaemon:
+    """Run fake_docker in a child process and drive its control endpoints."""
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.fake_docker", "--socket", socket_path],
+            stdout=subprocess.PIPE, text=True,
+        )
+        # the server prints DOCKER_HOST=... once it is listening
+        line = self.process.stdout.readline().strip()
+        if not line.startswith("DOCKER_HOST="):
+            self.stop()
+            raise click.ClickException("fake Docker daemon failed to start")
+        self.docker_host = line.split("=", 1)[1]
+
+    def _call(self, method, path):
+        connection = UnixHTTPConnection(self.socket_path)
+        try:
+            connection.request(method, path)
+            response = connection.getresponse()
+            return json.loads(response.read() or b"{}")
+        finally:
+            connection.close()
+
+    def seed(self, count, unused):
+        return self._call("POST", f"/_fake/seed?containers={count}&images={count}&volumes={count}"
+                                  f"&networks={count}&unused={unused}")
+
+    def reset_stats(self):
+        self._call("POST", "/_fake/stats/reset")
+
+    def stats(self):
+        return self._call("GET", "/_fake/stats")
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+# =============== CASES
+
+CASES = [
+    # (name, cleanup args, reseed before the case)
+    ("dry_run_containers", ["c", "--dry-run"], False),
+    ("dry_run_all", ["a", "--dry-run"], False),
+    ("prune_containers", ["c", "--force"], True),
+    ("prune_all", ["a", "--force"], True),
+]
+
+
+def run_scale(daemon, count, unused):
+    results = []
+    daemon.seed(count, unused)
+    for name, args, reseed in CASES:
+        setup = (lambda: daemon.seed(count, unused)) if reseed else daemon.reset_stats
+        result = harness.run_case(f"{name}_{count}", lambda: harness.run_cli(["docker", "cleanup", *args]),
+                                  count, {"resources": count, "unused": unused}, setup=setup)
+        stats = daemon.stats()
+        result["server_requests"] = stats["requests"]
+        result["server_requests_by_route"] = {route: entry["requests"] for route, entry in sorted(stats["routes"].items())}
+        result["server_bytes"] = sum(entry["bytes"] for entry in stats["routes"].values())
+        result["server_rss_mb"] = round((stats["rss_bytes"] or 0) / 2**20, 1)
+        results.append(result)
+    return results
+
+# =============== CLI
+
+
+@click.command(help="Benchmark dev-cli docker cleanup against a fake Docker Engine API.")
+@click.option("--scales", default="1000,10000,50000", show_default=True,
+              help="Comma-separated resource counts (each of containers, images, volumes, networks).")
+@click.option("--unused", default=0.5, show_default=True, help="Share of each resource that is prunable.")
+@click.option("--baseline", type=click.Path(dir_okay=False), default=str(DEFAULT_BASELINE), show_default=True,
+              help="Baseline results to compare against.")
+@click.option("--update-baseline", is_flag=True, help="Write this run's results as the new baseline.")
+@click.option("--tolerance", default=0.5, show_default=True, help="Allowed wall time / RSS growth over baseline (0.5 = 50%).")
+@click.option("--json", "as_json", is_flag=True, help="Print the results as JSON instead of a table.")
+def main(scales, unused, baseline, update_baseline, tolerance, as_json):
+    scales = [int(s) for s in scales.split(",") if s.strip()]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="dev-cli-bench-") as workdir:
+        daemon = FakeDaemon(os.path.join(workdir, "docker.sock"))
+        os.environ["DOCKER_HOST"] = daemon.docker_host
+        try:
+            harness.warm_up()
+            for count in scales:
+                results += run_scale(daemon, count, unused)
+        finally:
+            daemon.stop()
+
+    if as_json:
+        click.echo(json.dumps(results, indent=2))
+    else:
+        click.echo(harness.format_results(results), nl=False)
+
+    if update_baseline:
+        harness.save_baseline(baseline, results)
+        click.echo(f"baseline written to {baseline}", err=True)
+        return
+
+    regressions, skipped = harness.compare(results, harness.load_baseline(baseline), tolerance)
+    for case in skipped:
+        click.echo(f"SKIPPED {case}", err=True)
+    for regression in regressions:
+        click.echo(f"REGRESSION {regression}", err=True)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
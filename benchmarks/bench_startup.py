@@ -0,0 +1,221 @@
+"""
+Startup-time and import-cost benchmark for the dev-cli entry point.
+
+Runs `dev-cli --help` and `--help` for every sub-group in fresh interpreters
+with `python -X importtime`, the same way the console script starts. For each
+target it reports the median wall time, the number of modules imported, the
+top-level packages loaded (outside the standard library), the slowest imports
+and how many entries end up on sys.path.
+
+Budgets live in benchmarks/baselines/startup.json; the run exits non-zero
+when a target exceeds its wall-time, module-count or sys.path budget, or
+imports a top-level package that is not in its budget.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --top 15
+    python -m benchmarks.bench_startup --update-budget
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import click
+
+DEFAULT_BUDGET = Path(__file__).resolve().parent / "baselines" / "startup.json"
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# mirrors the console-script entry point, then reports how many sys.path entries it left behind
+# and the top-level packages it loaded. -X importtime also lists optional imports that failed;
+# the standard library, private extension modules and placeholders without a spec (e.g.
+# cython_runtime) don't belong in a budget
+ENTRYPOINT = """
+import sys
+from dev_cli.dev_cli import cli
+try:
+    cli.main({args!r}, prog_name="dev-cli")
+finally:
+    packages = {{name.split(".")[0] for name, module in list(sys.modules.items())
+                 if getattr(module, "__spec__", None) is not None}} - set(sys.stdlib_module_names)
+    sys.stderr.write("\\nDEV_CLI_SYS_PATH=%d\\n" % len(sys.path))
+    sys.stderr.write("DEV_CLI_PACKAGES=%s\\n" % ",".join(sorted(p for p in packages if not p.startswith("_"))))
+"""
+
+# =============== TARGETS
+
+
+def discover_targets():
+    """Return the argument lists for `--help` on the root and every sub-group."""
+    from dev_cli.dev_cli import cli
+
+    targets = [["--help"]]
+
+    def walk(group, path):
+        for name, command in sorted(group.commands.items()):
+            if isinstance(command, click.Group):
+                targets.append([*path, name, "--help"])
+                walk(command, [*path, name])
+
+    walk(cli, [])
+    return targets
+
+# =============== MEASUREMENT
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into {module: (self_us, cumulative_us)}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # nested imports are indented under their importer
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once(args):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", ENTRYPOINT.format(args=args)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise click.ClickException(f"dev-cli {' '.join(args)} failed:\n{completed.stderr[-2000:]}")
+    reported = dict(line.split("=", 1) for line in completed.stderr.splitlines() if line.startswith("DEV_CLI_"))
+    sys_path = int(reported["DEV_CLI_SYS_PATH"]) if "DEV_CLI_SYS_PATH" in reported else None
+    packages = [p for p in reported.get("DEV_CLI_PACKAGES", "").split(",") if p]
+    return wall, parse_importtime(completed.stderr), sys_path, packages
+
+
+def measure(args, runs, top):
+    walls = []
+    for _ in range(runs):
+        wall, modules, sys_path, packages = run_once(args)
+        walls.append(wall)
+    slowest = sorted(modules.items(), key=lambda item: -item[1][1])
+    return {
+        "target": " ".join(args),
+        "wall_ms": round(statistics.median(walls) * 1000, 1),
+        "wall_ms_min": round(min(walls) * 1000, 1),
+        "modules": len(modules),
+        # summing self times counts each module once, however deeply it is nested
+        "import_ms": round(sum(self_us for self_us, _ in modules.values()) / 1000, 1),
+        "sys_path": sys_path,
+        "packages": packages,
+        "slowest": [{"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(own / 1000, 1)}
+                    for name, (own, cumulative) in slowest[:top]],
+    }
+
+
+def measure_interpreter(runs):
+    """Median wall time of a bare interpreter, to separate Python's own startup."""
+    walls = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        walls.append(time.perf_counter() - started)
+    return round(statistics.median(walls) * 1000, 1)
+
+# =============== BUDGETS
+
+
+def make_budget(results, interpreter_ms, headroom):
+    return {
+        "python": sys.version.split()[0],
+        "interpreter_ms": interpreter_ms,
+        "targets": {
+            r["target"]: {
+                "wall_ms": round(r["wall_ms"] * (1 + headroom), 1),
+                "modules": int(r["modules"] * (1 + headroom / 10)),
+                "sys_path": r["sys_path"],
+                "packages": r["packages"],
+            }
+            for r in results
+        },
+    }
+
+
+def check_budget(results, budget):
+    failures = []
+    for r in results:
+        target = budget.get("targets", {}).get(r["target"])
+        if target is None:
+            continue
+        if r["wall_ms"] > target["wall_ms"]:
+            failures.append(f"{r['target']}: startup {r['wall_ms']:.1f} ms > budget {target['wall_ms']:.1f} ms")
+        if r["modules"] > target["modules"]:
+            failures.append(f"{r['target']}: {r['modules']} modules imported > budget {target['modules']}")
+        if r["sys_path"] is not None and r["sys_path"] > target["sys_path"]:
+            failures.append(f"{r['target']}: {r['sys_path']} sys.path entries > budget {target['sys_path']}")
+        new_packages = sorted(set(r["packages"]) - set(target["packages"]))
+        if new_packages:
+            failures.append(f"{r['target']}: new top-level imports {', '.join(new_packages)}")
+    return failures
+
+
+def format_results(results, interpreter_ms):
+    lines = [f"interpreter startup: {interpreter_ms:.1f} ms",
+             f"{'target':<34} {'wall ms':>8} {'modules':>8} {'import ms':>10} {'sys.path':>8}"]
+    for r in results:
+        lines.append(f"{r['target']:<34} {r['wall_ms']:>8.1f} {r['modules']:>8} {r['import_ms']:>10.1f} "
+                     f"{r['sys_path'] if r['sys_path'] is not None else '-':>8}")
+    if results:
+        lines.append(f"slowest imports for '{results[0]['target']}':")
+        for entry in results[0]["slowest"]:
+            lines.append(f"  {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+    return "\n".join(lines) + "\n"
+
+# =============== CLI
+
+
+@click.command(help="Measure dev-cli startup time and import cost in fresh interpreters.")
+@click.option("--runs", default=5, show_default=True, help="Runs per target; the median is reported.")
+@click.option("--top", default=10, show_default=True, help="Number of slowest imports to report.")
+@click.option("--target", "targets", multiple=True, help="Only measure these targets (e.g. 'aws s3 --help').")
+@click.option("--budget", type=click.Path(dir_okay=False), default=str(DEFAULT_BUDGET), show_default=True,
+              help="Budget file to check against.")
+@click.option("--update-budget", is_flag=True, help="Write a new budget from this run.")
+@click.option("--headroom", default=0.5, show_default=True,
+              help="Wall-time headroom when writing a budget (0.5 = 50%, a tenth of that for module counts).")
+@click.option("--json", "as_json", is_flag=True, help="Print the results as JSON instead of a table.")
+def main(runs, top, targets, budget, update_budget, headroom, as_json):
+    selected = discover_targets()
+    if targets:
+        selected = [args for args in selected if " ".join(args) in targets]
+    interpreter_ms = measure_interpreter(runs)
+    results = [measure(args, runs, top) for args in selected]
+
+    if as_json:
+        click.echo(json.dumps({"interpreter_ms": interpreter_ms, "targets": results}, indent=2))
+    else:
+        click.echo(format_results(results, interpreter_ms), nl=False)
+
+    if update_budget:
+        os.makedirs(os.path.dirname(os.path.abspath(budget)), exist_ok=True)
+        with open(budget, "w") as f:
+            json.dump(make_budget(results, interpreter_ms, headroom), f, indent=2)
+            f.write("\n")
+        click.echo(f"budget written to {budget}", err=True)
+        return
+
+    try:
+        with open(budget) as f:
+            failures = check_budget(results, json.load(f))
+    except FileNotFoundError:
+        failures = []
+    for failure in failures:
+        click.echo(f"OVER BUDGET {failure}", err=True)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
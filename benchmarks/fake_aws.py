@@ -0,0 +1,597 @@
+"""
+In-process stand-in for the S3, EC2 and CloudWatch APIs used by the benchmarks.
+
+Works like botocore's Stubber (it answers calls from a before-call hook, so
+nothing is serialised or sent over the network) but is stateful: objects and
+instances live in memory, listings paginate like the real services and writes
+change what later calls see. It is registered on the default boto3 session
+after the instrumentation hooks, so API call counts and latencies are still
+recorded for every call.
+
+Only the operations and parameters dev-cli uses are implemented.
+"""
+
+import bisect
+import datetime
+import hashlib
+import io
+import itertools
+import threading
+import urllib.parse
+from collections import defaultdict
+
+import boto3
+from botocore.awsrequest import AWSResponse
+from botocore.response import StreamingBody
+
+LIST_PAGE_SIZE = 1000
+DESCRIBE_PAGE_SIZE = 1000
+# GetMetricData limits
+METRIC_QUERY_LIMIT = 500
+METRIC_DATAPOINT_LIMIT = 100_800
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class FakeError(Exception):
+    def __init__(self, code, message, status=400):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+class FakeBucket:
+    def __init__(self, name, region):
+        self.name = name
+        self.region = region
+        self.objects = {}
+        self._sorted = []
+        self._dirty = False
+
+    def put(self, key, size, body=None, last_modified=None, storage_class="STANDARD", etag=None, checksums=None,
+            part_size=None):
+        if key not in self.objects:
+            self._dirty = True
+        self.objects[key] = {
+            "Key": key,
+            "Size": size,
+            "ETag": etag or f'"{hashlib.md5(body or key.encode()).hexdigest()}"',
+            "LastModified": last_modified or datetime.datetime.now(datetime.timezone.utc),
+            "StorageClass": storage_class,
+            "Body": body,
+            # HeadObject fields such as {"ChecksumSHA256": "..."}, and the part size of multipart uploads
+            "Checksums": checksums or {},
+            "PartSize": part_size,
+            "Metadata": {},
+            "Tags": {},
+        }
+
+    def delete(self, key):
+        if self.objects.pop(key, None) is not None:
+            self._dirty = True
+
+    def sorted_keys(self):
+        if self._dirty:
+            self._sorted = sorted(self.objects)
+            self._dirty = False
+        return self._sorted
+
+
+class FakeAWS:
+    """Stateful S3/EC2 responder for the default boto3 session."""
+
+    def __init__(self):
+        self.buckets = {}
+        # region -> instance id -> instance
+        self.instances = defaultdict(dict)
+        self.calls = defaultdict(int)
+        self._ids = itertools.count(1)
+        # upload id -> in-progress multipart upload
+        self.uploads = {}
+        self._lock = threading.RLock()
+
+    # =============== SEEDING
+
+    def add_bucket(self, name, region="us-east-1"):
+        self.buckets[name] = FakeBucket(name, region)
+        return self.buckets[name]
+
+    def seed_objects(self, bucket_name, count, prefix="data/", size=1024, fanout=100):
+        """Add `count` synthetic objects spread over `fanout` sub-prefixes."""
+        bucket = self.buckets.get(bucket_name) or self.add_bucket(bucket_name)
+        classes = ("STANDARD", "STANDARD_IA", "GLACIER")
+        for i in range(count):
+            key = f"{prefix}{i % fanout:03d}/object-{i:09d}.bin"
+            bucket.put(key, size + i % 4096, last_modified=EPOCH + datetime.timedelta(minutes=i),
+                       storage_class=classes[i % len(classes)], etag=f'"{i:032x}"')
+        return bucket
+
+    def write_inventory(self, source_bucket, destination_bucket, file_format="CSV", files=4, prefix="inventory/"):
+        """
+        Write an S3 Inventory report of `source_bucket` into `destination_bucket`
+        (CSV, ORC or Parquet, split over `files` data files). Returns the
+        manifest's s3:// URL.
+        """
+        import gzip
+        import json
+        import urllib.parse
+
+        import pyarrow as pa
+        import pyarrow.csv
+        import pyarrow.orc
+        import pyarrow.parquet
+
+        source = self.buckets[source_bucket]
+        destination = self.buckets.get(destination_bucket) or self.add_bucket(destination_bucket)
+        objects = [source.objects[k] for k in source.sorted_keys()]
+        root = f"{prefix}{source_bucket}/config/2024-01-01T01-00Z/"
+        schema = ["Bucket", "Key", "Size", "LastModifiedDate", "StorageClass", "IsLatest", "IsDeleteMarker"]
+        entries = []
+        per_file = -(-len(objects) // files)
+        for n in range(files):
+            chunk = objects[n * per_file:(n + 1) * per_file]
+            table = pa.table({
+                "bucket": [source_bucket] * len(chunk),
+                "key": [urllib.parse.quote_plus(o["Key"], safe="/") if file_format == "CSV" else o["Key"] for o in chunk],
+                "size": pa.array([o["Size"] for o in chunk], pa.int64()),
+                "last_modified_date": pa.array([o["LastModified"] for o in chunk], pa.timestamp("ms", tz="UTC")),
+                "storage_class": [o["StorageClass"] for o in chunk],
+                "is_latest": [True] * len(chunk),
+                "is_delete_marker": [False] * len(chunk),
+            })
+            sink = io.BytesIO()
+            if file_format == "CSV":
+                pyarrow.csv.write_csv(table, sink, pyarrow.csv.WriteOptions(include_header=False, quoting_style="all_valid"))
+                data, extension = gzip.compress(sink.getvalue(), compresslevel=1), "csv.gz"
+            elif file_format == "ORC":
+                pyarrow.orc.write_table(table, sink)
+                data, extension = sink.getvalue(), "orc"
+            else:
+                pyarrow.parquet.write_table(table, sink)
+                data, extension = sink.getvalue(), "parquet"
+            key = f"{prefix}{source_bucket}/config/data/{n:04d}.{extension}"
+            destination.put(key, len(data), data)
+            entries.append({"key": key, "size": len(data), "MD5checksum": hashlib.md5(data).hexdigest()})
+        manifest = {
+            "sourceBucket": source_bucket,
+            "destinationBucket": f"arn:aws:s3:::{destination_bucket}",
+            "version": "2016-11-30",
+            "creationTimestamp": str(int(EPOCH.timestamp() * 1000) + 400 * 86_400_000),
+            "fileFormat": file_format,
+            "fileSchema": ", ".join(schema) if file_format == "CSV" else "struct<...>",
+            "files": entries,
+        }
+        body = json.dumps(manifest).encode()
+        destination.put(root + "manifest.json", len(body), body)
+        return f"s3://{destination_bucket}/{root}manifest.json"
+
+    def seed_instances(self, region, count, states=("running", "stopped"), tags=None):
+        """Add `count` synthetic instances to a region, cycling through `states`."""
+        created = []
+        for i in range(count):
+            instance_id = f"i-{next(self._ids):017x}"
+            state = states[i % len(states)]
+            instance_tags = [{"Key": "Name", "Value": f"bench-{i:06d}"}]
+            instance_tags += [{"Key": k, "Value": v} for k, v in (tags or {}).items()]
+            self.instances[region][instance_id] = {
+                "InstanceId": instance_id,
+                "InstanceType": ("t3.micro", "m5.large", "c5.xlarge")[i % 3],
+                "State": {"Code": 16 if state == "running" else 80, "Name": state},
+                "Placement": {"AvailabilityZone": f"{region}{'abc'[i % 3]}"},
+                "PrivateIpAddress": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                "PublicIpAddress": f"54.0.{i // 256 % 256}.{i % 256}" if state == "running" else None,
+                "LaunchTime": EPOCH,
+                "Tags": instance_tags,
+            }
+            created.append(instance_id)
+        return created
+
+    # =============== HOOKS
+
+    def install(self, session=None):
+        session = session or boto3._get_default_session()
+        session.events.register("before-parameter-build", self._capture_params, unique_id="fake-aws-params")
+        # registered last so the instrumentation before-call hook still runs first
+        session.events.register_last("before-call", self._respond, unique_id="fake-aws-respond")
+        return self
+
+    def uninstall(self, session=None):
+        session = session or boto3._get_default_session()
+        session.events.unregister("before-parameter-build", unique_id="fake-aws-params")
+        session.events.unregister("before-call", unique_id="fake-aws-respond")
+
+    def _capture_params(self, params, model, context=None, **kwargs):
+        if context is not None:
+            context["fake_aws_params"] = dict(params)
+
+    def _respond(self, model, context=None, **kwargs):
+        service = model.service_model.service_name
+        handler = getattr(self, f"{service}_{model.name}", None)
+        if handler is None:
+            raise NotImplementedError(f"fake_aws does not implement {service}.{model.name}")
+        params = (context or {}).get("fake_aws_params", {})
+        region = (context or {}).get("client_region") or "us-east-1"
+        with self._lock:
+            self.calls[f"{service}.{model.name}"] += 1
+        try:
+            parsed = handler(params, region) or {}
+            status = 200
+        except FakeError as e:
+            parsed = {"Error": {"Code": e.code, "Message": str(e)}}
+            status = e.status
+        parsed.setdefault("ResponseMetadata", {"HTTPStatusCode": status, "RetryAttempts": 0})
+        return AWSResponse(None, status, {}, None), parsed
+
+    # =============== S3
+
+    def _bucket(self, params):
+        bucket = self.buckets.get(params.get("Bucket"))
+        if bucket is None:
+            raise FakeError("NoSuchBucket", "The specified bucket does not exist.", 404)
+        return bucket
+
+    def s3_ListBuckets(self, params, region):
+        return {"Buckets": [{"Name": name, "CreationDate": EPOCH} for name in sorted(self.buckets)]}
+
+    def s3_ListObjectsV2(self, params, region):
+        bucket = self._bucket(params)
+        prefix = params.get("Prefix", "")
+        delimiter = params.get("Delimiter")
+        limit = min(params.get("MaxKeys", LIST_PAGE_SIZE), LIST_PAGE_SIZE)
+        start = params.get("ContinuationToken") or params.get("StartAfter")
+        with self._lock:
+            keys = bucket.sorted_keys()
+            i = bisect.bisect_right(keys, start) if start else bisect.bisect_left(keys, prefix)
+            contents, common, last = [], [], None
+            while i < len(keys) and len(contents) + len(common) < limit:
+                key = keys[i]
+                if not key.startswith(prefix):
+                    break
+                if delimiter and delimiter in key[len(prefix):]:
+                    common_prefix = key[:key.index(delimiter, len(prefix)) + len(delimiter)]
+                    common.append({"Prefix": common_prefix})
+                    # jump past every key under this common prefix
+                    last = common_prefix + "￿"
+                    i = bisect.bisect_left(keys, last)
+                    continue
+                obj = bucket.objects[key]
+                contents.append({k: obj[k] for k in ("Key", "Size", "ETag", "LastModified", "StorageClass")})
+                last = key
+                i += 1
+            truncated = i < len(keys) and keys[i].startswith(prefix)
+        response = {"IsTruncated": truncated, "KeyCount": len(contents) + len(common), "Prefix": prefix}
+        if contents:
+            response["Contents"] = contents
+        if common:
+            response["CommonPrefixes"] = common
+        if truncated:
+            response["NextContinuationToken"] = last
+        return response
+
+    def s3_PutObject(self, params, region):
+        bucket = self._bucket(params)
+        body = params.get("Body", b"")
+        data = body.read() if hasattr(body, "read") else bytes(body)
+        with self._lock:
+            bucket.put(params["Key"], len(data), data)
+            bucket.objects[params["Key"]]["Metadata"] = params.get("Metadata", {})
+            return {"ETag": bucket.objects[params["Key"]]["ETag"]}
+
+    def _object(self, params):
+        obj = self._bucket(params).objects.get(params["Key"])
+        if obj is None:
+            raise FakeError("404", "Not Found", 404)
+        return obj
+
+    def s3_HeadObject(self, params, region):
+        obj = self._object(params)
+        response = {"ContentLength": obj["Size"], "ETag": obj["ETag"], "LastModified": obj["LastModified"],
+                    "StorageClass": obj["StorageClass"], "Metadata": obj["Metadata"]}
+        if params.get("PartNumber"):
+            part_size = obj["PartSize"] or obj["Size"]
+            first = (params["PartNumber"] - 1) * part_size
+            response["ContentLength"] = max(0, min(part_size, obj["Size"] - first))
+            response["PartsCount"] = max(1, -(-obj["Size"] // part_size))
+        if params.get("ChecksumMode") == "ENABLED":
+            response.update(obj["Checksums"])
+        return response
+
+    def s3_GetObject(self, params, region):
+        obj = self._object(params)
+        data = obj["Body"] if obj["Body"] is not None else bytes(obj["Size"])
+        if params.get("Range"):
+            first, last = params["Range"].split("=")[1].split("-")
+            data = data[int(first):int(last) + 1]
+        return {"Body": StreamingBody(io.BytesIO(data), len(data)), "ContentLength": len(data),
+                "ETag": obj["ETag"], "LastModified": obj["LastModified"], "Metadata": obj["Metadata"]}
+
+    def s3_GetObjectTagging(self, params, region):
+        obj = self._object(params)
+        return {"TagSet": [{"Key": k, "Value": v} for k, v in obj["Tags"].items()]}
+
+    def _copy_source(self, params):
+        source = params["CopySource"]
+        if isinstance(source, str):
+            bucket, _, key = urllib.parse.unquote(source.split("?")[0]).lstrip("/").partition("/")
+            source = {"Bucket": bucket, "Key": key}
+        return self._object(source)
+
+    def _body(self, obj):
+        return obj["Body"] if obj["Body"] is not None else bytes(obj["Size"])
+
+    def s3_CopyObject(self, params, region):
+        source = self._copy_source(params)
+        bucket = self._bucket(params)
+        with self._lock:
+            # server-side copies of single-part objects keep their ETag
+            bucket.put(params["Key"], source["Size"], source["Body"], etag=source["ETag"],
+                       storage_class=params.get("StorageClass", "STANDARD"))
+            bucket.objects[params["Key"]]["Metadata"] = dict(source["Metadata"])
+            if params.get("TaggingDirective", "COPY") == "COPY":
+                bucket.objects[params["Key"]]["Tags"] = dict(source["Tags"])
+            else:
+                bucket.objects[params["Key"]]["Tags"] = dict(urllib.parse.parse_qsl(params.get("Tagging", "")))
+        return {"CopyObjectResult": {"ETag": source["ETag"], "LastModified": bucket.objects[params["Key"]]["LastModified"]}}
+
+    def s3_CreateMultipartUpload(self, params, region):
+        self._bucket(params)
+        upload_id = f"upload-{next(self._ids)}"
+        with self._lock:
+            self.uploads[upload_id] = {"Bucket": params["Bucket"], "Key": params["Key"], "Parts": {},
+                                       "Metadata": params.get("Metadata", {}),
+                                       "Tags": dict(urllib.parse.parse_qsl(params.get("Tagging", ""))),
+                                       "StorageClass": params.get("StorageClass", "STANDARD")}
+        return {"Bucket": params["Bucket"], "Key": params["Key"], "UploadId": upload_id}
+
+    def _upload(self, params):
+        upload = self.uploads.get(params["UploadId"])
+        if upload is None:
+            raise FakeError("NoSuchUpload", "The specified upload does not exist.", 404)
+        return upload
+
+    def s3_UploadPart(self, params, region):
+        upload = self._upload(params)
+        body = params.get("Body", b"")
+        data = body.read() if hasattr(body, "read") else bytes(body)
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        with self._lock:
+            upload["Parts"][params["PartNumber"]] = (etag, data)
+        return {"ETag": etag}
+
+    def s3_UploadPartCopy(self, params, region):
+        source = self._copy_source(params)
+        upload = self._upload(params)
+        data = self._body(source)
+        if params.get("CopySourceRange"):
+            first, last = params["CopySourceRange"].split("=")[1].split("-")
+            data = data[int(first):int(last) + 1]
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        with self._lock:
+            upload["Parts"][params["PartNumber"]] = (etag, data)
+        return {"CopyPartResult": {"ETag": etag}}
+
+    def s3_CompleteMultipartUpload(self, params, region):
+        upload = self._upload(params)
+        bucket = self._bucket(params)
+        numbers = [part["PartNumber"] for part in params["MultipartUpload"]["Parts"]]
+        if numbers != sorted(upload["Parts"]):
+            raise FakeError("InvalidPart", "One or more of the specified parts could not be found.")
+        parts = [upload["Parts"][n] for n in numbers]
+        data = b"".join(body for _, body in parts)
+        digest = hashlib.md5(b"".join(bytes.fromhex(etag.strip('"')) for etag, _ in parts)).hexdigest()
+        etag = f'"{digest}-{len(parts)}"'
+        with self._lock:
+            bucket.put(params["Key"], len(data), data, etag=etag, storage_class=upload["StorageClass"],
+                       part_size=len(parts[0][1]))
+            bucket.objects[params["Key"]]["Metadata"] = upload["Metadata"]
+            bucket.objects[params["Key"]]["Tags"] = upload["Tags"]
+            del self.uploads[params["UploadId"]]
+        return {"Bucket": params["Bucket"], "Key": params["Key"], "ETag": etag}
+
+    def s3_AbortMultipartUpload(self, params, region):
+        with self._lock:
+            self.uploads.pop(params["UploadId"], None)
+        return {}
+
+    def s3_DeleteObjects(self, params, region):
+        bucket = self._bucket(params)
+        with self._lock:
+            for entry in params["Delete"]["Objects"]:
+                bucket.delete(entry["Key"])
+        return {"Deleted": [] if params["Delete"].get("Quiet") else params["Delete"]["Objects"]}
+
+    def s3_DeleteBucket(self, params, region):
+        bucket = self._bucket(params)
+        if bucket.objects:
+            raise FakeError("BucketNotEmpty", "The bucket you tried to delete is not empty.", 409)
+        del self.buckets[bucket.name]
+        return {}
+
+    # =============== EC2
+
+    def _matches(self, instance, filters):
+        for f in filters or []:
+            name, values = f["Name"], f["Values"]
+            if name == "instance-state-name":
+                actual = [instance["State"]["Name"]]
+            elif name == "instance-id":
+                actual = [instance["InstanceId"]]
+            elif name == "instance-type":
+                actual = [instance["InstanceType"]]
+            elif name.startswith("tag:"):
+                actual = [t["Value"] for t in instance.get("Tags", []) if t["Key"] == name[4:]]
+            elif name == "tag-key":
+                actual = [t["Key"] for t in instance.get("Tags", [])]
+            else:
+                raise FakeError("InvalidParameterValue", f"Unsupported filter: {name}")
+            if not any(value in actual for value in values):
+                return False
+        return True
+
+    def _page(self, items, params, page_size):
+        start = int(params.get("NextToken") or 0)
+        limit = min(params.get("MaxResults") or page_size, page_size)
+        page = items[start:start + limit]
+        token = str(start + limit) if start + limit < len(items) else None
+        return page, token
+
+    def _select(self, params, region):
+        instances = self.instances[region]
+        if params.get("InstanceIds"):
+            missing = [i for i in params["InstanceIds"] if i not in instances]
+            if missing:
+                raise FakeError("InvalidInstanceID.NotFound", f"The instance IDs '{', '.join(missing)}' do not exist")
+            selected = [instances[i] for i in params["InstanceIds"]]
+        else:
+            selected = list(instances.values())
+        return [i for i in selected if self._matches(i, params.get("Filters"))]
+
+    def ec2_DescribeInstances(self, params, region):
+        with self._lock:
+            selected = self._select(params, region)
+            page, token = self._page(selected, params, DESCRIBE_PAGE_SIZE)
+            # one reservation per instance keeps the payload realistic
+            reservations = [{"ReservationId": f"r-{inst['InstanceId'][2:]}",
+                             "Instances": [{k: v for k, v in inst.items() if v is not None}]} for inst in page]
+        response = {"Reservations": reservations}
+        if token:
+            response["NextToken"] = token
+        return response
+
+    # the fake has no volumes or snapshots; tag lists them alongside the instances
+    def ec2_DescribeVolumes(self, params, region):
+        return {"Volumes": []}
+
+    def ec2_DescribeSnapshots(self, params, region):
+        return {"Snapshots": []}
+
+    def _transition(self, params, region, target, code):
+        changes = []
+        with self._lock:
+            for instance in self._select({"InstanceIds": params["InstanceIds"]}, region):
+                previous = dict(instance["State"])
+                instance["State"] = {"Code": code, "Name": target}
+                changes.append({"InstanceId": instance["InstanceId"], "CurrentState": dict(instance["State"]),
+                                "PreviousState": previous})
+        return changes
+
+    def ec2_TerminateInstances(self, params, region):
+        return {"TerminatingInstances": self._transition(params, region, "shutting-down", 32)}
+
+    def ec2_StartInstances(self, params, region):
+        return {"StartingInstances": self._transition(params, region, "pending", 0)}
+
+    def ec2_StopInstances(self, params, region):
+        return {"StoppingInstances": self._transition(params, region, "stopping", 64)}
+
+    def ec2_RebootInstances(self, params, region):
+        with self._lock:
+            self._select({"InstanceIds": params["InstanceIds"]}, region)
+        return {}
+
+    def ec2_DescribeInstanceStatus(self, params, region):
+        if params.get("InstanceIds") and len(params["InstanceIds"]) > 100:
+            raise FakeError("InvalidParameterValue", "At most 100 instance IDs can be specified")
+        with self._lock:
+            selected = self._select({"InstanceIds": params.get("InstanceIds"), "Filters": params.get("Filters")}, region)
+            if not params.get("IncludeAllInstances"):
+                selected = [i for i in selected if i["State"]["Name"] == "running"]
+            page, token = self._page(selected, params, DESCRIBE_PAGE_SIZE)
+            statuses = []
+            for instance in page:
+                checks = "ok" if instance["State"]["Name"] == "running" else "not-applicable"
+                statuses.append({
+                    "InstanceId": instance["InstanceId"],
+                    "AvailabilityZone": instance["Placement"]["AvailabilityZone"],
+                    "InstanceState": dict(instance["State"]),
+                    "SystemStatus": {"Status": checks},
+                    "InstanceStatus": {"Status": checks},
+                })
+        response = {"InstanceStatuses": statuses}
+        if token:
+            response["NextToken"] = token
+        return response
+
+    def _tagged(self, params, region):
+        instances = self.instances[region]
+        missing = [i for i in params["Resources"] if i not in instances]
+        if missing:
+            raise FakeError("InvalidID", f"The ID '{missing[0]}' is not valid")
+        return [instances[i] for i in params["Resources"]]
+
+    def ec2_DescribeTags(self, params, region):
+        filters = {f["Name"]: f["Values"] for f in params.get("Filters") or []}
+        with self._lock:
+            tags = []
+            if "instance" in filters.get("resource-type", ["instance"]):
+                for instance in self.instances[region].values():
+                    if "resource-id" in filters and instance["InstanceId"] not in filters["resource-id"]:
+                        continue
+                    tags += [{"ResourceId": instance["InstanceId"], "ResourceType": "instance", **t}
+                             for t in instance.get("Tags", []) if t["Key"] in filters.get("key", [t["Key"]])]
+            page, token = self._page(tags, params, DESCRIBE_PAGE_SIZE)
+        response = {"Tags": page}
+        if token:
+            response["NextToken"] = token
+        return response
+
+    def ec2_CreateTags(self, params, region):
+        with self._lock:
+            for instance in self._tagged(params, region):
+                tags = {t["Key"]: t["Value"] for t in instance.get("Tags", [])}
+                tags.update({t["Key"]: t.get("Value", "") for t in params["Tags"]})
+                instance["Tags"] = [{"Key": k, "Value": v} for k, v in tags.items()]
+        return {}
+
+    def ec2_DeleteTags(self, params, region):
+        keys = {t["Key"] for t in params.get("Tags") or []}
+        with self._lock:
+            for instance in self._tagged(params, region):
+                instance["Tags"] = [t for t in instance.get("Tags", []) if t["Key"] not in keys]
+        return {}
+
+    # =============== CLOUDWATCH
+
+    def _metric_values(self, instance_id, metric_name, count):
+        """Deterministic synthetic series: every third instance idles, the rest are busy."""
+        level = int(instance_id[-4:], 16)
+        busy = level % 3 != 0
+        if metric_name == "CPUUtilization":
+            base = 20 + level % 60 if busy else 1 + level % 4
+            return [float(base + (i * 7 + level) % (10 if busy else 4)) for i in range(count)]
+        base = (500_000_000 if busy else 20_000) + level % 1000
+        return [float(base + (i * 13 + level) % 1000) for i in range(count)]
+
+    def cloudwatch_GetMetricData(self, params, region):
+        queries = params["MetricDataQueries"]
+        if len(queries) > METRIC_QUERY_LIMIT:
+            raise FakeError("ValidationError", f"The collection MetricDataQueries must not have a size greater than {METRIC_QUERY_LIMIT}.")
+        start, end = params["StartTime"], params["EndTime"]
+        # every query is evaluated, but only those with ReturnData count against the datapoint limit
+        series = {}
+        for query in queries:
+            if "Expression" in query:
+                # the only metric math supported: a sum of other query IDs, e.g. "q1 + q2"
+                parts = [series[name.strip()] for name in query["Expression"].split("+")]
+                series[query["Id"]] = (query["Expression"], parts[0][1], [sum(v) for v in zip(*(p[2] for p in parts))])
+                continue
+            stat = query["MetricStat"]
+            count = int((end - start).total_seconds() // stat["Period"])
+            instance_id = stat["Metric"]["Dimensions"][0]["Value"]
+            exists = any(instance_id in instances for instances in self.instances.values())
+            values = self._metric_values(instance_id, stat["Metric"]["MetricName"], count) if exists else []
+            series[query["Id"]] = (stat["Metric"]["MetricName"], stat["Period"], values)
+        returned = [q for q in queries if q.get("ReturnData", True)]
+        results = []
+        budget = METRIC_DATAPOINT_LIMIT
+        index = int(params.get("NextToken") or 0)
+        while index < len(returned) and budget > 0:
+            label, period, values = series[returned[index]["Id"]]
+            timestamps = [start + datetime.timedelta(seconds=period * i) for i in range(len(values))]
+            results.append({"Id": returned[index]["Id"], "Label": label,
+                            "Timestamps": timestamps, "Values": values, "StatusCode": "Complete"})
+            budget -= max(1, len(values))
+            index += 1
+        response = {"MetricDataResults": results}
+        if index < len(returned):
+            response["NextToken"] = str(index)
+        return response
@@ -0,0 +1,489 @@
+"""
+Fake Docker Engine API server for the cleanup benchmarks.
+
+Serves the subset of the Engine API that `dev-cli docker cleanup` and the
+Docker SDK use (ping, version, list/inspect of containers and images, list of
+volumes and networks, and the four prune endpoints) from in-memory state, on a
+unix socket or a localhost TCP port. Payloads are shaped and sized like a real
+daemon's (a container list entry is ~1.3 KB, an inspect ~3.5 KB).
+
+Run it standalone and point the SDK at it:
+
+    python -m benchmarks.fake_docker --socket /tmp/fake-docker.sock --containers 10000
+    DOCKER_HOST=unix:///tmp/fake-docker.sock dev-cli docker cleanup c --dry-run
+
+Control endpoints (not part of the Engine API):
+    GET  /_fake/stats          request counts, handler time and bytes per route
+    POST /_fake/stats/reset    zero the stats
+    POST /_fake/seed?containers=N&images=N&volumes=N&networks=N&unused=0.5
+                               replace the state with a fresh synthetic dataset
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_VERSION = "1.45"
+VERSION_PREFIX = re.compile(r"^/v\d+\.\d+")
+BUILTIN_NETWORKS = ("bridge", "host", "none")
+STOPPED_STATES = ("exited", "created", "dead")
+
+# =============== STATE
+
+
+def _id(kind, i):
+    return hashlib.sha256(f"{kind}-{i}".encode()).hexdigest()
+
+
+def _head(items, share):
+    return items[:max(1, int(len(items) * share))] if items else []
+
+
+class EngineState:
+    """In-memory containers, images, volumes and networks."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seed()
+
+    def seed(self, containers=0, images=0, volumes=0, networks=0, unused=0.5):
+        """Build a synthetic dataset where roughly `unused` of each resource is prunable."""
+        now = int(time.time())
+        images_ = {}
+        for i in range(images):
+            image_id = "sha256:" + _id("image", i)
+            dangling = i % 4 == 0
+            images_[image_id] = {
+                "Id": image_id,
+                "RepoTags": [] if dangling else [f"registry.example.com/team/app-{i}:1.{i % 50}.0"],
+                "RepoDigests": [f"registry.example.com/team/app-{i}@sha256:{_id('digest', i)}"],
+                "ParentId": "",
+                "Created": now - i * 60,
+                "Size": 50_000_000 + (i % 100) * 1_000_000,
+                "SharedSize": -1,
+                "VirtualSize": 50_000_000 + (i % 100) * 1_000_000,
+                "Labels": {"org.opencontainers.image.source": f"https://git.example.com/app-{i}",
+                           "maintainer": "platform@example.com"},
+                "Containers": -1,
+            }
+        image_ids = list(images_)
+
+        networks_ = {}
+        for name in BUILTIN_NETWORKS:
+            networks_[name] = self._network(name, name if name != "bridge" else "bridge", now)
+        for i in range(networks):
+            name = f"net-{i:06d}"
+            networks_[name] = self._network(name, "bridge", now)
+        custom_networks = [n for n in networks_ if n not in BUILTIN_NETWORKS]
+
+        volumes_ = {}
+        for i in range(volumes):
+            name = _id("volume", i) if i % 2 else f"data-{i:06d}"
+            volumes_[name] = {
+                "Name": name,
+                "Driver": "local",
+                "Mountpoint": f"/var/lib/docker/volumes/{name}/_data",
+                "CreatedAt": "2024-01-01T00:00:00Z",
+                "Labels": {} if i % 2 else {"com.docker.compose.project": f"proj-{i % 20}"},
+                "Scope": "local",
+                "Options": None,
+                "UsageData": {"Size": -1, "RefCount": -1},
+            }
+        volume_names = list(volumes_)
+
+        containers_ = {}
+        # only the first (1 - unused) share of images, volumes and networks is referenced by containers
+        used_images = _head(image_ids, 1 - unused)
+        used_volumes = _head(volume_names, 1 - unused)
+        used_networks = _head(custom_networks, 1 - unused)
+        for i in range(containers):
+            container_id = _id("container", i)
+            state = "running" if i / max(containers, 1) >= unused else STOPPED_STATES[i % len(STOPPED_STATES)]
+            image = used_images[i % len(used_images)] if used_images else "sha256:" + _id("image", 0)
+            volume = used_volumes[i % len(used_volumes)] if used_volumes else None
+            network = used_networks[i % len(used_networks)] if used_networks else "bridge"
+            containers_[container_id] = {
+                "id": container_id, "name": f"app-{i:06d}", "image": image, "state": state,
+                "volume": volume, "network": network, "created": now - i * 30,
+            }
+
+        with self.lock:
+            self.images, self.networks, self.volumes, self.containers = images_, networks_, volumes_, containers_
+
+    def _network(self, name, driver, now):
+        return {
+            "Name": name,
+            "Id": _id("network", name),
+            "Created": "2024-01-01T00:00:00.000000000Z",
+            "Scope": "local",
+            "Driver": driver,
+            "EnableIPv6": False,
+            "IPAM": {"Driver": "default", "Options": None,
+                     "Config": [{"Subnet": "172.18.0.0/16", "Gateway": "172.18.0.1"}]},
+            "Internal": False,
+            "Attachable": False,
+            "Ingress": False,
+            "ConfigFrom": {"Network": ""},
+            "ConfigOnly": False,
+            "Containers": {},
+            "Options": {"com.docker.network.bridge.enable_icc": "true"},
+            "Labels": {},
+        }
+
+    # =============== PAYLOADS
+
+    def container_summary(self, c):
+        return {
+            "Id": c["id"],
+            "Names": [f"/{c['name']}"],
+            "Image": (self.images.get(c["image"], {}).get("RepoTags") or [c["image"]])[0],
+            "ImageID": c["image"],
+            "Command": "/docker-entrypoint.sh nginx -g 'daemon off;'",
+            "Created": c["created"],
+            "Ports": [{"IP": "0.0.0.0", "PrivatePort": 80, "PublicPort": 8080, "Type": "tcp"}],
+            "Labels": {"com.docker.compose.project": "bench", "com.docker.compose.service": c["name"],
+                       "com.docker.compose.version": "2.24.0"},
+            "State": c["state"],
+            "Status": "Up 3 hours" if c["state"] == "running" else "Exited (0) 2 days ago",
+            "HostConfig": {"NetworkMode": c["network"]},
+            "NetworkSettings": {"Networks": {c["network"]: {
+                "NetworkID": _id("network", c["network"]), "EndpointID": _id("endpoint", c["id"]),
+                "Gateway": "172.18.0.1", "IPAddress": "172.18.0.2", "IPPrefixLen": 16,
+                "MacAddress": "02:42:ac:12:00:02"}}},
+            "Mounts": [{"Type": "volume", "Name": c["volume"], "Destination": "/data", "Driver": "local",
+                        "Mode": "z", "RW": True, "Propagation": ""}] if c["volume"] else [],
+        }
+
+    def container_inspect(self, c):
+        summary = self.container_summary(c)
+        return {
+            "Id": c["id"],
+            "Created": "2024-01-01T00:00:00.000000000Z",
+            "Path": "/docker-entrypoint.sh",
+            "Args": ["nginx", "-g", "daemon off;"],
+            "State": {"Status": c["state"], "Running": c["state"] == "running", "Paused": False,
+                      "Restarting": False, "OOMKilled": False, "Dead": c["state"] == "dead", "Pid": 0,
+                      "ExitCode": 0, "Error": "", "StartedAt": "2024-01-01T00:00:00Z",
+                      "FinishedAt": "2024-01-02T00:00:00Z"},
+            "Image": c["image"],
+            "Name": f"/{c['name']}",
+            "RestartCount": 0,
+            "Driver": "overlay2",
+            "Platform": "linux",
+            "HostConfig": {"NetworkMode": c["network"], "RestartPolicy": {"Name": "unless-stopped"},
+                           "LogConfig": {"Type": "json-file", "Config": {"max-size": "10m"}},
+                           "Binds": None, "Memory": 0, "CpuShares": 0},
+            "GraphDriver": {"Name": "overlay2", "Data": {
+                key: f"/var/lib/docker/overlay2/{_id(key, c['id'])}/{key.lower()}"
+                for key in ("LowerDir", "MergedDir", "UpperDir", "WorkDir")}},
+            "Mounts": summary["Mounts"],
+            "Config": {
+                "Hostname": c["id"][:12], "User": "", "Tty": False, "OpenStdin": False,
+                "Env": [f"VAR_{i}=value-{i}-" + "x" * 40 for i in range(20)],
+                "Cmd": ["nginx", "-g", "daemon off;"],
+                "Image": summary["Image"],
+                "WorkingDir": "/app",
+                "Entrypoint": ["/docker-entrypoint.sh"],
+                "Labels": summary["Labels"],
+                "ExposedPorts": {"80/tcp": {}},
+            },
+            "NetworkSettings": {"Ports": {"80/tcp": [{"HostIp": "0.0.0.0", "HostPort": "8080"}]},
+                                **summary["NetworkSettings"]},
+        }
+
+    def image_inspect(self, image):
+        return {
+            **{k: image[k] for k in ("Id", "RepoTags", "RepoDigests", "Size")},
+            "Parent": "",
+            "Comment": "",
+            "Created": "2024-01-01T00:00:00.000000000Z",
+            "DockerVersion": "",
+            "Author": "",
+            "Architecture": "amd64",
+            "Os": "linux",
+            "Config": {"Env": ["PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"],
+                       "Cmd": ["nginx", "-g", "daemon off;"], "Labels": image["Labels"],
+                       "ExposedPorts": {"80/tcp": {}}, "WorkingDir": "/app"},
+            "GraphDriver": {"Name": "overlay2", "Data": {"MergedDir": "/var/lib/docker/overlay2/merged"}},
+            "RootFS": {"Type": "layers", "Layers": [f"sha256:{_id('layer', image['Id'] + str(i))}" for i in range(8)]},
+            "Metadata": {"LastTagTime": "0001-01-01T00:00:00Z"},
+        }
+
+    # =============== QUERIES
+
+    def used_images(self):
+        return {c["image"] for c in self.containers.values()}
+
+    def used_volumes(self):
+        return {c["volume"] for c in self.containers.values() if c["volume"]}
+
+    def used_networks(self):
+        return {c["network"] for c in self.containers.values()}
+
+    def list_containers(self, include_stopped, filters):
+        statuses = filters.get("status")
+        result = []
+        for c in self.containers.values():
+            if not include_stopped and c["state"] != "running":
+                continue
+            if statuses and c["state"] not in statuses:
+                continue
+            result.append(self.container_summary(c))
+        return result
+
+    def list_images(self, filters):
+        dangling = filters.get("dangling")
+        result = []
+        for image in self.images.values():
+            if dangling and (not image["RepoTags"]) != (dangling[0] in ("true", "1")):
+                continue
+            result.append(image)
+        return result
+
+    def list_volumes(self, filters):
+        dangling = filters.get("dangling")
+        used = self.used_volumes() if dangling else set()
+        volumes = [v for v in self.volumes.values()
+                   if not dangling or (v["Name"] not in used) == (dangling[0] in ("true", "1"))]
+        return {"Volumes": volumes, "Warnings": None}
+
+    def list_networks(self, filters):
+        return list(self.networks.values())
+
+    # =============== PRUNE
+
+    def prune_containers(self, filters):
+        deleted = [cid for cid, c in self.containers.items() if c["state"] in STOPPED_STATES]
+        for cid in deleted:
+            del self.containers[cid]
+        return {"ContainersDeleted": deleted, "SpaceReclaimed": 4096 * len(deleted)}
+
+    def prune_images(self, filters):
+        dangling_only = filters.get("dangling", ["true"])[0] in ("true", "1")
+        used = self.used_images()
+        deleted, reclaimed = [], 0
+        for image_id, image in list(self.images.items()):
+            if image_id in used or (dangling_only and image["RepoTags"]):
+                continue
+            del self.images[image_id]
+            deleted += [{"Untagged": tag} for tag in image["RepoTags"]] + [{"Deleted": image_id}]
+            reclaimed += image["Size"]
+        return {"ImagesDeleted": deleted or None, "SpaceReclaimed": reclaimed}
+
+    def prune_volumes(self, filters):
+        # like Engine API >= 1.42, only anonymous volumes are pruned unless all=true
+        include_named = filters.get("all", ["false"])[0] in ("true", "1")
+        used = self.used_volumes()
+        deleted = [name for name, v in self.volumes.items()
+                   if name not in used and (include_named or len(name) == 64)]
+        for name in deleted:
+            del self.volumes[name]
+        return {"VolumesDeleted": deleted, "SpaceReclaimed": 1_000_000 * len(deleted)}
+
+    def prune_networks(self, filters):
+        used = self.used_networks()
+        deleted = [name for name in self.networks if name not in BUILTIN_NETWORKS and name not in used]
+        for name in deleted:
+            del self.networks[name]
+        return {"NetworksDeleted": deleted}
+
+# =============== HTTP
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+    def record(self, route, elapsed, sent):
+        with self.lock:
+            entry = self.routes.setdefault(route, {"requests": 0, "handler_s": 0.0, "bytes": 0})
+            entry["requests"] += 1
+            entry["handler_s"] += elapsed
+            entry["bytes"] += sent
+
+    def as_dict(self):
+        with self.lock:
+            routes = {route: dict(entry, handler_s=round(entry["handler_s"], 4)) for route, entry in self.routes.items()}
+        return {"requests": sum(r["requests"] for r in routes.values()), "routes": routes}
+
+
+def _filters(query):
+    raw = query.get("filters", ["{}"])[0]
+    filters = json.loads(raw) if raw else {}
+    # the SDK sends {"key": ["value"]}; older clients send {"key": {"value": true}}
+    return {k: list(v) if isinstance(v, (list, dict)) else [v] for k, v in filters.items()}
+
+
+class EngineHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "fake-docker/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def address_string(self):
+        # unix socket peers have no (host, port) address
+        return "unix" if isinstance(self.client_address, (str, bytes)) else super().address_string()
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Api-Version", API_VERSION)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+        return len(data)
+
+    def _dispatch(self):
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        path = VERSION_PREFIX.sub("", url.path)
+        query = parse_qs(url.query)
+        # drain any request body so keep-alive connections stay in sync
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        route, status, body = self.route(self.command, path, query)
+        sent = self._send(status, body, "text/plain" if isinstance(body, bytes) else "application/json")
+        # control calls are not Engine API traffic
+        if not route.startswith("/_fake/"):
+            self.server.stats.record(f"{self.command} {route}", time.perf_counter() - started, sent)
+
+    do_GET = do_POST = do_HEAD = do_DELETE = _dispatch
+
+    def route(self, method, path, query):
+        state = self.server.state
+        if path == "/_ping":
+            return path, 200, b"OK"
+        if path == "/version":
+            return path, 200, {"Version": "26.0.0", "ApiVersion": API_VERSION, "MinAPIVersion": "1.24",
+                               "Os": "linux", "Arch": "amd64", "KernelVersion": "6.1.0"}
+        if path.startswith("/_fake/"):
+            return self.control(method, path, query)
+
+        filters = _filters(query)
+        with state.lock:
+            if method == "GET":
+                if path == "/containers/json":
+                    return path, 200, state.list_containers(query.get("all", ["0"])[0] in ("1", "true"), filters)
+                if path == "/images/json":
+                    return path, 200, state.list_images(filters)
+                if path == "/volumes":
+                    return path, 200, state.list_volumes(filters)
+                if path == "/networks":
+                    return path, 200, state.list_networks(filters)
+                match = re.fullmatch(r"/containers/([^/]+)/json", path)
+                if match:
+                    container = state.containers.get(match.group(1))
+                    if container is None:
+                        return "/containers/{id}/json", 404, {"message": f"No such container: {match.group(1)}"}
+                    return "/containers/{id}/json", 200, state.container_inspect(container)
+                match = re.fullmatch(r"/images/(.+)/json", path)
+                if match:
+                    image = state.images.get(match.group(1))
+                    if image is None:
+                        return "/images/{id}/json", 404, {"message": f"No such image: {match.group(1)}"}
+                    return "/images/{id}/json", 200, state.image_inspect(image)
+            if method == "POST":
+                prune = re.fullmatch(r"/(containers|images|volumes|networks)/prune", path)
+                if prune:
+                    return path, 200, getattr(state, f"prune_{prune.group(1)}")(filters)
+        # unknown paths may embed IDs; keep them out of the per-route stats
+        return "<unmatched>", 404, {"message": f"page not found: {method} {path}"}
+
+    def control(self, method, path, query):
+        server = self.server
+        if method == "GET" and path == "/_fake/stats":
+            return path, 200, {**server.stats.as_dict(), "rss_bytes": _rss()}
+        if method == "POST" and path == "/_fake/stats/reset":
+            server.stats.reset()
+            return path, 200, {}
+        if method == "POST" and path == "/_fake/seed":
+            counts = {k: int(query.get(k, ["0"])[0]) for k in ("containers", "images", "volumes", "networks")}
+            server.state.seed(unused=float(query.get("unused", ["0.5"])[0]), **counts)
+            server.stats.reset()
+            return path, 200, counts
+        return path, 404, {"message": f"unknown control endpoint: {method} {path}"}
+
+
+def _rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class TCPEngineServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, state):
+        super().__init__(address, EngineHandler)
+        self.state = state
+        self.stats = Stats()
+
+
+class UnixEngineServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, state):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, EngineHandler)
+        self.state = state
+        self.stats = Stats()
+
+
+def make_server(socket_path=None, port=0, state=None):
+    """Create (but don't start) a server; returns (server, DOCKER_HOST url)."""
+    state = state or EngineState()
+    if socket_path:
+        server = UnixEngineServer(socket_path, state)
+        return server, f"unix://{socket_path}"
+    server = TCPEngineServer(("127.0.0.1", port), state)
+    return server, f"tcp://127.0.0.1:{server.server_address[1]}"
+
+# =============== ENTRYPOINT
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a fake Docker Engine API from memory.")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--socket", help="Unix socket path to listen on.")
+    where.add_argument("--port", type=int, default=0, help="Localhost TCP port (0 picks a free one).")
+    for resource in ("containers", "images", "volumes", "networks"):
+        parser.add_argument(f"--{resource}", type=int, default=0, help=f"Number of {resource} to seed.")
+    parser.add_argument("--unused", type=float, default=0.5, help="Share of each resource that is prunable.")
+    args = parser.parse_args(argv)
+
+    state = EngineState()
+    state.seed(args.containers, args.images, args.volumes, args.networks, args.unused)
+    server, host = make_server(args.socket, args.port, state)
+    # the first line of output tells a parent process where to connect
+    print(f"DOCKER_HOST={host}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
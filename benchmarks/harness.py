@@ -0,0 +1,208 @@
+"""
+Shared measurement and baseline helpers for the dev-cli benchmarks.
+
+Each case runs a dev-cli command in-process and records wall time, item
+throughput, the number of API calls made (from the instrumentation hooks) and
+peak resident memory (sampled from /proc while the command runs). Results can
+be compared against a stored baseline JSON file; a case regresses when it
+makes more API calls than the baseline, or when wall time or RSS growth rise by
+more than the tolerance. Cases run with other parameters than the baseline's
+are reported as skipped.
+"""
+
+import contextlib
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+from commands.config import instrumentation
+
+# =============== MEMORY
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss():
+    """Resident set size of this process in bytes (0 if it can't be read)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the lifetime peak (KiB on Linux), the best fallback available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler:
+    """Sample RSS on a background thread and keep the peak."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_rss = self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+# =============== API CALL COUNTING
+
+
+class CallCounter:
+    """Instrumentation listener counting API calls per operation and keeping their latencies."""
+
+    def __init__(self):
+        self.calls = {}
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def __call__(self, kind, operation, elapsed, retries=0, error=None, throttled=False):
+        if operation.endswith("<create-client>"):
+            return
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            self.latencies.append(elapsed)
+
+    def reset(self):
+        with self._lock:
+            self.calls = {}
+            self.latencies = []
+
+    def latency_ms(self):
+        """p50/p95/max call latency in milliseconds."""
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+
+        def pick(q):
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+        return {"p50": pick(0.5), "p95": pick(0.95), "max": round(ordered[-1] * 1000, 3)}
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+
+counter = CallCounter()
+instrumentation.add_listener(counter)
+
+# =============== RUNNING CASES
+
+
+def run_cli(args):
+    """Run dev-cli in-process with stdout discarded; exceptions propagate."""
+    from dev_cli.dev_cli import cli
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        cli.main(["--log-level", "WARNING", *args], prog_name="dev-cli", standalone_mode=False)
+
+
+def warm_up(services=(), modules=()):
+    """
+    Import dev-cli, the `modules` its commands import lazily and the service
+    models once, so the first case doesn't pay for them.
+    """
+    import importlib
+
+    from commands.config.logger import setup_logging
+    from dev_cli.dev_cli import cli  # noqa: F401
+
+    setup_logging("WARNING")
+    for module in modules:
+        importlib.import_module(module)
+    if services:
+        import boto3
+
+        for service in services:
+            boto3.client(service)
+
+
+def run_case(name, func, items, params=None, setup=None):
+    """Time `func()` and return the case's result record."""
+    if setup is not None:
+        setup()
+    counter.reset()
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        func()
+        wall = time.perf_counter() - started
+    return {
+        "name": name,
+        "params": params or {},
+        "items": items,
+        "wall_s": round(wall, 4),
+        "throughput_per_s": round(items / wall, 1) if wall else None,
+        "api_calls": counter.total,
+        "api_calls_by_operation": dict(sorted(counter.calls.items())),
+        "api_latency_ms": counter.latency_ms(),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+        "rss_growth_mb": round((rss.peak - rss.start_rss) / 2**20, 1),
+    }
+
+# =============== REPORTING AND BASELINES
+
+
+def format_results(results):
+    lines = [f"{'case':<26} {'items':>8} {'wall s':>8} {'items/s':>10} {'api calls':>10} {'peak MB':>8} {'+MB':>7}"]
+    for r in results:
+        lines.append(f"{r['name']:<26} {r['items']:>8} {r['wall_s']:>8.3f} {r['throughput_per_s'] or 0:>10.1f} "
+                     f"{r['api_calls']:>10} {r['peak_rss_mb']:>8.1f} {r['rss_growth_mb']:>7.1f}")
+    return "\n".join(lines) + "\n"
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return {case["name"]: case for case in json.load(f)["cases"]}
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"python": sys.version.split()[0], "cases": results}, f, indent=2)
+        f.write("\n")
+
+
+def compare(results, baseline, tolerance=0.5, min_wall=0.05):
+    """Return (regressions, skipped): human-readable lists of regressions against
+    `baseline` and of the cases that could not be compared with it.
+
+    API call counts are deterministic, so any increase is a regression. Wall
+    time and RSS growth are noisy and only fail past `tolerance` (0.5 = 50%);
+    wall times below `min_wall` seconds are not compared. Cases missing from
+    the baseline or run with other parameters (e.g. a reduced-size run) are
+    skipped rather than failed.
+    """
+    regressions = []
+    skipped = []
+    for r in results:
+        base = baseline.get(r["name"])
+        if base is None:
+            skipped.append(f"{r['name']}: not in the baseline, re-run with --update-baseline")
+            continue
+        if base["params"] != r["params"]:
+            skipped.append(f"{r['name']}: parameters differ from the baseline ({base['params']} -> {r['params']})")
+            continue
+        if r["api_calls"] > base["api_calls"]:
+            regressions.append(f"{r['name']}: api calls {base['api_calls']} -> {r['api_calls']}")
+        if max(r["wall_s"], base["wall_s"]) >= min_wall and r["wall_s"] > base["wall_s"] * (1 + tolerance):
+            regressions.append(f"{r['name']}: wall time {base['wall_s']:.3f}s -> {r['wall_s']:.3f}s")
+        # compare growth rather than the absolute peak, which depends on what ran before
+        if r["rss_growth_mb"] > max(base["rss_growth_mb"] * (1 + tolerance), base["rss_growth_mb"] + 16):
+            regressions.append(f"{r['name']}: rss growth {base['rss_growth_mb']:.1f}MB -> {r['rss_growth_mb']:.1f}MB")
+    return regressions, skipped
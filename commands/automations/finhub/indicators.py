@@ -0,0 +1,91 @@
+"""
+Vectorised technical indicators over the local history store.
+
+Prices are loaded into a wide frame (one column per ticker, one row per date)
+so every indicator is computed for all tickers at once with pandas/NumPy
+operations instead of looping over tickers.
+"""
+
+import numpy as np
+import pandas as pd
+
+from commands.automations.finhub import store
+
+# =============== DEFAULTS
+
+SMA_WINDOWS = (20, 50, 200)
+RETURN_WINDOWS = {"ret_1d": 1, "ret_5d": 5, "ret_21d": 21, "ret_252d": 252}
+VOLATILITY_WINDOW = 21
+RSI_WINDOW = 14
+TRADING_DAYS = 252
+
+# =============== LOADING
+
+
+def load_wide(tickers=None, interval="1d", column="close", start=None):
+    """Return a date x ticker frame of one store column."""
+    tickers = tickers or store.cached_tickers(interval)
+    series = {}
+    for ticker in tickers:
+        table = store.read_ticker(ticker, interval, ["date", column])
+        if table is None or table.num_rows == 0:
+            continue
+        dates = pd.DatetimeIndex(table.column("date").to_numpy())
+        series[ticker.upper()] = pd.Series(table.column(column).to_numpy(), index=dates)
+    wide = pd.DataFrame(series).sort_index()
+    if start is not None:
+        wide = wide[wide.index >= pd.Timestamp(start)]
+    return wide
+
+# =============== INDICATORS
+
+
+def rsi(close, window=RSI_WINDOW):
+    """Wilder's relative strength index for every column of `close`."""
+    delta = close.diff()
+    gains = delta.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    losses = (-delta.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    rs = gains / losses
+    return 100 - 100 / (1 + rs)
+
+
+def compute(close, volume=None, sma_windows=SMA_WINDOWS):
+    """
+    Compute the latest value of each indicator for every ticker.
+    Returns a frame indexed by ticker with one column per indicator.
+    """
+    # carry prices over gaps (holidays on one exchange, missing bars) so windows line up
+    close = close.ffill()
+    last = close.iloc[-1]
+    result = {"close": last}
+
+    for window in sma_windows:
+        result[f"sma_{window}"] = close.iloc[-window:].mean().where(close.iloc[-window:].count() == window)
+
+    for name, periods in RETURN_WINDOWS.items():
+        if len(close) > periods:
+            result[name] = last / close.iloc[-1 - periods] - 1
+        else:
+            result[name] = pd.Series(np.nan, index=close.columns)
+
+    log_returns = np.log(close / close.shift(1)).iloc[-VOLATILITY_WINDOW:]
+    result[f"vol_{VOLATILITY_WINDOW}d"] = log_returns.std() * np.sqrt(TRADING_DAYS)
+    result[f"rsi_{RSI_WINDOW}"] = rsi(close).iloc[-1]
+
+    if volume is not None:
+        result["avg_volume_20"] = volume.reindex(columns=close.columns).iloc[-20:].mean()
+
+    frame = pd.DataFrame(result)
+    frame.index.name = "ticker"
+    return frame
+
+
+def screen(frame, expressions=(), sort=None, descending=False, limit=None):
+    """Filter an indicator frame with pandas query expressions (all must match)."""
+    for expression in expressions:
+        frame = frame.query(expression)
+    if sort:
+        frame = frame.sort_values(sort, ascending=not descending)
+    if limit:
+        frame = frame.head(limit)
+    return frame
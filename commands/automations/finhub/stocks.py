@@ -1,9 +1,15 @@
 import click
-import yfinance as yf
 import sys
 import os
+from collections import defaultdict
+from commands.config import clients
+from commands.config import metrics
+from commands.config import output
+from commands.config.paths import get_cache_dir
+from commands.config.runner import Runner, concurrency_options
 from pathlib import Path
 import logging
+from commands.config.logger import get_logger
 
 # https://pypi.org/project/yfinance/
 # https://ranaroussi.github.io/yfinance/
@@ -17,12 +23,16 @@ sys.path.insert(0, (parent_dir))
 
 # =============== LOGGING
 
-# set up logging to capture and display logs
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(levelname)s: %(message)s."
-)
-logger = logging.getLogger(__name__)
+# shared logger (configured in commands/config/logger.py)
+logger = get_logger(__name__)
+
+# =============== METRICS
+
+INFO_LOOKUPS = metrics.counter(
+    "dev_cli_stock_info_lookups_total", "Ticker info lookups, by source (cache/network) and result.",
+    ("source", "result"))
+HISTORY_ROWS = metrics.counter(
+    "dev_cli_stock_history_rows_fetched_total", "OHLCV rows downloaded into the history store.")
 
 # =============== STOCKS GROUP
 
@@ -30,38 +40,343 @@ logger = logging.getLogger(__name__)
 def stocks():
     pass
 
+# =============== INFO HELPERS
+
+# number of tickers fetched concurrently
+DEFAULT_CONCURRENCY = 16
+# 'text' is the key/value layout of this command; the rest come from the shared output layer
+OUTPUT_FORMATS = ["text"] + output.FORMATS
+# bar intervals of the history store (store.INTERVALS), listed here so that building the
+# CLI doesn't import the store; yfinance, pandas and pyarrow are only imported by the commands
+INTERVALS = ["1d", "1wk", "1mo"]
+
+
+def read_tickers(tickers, tickers_file):
+    """Merge tickers given with --info and --file, de-duplicated and upper-cased, in input order."""
+    merged = list(tickers)
+    if tickers_file:
+        merged.extend(line.strip() for line in tickers_file)
+    merged = list(dict.fromkeys(t.upper() for t in merged if t and not t.startswith("#")))
+    if not merged:
+        raise click.UsageError("Provide at least one ticker, or a file of tickers with --file.")
+    return merged
+
+
+def parse_fields(fields):
+    """Turn a comma-separated --fields value into a list of field names."""
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+
+# =============== INFO CACHE
+
+# quotes go stale quickly; company profile fields barely change
+QUOTE_TTL = 15 * 60
+STATIC_TTL = 24 * 60 * 60
+INFO_CACHE_FILE = "stocks-info.sqlite3"
+INFO_CACHE_MAX_ENTRIES = 20_000
+# info fields that move with the market and use the quote TTL
+QUOTE_FIELDS = {
+    "currentPrice", "bid", "ask", "bidSize", "askSize", "open", "dayLow", "dayHigh",
+    "previousClose", "volume", "marketCap", "enterpriseValue", "trailingPE", "forwardPE",
+    "priceToBook", "dividendYield", "fiftyDayAverage", "twoHundredDayAverage",
+    "fiftyTwoWeekLow", "fiftyTwoWeekHigh", "fiftyTwoWeekChange", "52WeekChange",
+}
+QUOTE_PREFIXES = ("regularMarket", "preMarket", "postMarket")
+
+
+def is_quote_field(field):
+    return field in QUOTE_FIELDS or field.startswith(QUOTE_PREFIXES)
+
+
+def open_info_cache():
+    # shared for the life of the process; don't close it
+    return clients.disk_cache(get_cache_dir() / INFO_CACHE_FILE, ttl=STATIC_TTL, max_entries=INFO_CACHE_MAX_ENTRIES)
+
+
+def cache_info(cache, ticker, data):
+    """Store a ticker's info as separate quote and static entries."""
+    quote = {k: v for k, v in data.items() if is_quote_field(k)}
+    static = {k: v for k, v in data.items() if not is_quote_field(k)}
+    cache.set_many({f"quote|{ticker}": quote, f"static|{ticker}": static})
+
+
+def cached_infos(cache, tickers, fields=None, max_age=None):
+    """
+    Look up many tickers in the info cache at once.
+    Returns ticker -> info for tickers whose needed parts are all fresh;
+    `max_age` (seconds) overrides both TTLs.
+    """
+    if fields:
+        kinds = {"quote" if is_quote_field(f) else "static" for f in fields}
+    else:
+        kinds = {"quote", "static"}
+    ttls = {"quote": QUOTE_TTL, "static": STATIC_TTL}
+    parts = {
+        kind: cache.get_many([f"{kind}|{t}" for t in tickers], ttls[kind] if max_age is None else max_age)
+        for kind in kinds
+    }
+    hits = {}
+    for ticker in tickers:
+        keys = [(kind, f"{kind}|{ticker}") for kind in sorted(kinds)]
+        if all(key in parts[kind] for kind, key in keys):
+            hits[ticker] = {k: v for kind, key in keys for k, v in parts[kind][key].items()}
+    return hits
+
+
+def project(data, fields=None):
+    return {f: data.get(f) for f in fields} if fields else data
+
+
+def fetch_info(ticker, fields=None, cache=None):
+    """Fetch `.info` for a single ticker, projected onto `fields` if given."""
+    import yfinance as yf
+
+    try:
+        data = yf.Ticker(ticker).info
+    except Exception:
+        INFO_LOOKUPS.inc(source="network", result="error")
+        raise
+    if cache is not None:
+        cache_info(cache, ticker, data)
+    INFO_LOOKUPS.inc(source="network", result="ok")
+    return project(data, fields)
+
+
+def fetch_infos(tickers, fields=None, runner=None, cache=None, max_age=None):
+    """
+    Fetch info for many tickers, yielding (ticker, data, error) in input order
+    so one bad ticker doesn't stop the batch. Fresh cache entries are served
+    locally; the rest are fetched concurrently.
+    """
+    runner = runner or Runner(DEFAULT_CONCURRENCY)
+    hits = cached_infos(cache, tickers, fields, max_age) if cache is not None else {}
+    # a ticker listed twice is fetched once
+    misses = list(dict.fromkeys(t for t in tickers if t not in hits))
+    logger.debug("Info cache: %s hits, %s misses.", len(hits), len(misses))
+    INFO_LOOKUPS.inc(len(hits), source="cache", result="ok")
+    fetched = runner.map(lambda t: fetch_info(t, fields, cache), misses)
+    # results are matched to tickers by the ticker they were fetched for, never by position
+    results = {}
+    for ticker in tickers:
+        if ticker in hits:
+            yield ticker, project(hits[ticker], fields), None
+            continue
+        while ticker not in results:
+            result = next(fetched, None)
+            # with --fail-fast the stream ends early at the first failure
+            if result is None:
+                return
+            results[result.item] = result
+        yield ticker, results[ticker].value, results[ticker].error
+
+
+class InfoTextWriter(output.Writer):
+    """The 'text' layout: a '== TICKER' heading followed by one 'key: value' line per field."""
+
+    def _write(self, row):
+        self._emit(f"== {row['symbol']}\n" + "".join(f"{k}: {v}\n" for k, v in row.items() if k != "symbol"))
+
+
+class SymbolWriter(output.Writer):
+    """The 'text' layout of screen: just the matching tickers, one per line."""
+
+    def _write(self, row):
+        self._emit(f"{row['symbol']}\n")
+
+
+def write_infos(results, fmt, fields=None, out=None, text_writer=InfoTextWriter):
+    """Write (ticker, data) pairs to `out` (stdout by default) in the requested format."""
+    if fmt in ("csv", "table") and not fields:
+        # without a projection the columns are the union of every ticker's keys
+        results = list(results)
+        fields = list(dict.fromkeys(k for _, data in results for k in data))
+    columns = ["symbol"] + (fields or [])
+    writer = text_writer(columns, out) if fmt == "text" else output.open_writer(columns, fmt, out)
+    with writer:
+        writer.write_all({"symbol": ticker, **data} for ticker, data in results)
+
 # =============== STOCKS COMMAND
 
-@click.command(help="Fetch info for a stock ticker from Yahoo Finance.")
-@click.option("-i", "--info", required=True, help="Stock ticker (as listed on Yahoo Finance), e.g., 'GOOGL', 'TSLA', 'AMZN'.")
-def get_info(info):
+@click.command(help="Fetch info for one or more stock tickers from Yahoo Finance.")
+@click.option("-i", "--info", "tickers", multiple=True, help="Stock ticker (as listed on Yahoo Finance), e.g., 'GOOGL', 'TSLA', 'AMZN'. Can be repeated.")
+@click.option("-f", "--file", "tickers_file", type=click.File("r"), help="Read tickers from a file, one per line ('-' for stdin).")
+@click.option("--fields", help="Comma-separated list of info fields to output, e.g., 'currentPrice,marketCap'.")
+@click.option("-o", "--format", "fmt", type=click.Choice(OUTPUT_FORMATS),
+              help="Output format (default: the dev-cli --output format, else 'text').")
+@concurrency_options(DEFAULT_CONCURRENCY, "tickers to fetch", aliases=("-w", "--workers"))
+@click.option("--max-age", type=click.IntRange(min=0),
+              help=f"Maximum age in seconds of cached info to reuse (default: {QUOTE_TTL} for quote fields, {STATIC_TTL} for static fields).")
+@click.option("--no-cache", is_flag=True, help="Bypass the local info cache.")
+def get_info(tickers, tickers_file, fields, fmt, concurrency, fail_fast, max_age, no_cache):
     """
     A CLI tool for executing yfinance API calls to fetch stock market data.\n\n"
          "Note: The ticker symbol must match Yahoo Finance's symbols exactly.\n"
          "Example: 'AAPL' for Apple, 'TSLA' for Tesla. Not all company names are available as tickers.\n"
          "Private companies like 'Winking Studios' may not be listed.
     """
+    tickers = read_tickers(tickers, tickers_file)
+    fields = parse_fields(fields)
+    fmt = output.selected_format(fmt, default="text")
+    cache = None if no_cache else open_info_cache()
+    runner = Runner(concurrency, fail_fast)
+
+    def successful():
+        # failures are collected on the runner and only good results reach the writer
+        for ticker, data, error in fetch_infos(tickers, fields, runner, cache, max_age):
+            if error is not None:
+                continue
+            yield ticker, data
+
     try:
-        # attempt to fetch the stock information using Yahoo Finance's Ticker method
-        dat = yf.Ticker(info)
-        # retrieve information about the stock
-        data = dat.info
-        logger.info("Stock information:")
-        # loop through the data and print each key-value pair
-        for k, v in data.items():
-            print(f"{k}: {v}")
-    
+        if fmt == "text":
+            logger.info("Stock information:")
+        write_infos(successful(), fmt, fields)
+
     # handle ValueError (if any) and log it
     except ValueError as e:
-        logger.error(f"Value error: {e}")
+        logger.error("Value error: %s", e)
     
     # handle any other unexpected exceptions and log them
     except Exception as e:
-        logger.error(f"Exception error: {e}")
+        logger.error("Exception error: %s", e)
+
+    runner.finish("tickers")
+
+
+# =============== HISTORY COMMAND
+
+def download_range(tickers, start, end, interval):
+    """
+    Download one date range for a group of tickers in a single yfinance call.
+    Returns a dict of ticker -> normalised DataFrame.
+    """
+    import pandas as pd
+    import yfinance as yf
+
+    from commands.automations.finhub import store
+
+    df = yf.download(tickers, start=start, end=end, interval=interval, group_by="ticker",
+                     auto_adjust=False, threads=True, progress=False)
+    frames = {}
+    for ticker in tickers:
+        if df is None or df.empty:
+            frames[ticker] = store.normalise_download(pd.DataFrame())
+        elif isinstance(df.columns, pd.MultiIndex):
+            part = df[ticker] if ticker in df.columns.get_level_values(0) else pd.DataFrame()
+            frames[ticker] = store.normalise_download(part)
+        else:
+            frames[ticker] = store.normalise_download(df)
+    return frames
+
+
+@click.command(help="Download OHLCV history into the local store, fetching only missing date ranges.")
+@click.option("-i", "--ticker", "tickers", multiple=True, help="Stock ticker, e.g., 'AAPL'. Can be repeated.")
+@click.option("-f", "--file", "tickers_file", type=click.File("r"), help="Read tickers from a file, one per line ('-' for stdin).")
+@click.option("--start", type=click.DateTime(formats=["%Y-%m-%d"]), help="First date to fetch (default: 5 years ago).")
+@click.option("--end", type=click.DateTime(formats=["%Y-%m-%d"]), help="Date to fetch up to, exclusive (default: tomorrow).")
+@click.option("--interval", type=click.Choice(INTERVALS), default="1d", show_default=True, help="Bar interval.")
+@click.option("--refresh", is_flag=True, help="Re-download the whole range even if it is already cached.")
+def history(tickers, tickers_file, start, end, interval, refresh):
+    import pandas as pd
+
+    from commands.automations.finhub import store
+
+    tickers = read_tickers(tickers, tickers_file)
+    today = pd.Timestamp.today().normalize()
+    start = pd.Timestamp(start) if start else today - pd.DateOffset(years=5)
+    end = pd.Timestamp(end) if end else today + pd.Timedelta(days=1)
+    if start >= end:
+        raise click.BadParameter("--start must be before --end.")
+
+    try:
+        # group tickers that are missing the same range so each range is one multi-ticker download
+        plan = defaultdict(list)
+        for ticker in tickers:
+            ranges = [(start, end)] if refresh else store.missing_ranges(ticker, start, end, interval)
+            for missing in ranges:
+                plan[missing].append(ticker)
+
+        if not plan:
+            logger.info("All %s tickers are up to date in %s", len(tickers), store.history_dir(interval))
+            return
+
+        downloaded = defaultdict(list)
+        for (range_start, range_end), group in plan.items():
+            logger.info("Downloading %s to %s for %s tickers", range_start.date(), range_end.date(), len(group))
+            for ticker, frame in download_range(group, range_start, range_end, interval).items():
+                downloaded[ticker].append((frame, range_start, range_end))
+
+        for ticker, parts in downloaded.items():
+            # yfinance reports failed or throttled downloads as empty frames: record no coverage
+            # for those ranges, so the next run fetches them again
+            parts = [part for part in parts if not part[0].empty]
+            if not parts:
+                logger.warning("%s: no rows returned, will retry on the next run", ticker)
+                continue
+            rows = pd.concat([frame for frame, _, _ in parts], ignore_index=True)
+            covered_start = min(range_start for _, range_start, _ in parts)
+            # don't mark today as covered: its bar is still changing
+            covered_end = max(min(range_end, today) for _, _, range_end in parts)
+            covered_end = max(covered_end, covered_start)
+            total = store.write_ticker(ticker, rows, covered_start, covered_end, interval)
+            HISTORY_ROWS.inc(len(rows))
+            logger.info("%s: %s rows fetched, %s rows stored", ticker, len(rows), total)
+
+    except RuntimeError as e:
+        logger.error("%s", e)
+    except Exception as e:
+        logger.error("Exception error: %s", e)
+
+
+# =============== SCREEN COMMAND
+
+@click.command(help="""Compute indicators over cached history and list the tickers that match.
+
+Run 'history' first to populate the local store. Filters are pandas query
+expressions over the indicator columns: close, sma_20, sma_50, sma_200,
+ret_1d, ret_5d, ret_21d, ret_252d, vol_21d, rsi_14, avg_volume_20.
+
+Example: --where 'rsi_14 < 30' --where 'close > sma_200'""")
+@click.option("-i", "--ticker", "tickers", multiple=True, help="Limit screening to these tickers (default: all cached).")
+@click.option("-f", "--file", "tickers_file", type=click.File("r"), help="Read tickers from a file, one per line ('-' for stdin).")
+@click.option("-w", "--where", "expressions", multiple=True, help="Filter expression. Can be repeated; all must match.")
+@click.option("--sort", help="Indicator column to sort the matches by.")
+@click.option("--desc", is_flag=True, help="Sort in descending order.")
+@click.option("--limit", type=click.IntRange(min=1), help="Maximum number of tickers to output.")
+@click.option("--interval", type=click.Choice(INTERVALS), default="1d", show_default=True, help="Bar interval.")
+@click.option("-o", "--format", "fmt", type=click.Choice(OUTPUT_FORMATS),
+              help="Output format (default: the dev-cli --output format, else 'text', which prints only the matching tickers).")
+def screen(tickers, tickers_file, expressions, sort, desc, limit, interval, fmt):
+    from commands.automations.finhub import indicators
+
+    selected = read_tickers(tickers, tickers_file) if tickers or tickers_file else None
+    fmt = output.selected_format(fmt, default="text")
+    try:
+        close = indicators.load_wide(selected, interval, "close")
+        if close.empty:
+            logger.warning("No cached history found. Run 'history' first.")
+            return
+        volume = indicators.load_wide(selected, interval, "volume")
+        frame = indicators.compute(close, volume)
+        matches = indicators.screen(frame, expressions, sort, desc, limit)
+
+        rows = ((ticker, row) for ticker, row in zip(matches.index, matches.to_dict("records")))
+        write_infos(rows, fmt, list(matches.columns), text_writer=SymbolWriter)
+        logger.info("%s of %s tickers matched", len(matches), len(frame))
+
+    # invalid filter expressions or unknown sort columns
+    except (KeyError, NameError, ValueError, SyntaxError) as e:
+        logger.error("Invalid screen expression: %s", e)
+    except Exception as e:
+        logger.error("Exception error: %s", e)
 
 
 # add command to stocks group
 stocks.add_command(get_info)
+stocks.add_command(history)
+stocks.add_command(screen)
 
 # =============== MAIN ENTRYPOINT
 
@@ -0,0 +1,187 @@
+"""
+Local columnar store for historical stock prices.
+
+Each ticker is kept in its own uncompressed Arrow IPC file under the dev-cli
+cache directory (stocks/history/<interval>/<TICKER>.arrow). The date range that
+has already been requested from Yahoo Finance is recorded in the file's schema
+metadata, so later runs only download the ranges that are missing.
+
+Arrow IPC files can be memory-mapped without copying, so analytics scripts can
+read the cache directly:
+
+    from commands.automations.finhub import store
+    table = store.read_ticker("AAPL")            # zero-copy pyarrow.Table
+    df = store.load_history(["AAPL", "MSFT"])    # long pandas DataFrame
+"""
+
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from commands.config.paths import get_cache_dir
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+# =============== CONSTANTS
+
+INTERVALS = ["1d", "1wk", "1mo"]
+COLUMNS = ["date", "open", "high", "low", "close", "adj_close", "volume"]
+# yfinance column names -> store column names
+YF_COLUMNS = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Adj Close": "adj_close",
+    "Volume": "volume",
+}
+# schema metadata keys recording the range already requested
+COVERED_START = b"covered_start"
+COVERED_END = b"covered_end"
+
+# =============== PATHS
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the history store: pip install pyarrow")
+
+
+def history_dir(interval="1d"):
+    return get_cache_dir("stocks", "history", interval)
+
+
+def ticker_path(ticker, interval="1d"):
+    return history_dir(interval) / f"{ticker.upper()}.arrow"
+
+
+def cached_tickers(interval="1d"):
+    """Return the tickers that have a file in the store."""
+    return sorted(p.stem for p in history_dir(interval).glob("*.arrow"))
+
+# =============== READS
+
+
+def read_ticker(ticker, interval="1d", columns=None):
+    """Memory-map a ticker's file and return it as a pyarrow Table (None if not cached)."""
+    require_pyarrow()
+    path = ticker_path(ticker, interval)
+    if not path.exists():
+        return None
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns:
+        table = table.select(columns)
+    return table
+
+
+def coverage(ticker, interval="1d"):
+    """Return the (start, end) range already requested for a ticker, or None."""
+    require_pyarrow()
+    path = ticker_path(ticker, interval)
+    if not path.exists():
+        return None
+    with pa.memory_map(str(path), "r") as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    if COVERED_START not in metadata:
+        return None
+    return pd.Timestamp(metadata[COVERED_START].decode()), pd.Timestamp(metadata[COVERED_END].decode())
+
+
+def load_history(tickers=None, interval="1d", start=None, end=None, columns=None):
+    """
+    Load cached history for `tickers` (default: everything cached) into one long
+    DataFrame with a 'ticker' column. `start` is inclusive and `end` exclusive.
+    """
+    tickers = tickers or cached_tickers(interval)
+    columns = columns and ["date"] + [c for c in columns if c != "date"]
+    frames = []
+    for ticker in tickers:
+        table = read_ticker(ticker, interval, columns)
+        if table is None:
+            continue
+        df = table.to_pandas()
+        if start is not None:
+            df = df[df["date"] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df["date"] < pd.Timestamp(end)]
+        df.insert(0, "ticker", ticker.upper())
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["ticker"] + (columns or COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+# =============== WRITES
+
+
+def missing_ranges(ticker, start, end, interval="1d"):
+    """
+    Return the [start, end) ranges to download so a ticker's coverage includes
+    [start, end). Coverage is a single range, so a request that doesn't touch it
+    is extended up to it; otherwise the gap in between would be recorded as covered.
+    """
+    covered = coverage(ticker, interval)
+    if covered is None:
+        return [(start, end)]
+    covered_start, covered_end = covered
+    ranges = []
+    if start < covered_start:
+        ranges.append((start, covered_start))
+    if end > covered_end:
+        ranges.append((covered_end, end))
+    return ranges
+
+
+def normalise_download(df):
+    """Convert a single-ticker yfinance frame to the store's columns."""
+    df = df.rename(columns=YF_COLUMNS).dropna(how="all")
+    df.index = pd.DatetimeIndex(df.index).tz_localize(None)
+    df = df.reset_index(names="date")
+    for column in COLUMNS:
+        if column not in df:
+            df[column] = float("nan")
+    df = df[COLUMNS]
+    df["volume"] = df["volume"].fillna(0).astype("int64")
+    return df
+
+
+def write_ticker(ticker, new_rows, covered_start, covered_end, interval="1d"):
+    """
+    Merge `new_rows` into a ticker's file and widen its recorded coverage.
+    Coverage is only widened by a range that overlaps or touches it; rows from
+    a range beyond a gap are stored but left uncovered, so they are fetched again.
+    The file is replaced atomically so readers never see a partial write.
+    Returns the total number of stored rows.
+    """
+    require_pyarrow()
+    existing = read_ticker(ticker, interval)
+    previous = coverage(ticker, interval)
+    frames = [new_rows]
+    if existing is not None:
+        frames.insert(0, existing.to_pandas())
+    if previous is not None:
+        if covered_start > previous[1] or covered_end < previous[0]:
+            covered_start, covered_end = previous
+        else:
+            covered_start, covered_end = min(covered_start, previous[0]), max(covered_end, previous[1])
+    merged = pd.concat(frames, ignore_index=True)
+    # newer downloads win when a date appears twice (e.g. a partial bar for today)
+    merged = merged.drop_duplicates("date", keep="last").sort_values("date", ignore_index=True)
+
+    table = pa.Table.from_pandas(merged, preserve_index=False)
+    table = table.replace_schema_metadata({
+        COVERED_START: covered_start.isoformat().encode(),
+        COVERED_END: covered_end.isoformat().encode(),
+    })
+    path = ticker_path(ticker, interval)
+    tmp_path = Path(f"{path}.tmp-{os.getpid()}")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return table.num_rows
@@ -15,8 +15,13 @@ import json
 import sys
 from pathlib import Path
 import logging
+from commands.config.logger import get_logger
 from collections import defaultdict
-import requests
+from commands.config import clients
+from commands.config import metrics
+from commands.config import output
+from commands.config.runner import Runner, concurrency_options
+from commands.config.paths import get_cache_dir
 
 # =============== PATH
 
@@ -26,11 +31,13 @@ sys.path.insert(0, (parent_dir))
 
 # =============== LOGGING
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(levelname)s: %(message)s."
-)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+# =============== METRICS
+
+PREDICTIONS = metrics.counter(
+    "dev_cli_name_predictions_total", "Name predictions served, by endpoint and source (cache/network).",
+    ("endpoint", "source"))
 
 # =============== CLI GROUP
 
@@ -47,7 +54,7 @@ def random_api():
 def cats():
     try:
         # send a GET request to get the CatFact API
-        response = requests.get("https://catfact.ninja/fact")
+        response = clients.http_session().get("https://catfact.ninja/fact")
         # will raise an HTTPError for bad responses (4xx or 5xx)
         response.raise_for_status()
         # check if the response code is 200 (OK)
@@ -60,20 +67,20 @@ def cats():
                 # iterate over JSON data
                 for k, v in response_json.items():
                     # log each key-value pair
-                    logger.info(f"{k}: {v}")
+                    logger.info("%s: %s", k, v)
             else:
                 # warn if the response format is unexpected
                 logger.warning("Unexpected response format.")
         else:
             # log an error if the status code is not 200 (OK)
-            logger.error(f"Unable to get API response. Status code: {response.status_code}")
+            logger.error("Unable to get API response. Status code: %s", response.status_code)
 
     # handle errors when the JSON is invalid (e.g., unable to parse)
     except ValueError as v:
-        logger.error(f"Value error while parsing JSON: {v}")
+        logger.error("Value error while parsing JSON: %s", v)
     # catch all other unexpected exceptions.
     except Exception as e:
-        logger.error(f"Exception occurred: {e}")
+        logger.error("Exception occurred: %s", e)
 
 # =============== RANDOM ACTIVITIES
 
@@ -81,7 +88,7 @@ def cats():
 def bored():
     try:
         # send a GET request to get the BoredPi API
-        response = requests.get("https://www.boredapi.com/api/activity")
+        response = clients.http_session().get("https://www.boredapi.com/api/activity")
         # will raise an HTTPError for bad responses (4xx or 5xx)
         response.raise_for_status()
         # check if the response code is 200 (OK)
@@ -92,103 +99,233 @@ def bored():
             if isinstance(response_json, dict):
                 for k, v in response_json.items():
                     # log each key-value pair
-                    logger.info(f"{k}: {v}")
+                    logger.info("%s: %s", k, v)
             else:
                 # warn if the response format is unexpected
                 logger.error("Unexpected response format.")
         else:
             # log an error if the status code is not 200 (OK)
-            logger.error(f"Unable to get API response. Status code: {response.status_code}")
+            logger.error("Unable to get API response. Status code: %s", response.status_code)
     
     # handle errors when the JSON is invalid (e.g., unable to parse)
     except ValueError as v:
-        logger.error(f"Value error whilst parsing JSON: {v}")
+        logger.error("Value error whilst parsing JSON: %s", v)
     # catch all other unexpected exceptions.
     except Exception as e:
-        logger.error(f"Exception occured: {e}")
+        logger.error("Exception occured: %s", e)
+
+# =============== NAME PREDICTION HELPERS
+
+# upstream name-prediction services
+GENDERIZE_URL = "https://api.genderize.io"
+AGIFY_URL = "https://api.agify.io"
+NATIONALIZE_URL = "https://api.nationalize.io"
+
+# the services accept at most 10 name[] parameters per request
+MAX_NAMES_PER_REQUEST = 10
+# number of batched requests sent concurrently
+DEFAULT_CONCURRENCY = 8
+REQUEST_TIMEOUT = 30
+
+# predictions for a name are effectively static, so cache them on disk
+CACHE_FILE = "name-predictions.sqlite3"
+DEFAULT_CACHE_TTL_DAYS = 30
+# entries are kept this long whatever --cache-ttl a single run reads with
+CACHE_RETENTION_DAYS = 365
+CACHE_MAX_ENTRIES = 1_000_000
+
+
+def read_names(names, names_file):
+    """Merge names given with --name and --file, skipping blank lines."""
+    merged = list(names)
+    if names_file:
+        merged.extend(line.strip() for line in names_file)
+    merged = [n for n in merged if n]
+    if not merged:
+        raise click.UsageError("Provide at least one name with --name or --file.")
+    return merged
+
+
+def chunk_names(names, size=MAX_NAMES_PER_REQUEST):
+    """Split names into consecutive batches of at most `size` names."""
+    return [names[i:i + size] for i in range(0, len(names), size)]
+
+
+def fetch_batch(session, url, names, country=None):
+    """Send one request for a batch of names and return the predictions in order."""
+    params = [("name[]", n) for n in names]
+    if country:
+        params.append(("country_id", country))
+    response = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+    # will raise an HTTPError for bad responses (4xx or 5xx)
+    response.raise_for_status()
+    response_json = response.json()
+    # the batch endpoint answers with one object per name, in request order
+    if not isinstance(response_json, list) or len(response_json) != len(names):
+        raise ValueError("Unexpected response format.")
+    return response_json
+
+
+def predict(url, names, country=None, runner=None):
+    """
+    Fetch predictions for many names using the batch endpoint.
+    Batches are sent concurrently and merged back in input order; names in a
+    failed batch get None (the failure is recorded on the runner).
+    """
+    runner = runner or Runner(DEFAULT_CONCURRENCY)
+    predictions = []
+    # shared session with a connection pool sized to match the concurrency
+    session = clients.http_session(runner.concurrency)
+    for result in runner.map(lambda batch: fetch_batch(session, url, batch, country), chunk_names(names)):
+        predictions.extend(result.value if result.error is None else [None] * len(result.item))
+    # with --fail-fast, batches after the failure are never sent
+    predictions.extend([None] * (len(names) - len(predictions)))
+    return predictions
+
+
+def cache_key(url, name, country=None):
+    """Build the cache key for a prediction: (endpoint, normalised name, country)."""
+    return f"{url}|{(country or '').upper()}|{name.strip().casefold()}"
+
+
+def open_cache():
+    # shared for the life of the process; don't close it
+    return clients.disk_cache(get_cache_dir() / CACHE_FILE, ttl=CACHE_RETENTION_DAYS * 86400,
+                              max_entries=CACHE_MAX_ENTRIES)
+
+
+def predict_cached(url, names, country=None, runner=None, cache=None, max_age=None):
+    """
+    Like predict(), but checks the cache in bulk first and only sends the
+    misses over the network. Duplicate names are fetched once. Entries older
+    than `max_age` seconds count as misses (default: the cache's own TTL).
+    """
+    if cache is None:
+        PREDICTIONS.inc(len(names), endpoint=url, source="network")
+        return predict(url, names, country, runner)
+    keys = [cache_key(url, name, country) for name in names]
+    hits = cache.get_many(keys, max_age)
+    # collect one name per missing key, preserving input order
+    misses = {}
+    for key, name in zip(keys, names):
+        if key not in hits and key not in misses:
+            misses[key] = name
+    logger.debug("Prediction cache: %s hits, %s misses.", len(hits), len(misses))
+    PREDICTIONS.inc(len(names) - len(misses), endpoint=url, source="cache")
+    PREDICTIONS.inc(len(misses), endpoint=url, source="network")
+    if misses:
+        fetched = predict(url, list(misses.values()), country, runner)
+        fetched = dict(zip(misses.keys(), fetched))
+        # never cache the placeholders of failed batches
+        cache.set_many({key: value for key, value in fetched.items() if value is not None})
+        hits.update(fetched)
+    return [hits[key] for key in keys]
+
+
+def run_prediction(url, names, country, runner, no_cache, cache_ttl):
+    """Resolve predictions for the command line, using the cache unless disabled."""
+    if no_cache:
+        return predict_cached(url, names, country, runner, cache=None)
+    # --cache-ttl only limits what this run reads; eviction uses the fixed retention period
+    return predict_cached(url, names, country, runner, open_cache(), max_age=cache_ttl * 86400)
+
+
+def make_runner(concurrency, fail_fast):
+    return Runner(concurrency, fail_fast, label=lambda batch: ", ".join(batch))
+
+
+def write_predictions(predictions, columns):
+    """Write one row per prediction in the selected --output format, skipping names whose batch failed."""
+    with output.open_writer(columns) as out:
+        out.write_all(prediction for prediction in predictions if prediction is not None)
+
+
+def name_options(func):
+    """Shared options for the name-prediction commands."""
+    func = click.option("--cache-ttl", default=DEFAULT_CACHE_TTL_DAYS, show_default=True, type=click.IntRange(min=0),
+                        help="Maximum age of cached predictions, in days.")(func)
+    func = click.option("--no-cache", is_flag=True, help="Bypass the local prediction cache.")(func)
+    # -w/--workers are kept as aliases of --concurrency
+    func = concurrency_options(DEFAULT_CONCURRENCY, "batched requests", aliases=("-w", "--workers"))(func)
+    func = click.option("-f", "--file", "names_file", type=click.File("r"),
+                        help="Read names from a file, one per line ('-' for stdin).")(func)
+    func = click.option("-n", "--name", "names", multiple=True, help="Input a random name. Can be repeated.")(func)
+    return func
+
+def prediction_columns(columns, country=None):
+    # localised predictions also echo the country back
+    return columns + ["country_id"] if country else columns
+
+# localises predictions (supported by genderize and agify only)
+country_option = click.option("-c", "--country", help="Localise predictions to a country (ISO 3166-1 alpha-2), e.g., 'GB'.")
 
 # =============== PREDICT GENDER
 
 @click.command(help="Run script to predict gender based on name input.")
-@click.option("-n", "--name", required=True, help="Input a random name.")
-def gender(name):
+@name_options
+@country_option
+def gender(names, names_file, country, concurrency, fail_fast, no_cache, cache_ttl):
+    names = read_names(names, names_file)
+    runner = make_runner(concurrency, fail_fast)
     try:
-        # send a GET request to get the Genderize API
-        response = requests.get(f"https://api.genderize.io?name={name}")
-        # will raise an HTTPError for bad responses (4xx or 5xx)
-        response.raise_for_status()
-        # check if the response code is 200 (OK)
-        if response.status_code == 200:
-            # parse over the JSON data
-            response_json = response.json()
-            # safely iterate over the key-value pairs in the JSON (if it's a dictionary)
-            if isinstance(response_json, dict):
-                for k, v in response_json.items():
-                    # log each key-value pair
-                    logger.info(f"{k}: {v}")
-            else:
-                # warn if the response format is unexpected
-                logger.error("Unexpected response format.")
-        else:
-            # warn if the status code is not 200 (OK)
-            logger.error(f"Unable to get API response. Status code: {response.status_code}")
+        # send batched GET requests to the Genderize API for names not already cached
+        predictions = run_prediction(GENDERIZE_URL, names, country, runner, no_cache, cache_ttl)
+        write_predictions(predictions, prediction_columns(["name", "gender", "probability", "count"], country))
     # handle errors when the JSON is invalid (e.g./ unable to parse)
     except ValueError as v:
-        logger.error(f"Value error whilst parsing JSON: {v}")
+        logger.error("Value error whilst parsing JSON: %s", v)
     # catch all other unexpected exceptions
     except Exception as e:
-        logger.error(f"Exception occured: {e}")
+        logger.error("Exception occured: %s", e)
+    runner.finish("requests")
 
 # =============== PREDICT AGE
 
 @click.command(help="Run script to predict age based on name input.")
-@click.option("-n", "--name", required=True, help="Input a random name.")
-def age(name):
+@name_options
+@country_option
+def age(names, names_file, country, concurrency, fail_fast, no_cache, cache_ttl):
+    names = read_names(names, names_file)
+    runner = make_runner(concurrency, fail_fast)
     try:
-        response = requests.get(f"https://api.agify.io?name={name}")
-        # will raise an HTTPError for bad responses (4xx or 5xx)
-        response.raise_for_status()
-        if response.status_code == 200:
-            response_json = response.json()
-            if isinstance(response_json, dict):
-                for k, v in response_json.items():
-                    logger.info(f"{k}: {v}")
-            else:
-                logger.error("Unexpected response format.")
-        else:
-            logger.error(f"Unable to get API response. Status code: {response.status_code}")
+        predictions = run_prediction(AGIFY_URL, names, country, runner, no_cache, cache_ttl)
+        write_predictions(predictions, prediction_columns(["name", "age", "count"], country))
     except ValueError as v:
-        logger.error(f"Value error whilst parsing JSON: {v}")
+        logger.error("Value error whilst parsing JSON: %s", v)
     except Exception as e:
-        logger.error(f"Exception occured: {e}")
+        logger.error("Exception occured: %s", e)
+    runner.finish("requests")
 
 # =============== PREDICT NATIONALITY
 
 @click.command(help="Run script to predict nationality based on name input")
-@click.option("-n", "--name", required=True, help="Input a random name.")
-def nationality(name):
+@name_options
+def nationality(names, names_file, concurrency, fail_fast, no_cache, cache_ttl):
+    names = read_names(names, names_file)
+    runner = make_runner(concurrency, fail_fast)
     try:
-        response = requests.get(f"https://api.nationalize.io?name={name}")
-        response.raise_for_status()
-        if response.status_code == 200:
-            response_json = response.json()
-            if isinstance(response_json, dict):
-                countries = response_json.get("country", [])
-                if countries:
-                    logger.info(f"Results for the name '{name}':")
-                    for country in countries:
-                        country_name = country.get('country_id')
-                        probability = country.get('probability') * 100  # Convert to percentage
-                        logger.info(f"Country: {country_name.upper()} | Probability: {probability:.2f}%")
-                else:
-                    logger.warning(f"No country data found for the name '{name}'")
-        else:
-            logger.error(f"Unable to get API response. Status code: {response.status_code}")
+        predictions = run_prediction(NATIONALIZE_URL, names, None, runner, no_cache, cache_ttl)
+        # one row per (name, country) pair, most likely country first
+        with output.open_writer(["name", "country_id", "probability"]) as out:
+            for name, prediction in zip(names, predictions):
+                # the batch for this name failed; reported below
+                if prediction is None:
+                    continue
+                countries = prediction.get("country", [])
+                if not countries:
+                    logger.warning("No country data found for the name '%s'", name)
+                for country in countries:
+                    out.write({
+                        "name": name,
+                        "country_id": (country.get('country_id') or "").upper(),
+                        "probability": country.get('probability'),
+                    })
     except ValueError as e:
-        logger.error(f"Value error whilst parsing JSON: {e}")
+        logger.error("Value error whilst parsing JSON: %s", e)
     except Exception as e:
-        logger.error(f"Exception occured: {e}")
-    
+        logger.error("Exception occured: %s", e)
+    runner.finish("requests")
+
 # =============== ADD COMMANDS
 
 random_api.add_command(cats)
@@ -25,11 +25,19 @@ import boto3
 import botocore.exceptions
 import click
 import json
+import datetime
+import math
+import time
 from collections import defaultdict
 import sys
 from pathlib import Path
 import botocore
 import logging
+from commands.config.logger import command_level, get_logger
+from commands.config import clients
+from commands.config import metrics
+from commands.config import output
+from commands.config.runner import Runner, concurrency_options
 import json
 from botocore.exceptions import BotoCoreError, ClientError
 
@@ -42,77 +50,633 @@ sys.path.insert(0, (parent_dir))
 
 # =============== LOGGING SETUP
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(levelname)s: %(message)s."
+logger = get_logger(__name__)
+
+# =============== METRICS
+
+INSTANCES = metrics.gauge(
+    "dev_cli_ec2_instances", "EC2 instances seen by describe, by state.", ("region", "state"))
+TERMINATED = metrics.counter(
+    "dev_cli_ec2_instances_terminated_total", "EC2 instances terminated.", ("region",))
+STATE_CHANGES = metrics.counter(
+    "dev_cli_ec2_state_changes_total", "EC2 instances started, stopped or rebooted.", ("region", "action"))
+UNDERUSED = metrics.gauge(
+    "dev_cli_ec2_underused_instances", "Instances flagged as underused by utilization.", ("region",))
+TAG_WRITES = metrics.counter(
+    "dev_cli_ec2_tag_writes_total", "CreateTags/DeleteTags calls made by tag.", ("region", "operation"))
+
+# =============== HELPERS
+
+def describe_error(e):
+    """Describe boto3/botocore errors in the module's usual format."""
+    if isinstance(e, botocore.exceptions.ClientError):
+        return f"AWS ClientError: {e.response['Error']['Message']}"
+    if isinstance(e, botocore.exceptions.BotoCoreError):
+        return f"AWS Boto3 error: {e}"
+    return f"Unexpected error: {e}"
+
+
+def describe_region(region):
+    """Return (region name, reservations) for every instance in one region."""
+    ec2 = clients.aws("ec2", region)
+    # page through every reservation (the API returns at most 1000 instances per call)
+    paginator = ec2.get_paginator('describe_instances')
+    return ec2.meta.region_name, [r for page in paginator.paginate() for r in page.get('Reservations', [])]
+
+def instance_row(instance, region_name):
+    """The describe row for one instance."""
+    tags = {t['Key']: t['Value'] for t in instance.get('Tags', [])}
+    return {
+        'Name': tags.get('Name', 'N/A'),
+        'InstanceId': instance.get('InstanceId', 'N/A'),
+        'State': instance.get('State', {}).get('Name', 'unknown'),
+        'InstanceType': instance.get('InstanceType', 'N/A'),
+        'AZ': instance.get('Placement', {}).get('AvailabilityZone', 'N/A'),
+        'PublicIp': instance.get('PublicIpAddress', 'N/A'),
+        'PrivateIp': instance.get('PrivateIpAddress', 'N/A'),
+        'Region': region_name,
+    }
+
+# =============== INSTANCE SELECTION
+
+INSTANCE_STATES = ["pending", "running", "shutting-down", "terminated", "stopping", "stopped"]
+# instance IDs sent per StartInstances/StopInstances/RebootInstances call
+ACTION_BATCH_SIZE = 1000
+# DescribeInstanceStatus takes at most 100 explicit instance IDs per call
+STATUS_BATCH_SIZE = 100
+# action -> (client method, response key listing the state changes, states the action applies to)
+ACTIONS = {
+    "start": ("start_instances", "StartingInstances", ("stopped",)),
+    "stop": ("stop_instances", "StoppingInstances", ("pending", "running")),
+    "reboot": ("reboot_instances", None, ("running",)),
+}
+
+
+def batched(items, size):
+    """Split a list into consecutive chunks of at most `size` items."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def parse_tags(ctx, param, values):
+    """Click callback: turn KEY=VALUE (or bare KEY) options into (key, value) pairs."""
+    tags = []
+    for value in values:
+        key, sep, tag_value = value.partition("=")
+        if not key:
+            raise click.BadParameter(f"expected KEY=VALUE or KEY, got {value!r}")
+        tags.append((key, tag_value if sep else None))
+    return tags
+
+
+def instance_filters(instance_ids=(), tags=(), states=()):
+    """DescribeInstances filters for the selector options; all of them must match."""
+    # IDs go in a filter rather than InstanceIds, which fails in regions that don't have them
+    filters = [{"Name": "instance-id", "Values": list(instance_ids)}] if instance_ids else []
+    for key, value in tags:
+        filters.append({"Name": f"tag:{key}", "Values": [value]} if value is not None
+                       else {"Name": "tag-key", "Values": [key]})
+    if states:
+        filters.append({"Name": "instance-state-name", "Values": list(states)})
+    return filters
+
+
+def select_instances(ec2, filters):
+    """Yield every instance matching `filters`, one page at a time."""
+    paginator = ec2.get_paginator('describe_instances')
+    for page in paginator.paginate(Filters=filters):
+        for reservation in page.get('Reservations', []):
+            yield from reservation.get('Instances', [])
+
+
+def instance_name(instance):
+    return next((t['Value'] for t in instance.get('Tags', []) if t['Key'] == 'Name'), 'N/A')
+
+
+def instance_selectors(what):
+    """Add the shared --region/--instance-id/--tag/--state selector options to a command."""
+    def decorator(func):
+        func = concurrency_options(what=f"regions to {what}")(func)
+        func = click.option("-s", "--state", "states", multiple=True, type=click.Choice(INSTANCE_STATES),
+                            help="Select instances in this state. Can be repeated.")(func)
+        func = click.option("-t", "--tag", "tags", multiple=True, callback=parse_tags,
+                            help="Select instances tagged KEY=VALUE, or with tag KEY. Can be repeated; all must match.")(func)
+        func = click.option("-i", "--instance-id", "instance_ids", multiple=True,
+                            help="Select this instance. Can be repeated.")(func)
+        func = click.option("-r", "--region", "regions", multiple=True,
+                            help="AWS region. Can be repeated to work on several regions concurrently.")(func)
+        return func
+    return decorator
+
+
+def warn_missing(instance_ids, found):
+    missing = [i for i in instance_ids if i not in found]
+    if missing:
+        logger.warning("Instances not found in the selected regions: %s", ", ".join(missing))
+
+# =============== STATE CHANGES
+
+def plan_region(region, filters, action):
+    """Return (region name, instances `action` applies to, instances in other states) for one region."""
+    ec2 = clients.aws("ec2", region)
+    applies = ACTIONS[action][2]
+    targets, skipped = [], []
+    for instance in select_instances(ec2, filters):
+        (targets if instance['State']['Name'] in applies else skipped).append(instance)
+    return ec2.meta.region_name, targets, skipped
+
+
+def apply_action(region, action, instances):
+    """Run `action` on `instances` with as few API calls as possible; return one row per instance."""
+    ec2 = clients.aws("ec2", region)
+    method, changes_key, _ = ACTIONS[action]
+    rows = []
+    for batch in batched(instances, ACTION_BATCH_SIZE):
+        response = getattr(ec2, method)(InstanceIds=[i['InstanceId'] for i in batch])
+        STATE_CHANGES.inc(len(batch), region=region, action=action)
+        # reboots don't change the state and the response doesn't list instances
+        changes = {c['InstanceId']: c for c in response.get(changes_key, [])} if changes_key else {}
+        for instance in batch:
+            change = changes.get(instance['InstanceId'], {})
+            rows.append({
+                'Name': instance_name(instance),
+                'InstanceId': instance['InstanceId'],
+                'PreviousState': change.get('PreviousState', instance['State'])['Name'],
+                'CurrentState': change.get('CurrentState', instance['State'])['Name'],
+                'Region': region,
+            })
+    return rows
+
+
+def change_state(action, regions, instance_ids, tags, states, yes, dry_run, concurrency, fail_fast):
+    """Shared body of start/stop/reboot: select in every region, confirm once, act in batches."""
+    if not (instance_ids or tags or states):
+        raise click.UsageError(f"select the instances to {action} with --instance-id, --tag or --state")
+    filters = instance_filters(instance_ids, tags, states)
+    runner = Runner(concurrency, fail_fast, label=lambda region: region or "default region", format_error=describe_error)
+
+    # step 1: find the matching instances in every region concurrently
+    targets = {}
+    found = set()
+    for result in runner.map(lambda region: plan_region(region, filters, action), regions or [None]):
+        if result.error is not None:
+            continue
+        region_name, instances, skipped = result.value
+        found.update(i['InstanceId'] for i in instances + skipped)
+        if skipped:
+            logger.info("Skipping %d instances in %s that are not %s", len(skipped), region_name,
+                        " or ".join(ACTIONS[action][2]))
+        if instances:
+            targets[region_name] = instances
+    warn_missing(instance_ids, found)
+
+    total = sum(len(instances) for instances in targets.values())
+    columns = ['Name', 'InstanceId', 'PreviousState', 'CurrentState']
+    if len(regions) > 1:
+        columns.append('Region')
+
+    # step 2: confirm once for everything that was selected
+    if not total:
+        logger.info("No instances to %s", action)
+    elif dry_run:
+        logger.info("Dry run: would %s %d instances in %d regions", action, total, len(targets))
+        with output.open_writer(['Name', 'InstanceId', 'State'] + columns[4:]) as out:
+            for region_name, instances in targets.items():
+                for instance in instances:
+                    out.write({'Name': instance_name(instance), 'InstanceId': instance['InstanceId'],
+                               'State': instance['State']['Name'], 'Region': region_name})
+    elif not yes and not click.confirm(f"Are you sure you want to {action} {total} instances in {len(targets)} regions?"):
+        logger.info("%s cancelled by user", action.capitalize())
+    else:
+        # step 3: act on each region's instances in batches, regions concurrently
+        with output.open_writer(columns) as out:
+            for result in runner.map(lambda region: apply_action(region, action, targets[region]), list(targets)):
+                if result.error is not None:
+                    continue
+                for row in result.value:
+                    out.write(row)
+        logger.info("Requested %s for %d instances in %d regions", action, out.count, len(targets))
+
+    runner.finish("regions")
+
+
+def status_region(region, instance_ids, tags, states):
+    """Return (region name, instance statuses) for one region."""
+    ec2 = clients.aws("ec2", region)
+    paginator = ec2.get_paginator('describe_instance_status')
+    statuses = []
+    if instance_ids or tags:
+        # DescribeInstanceStatus can't filter by tag, and fails on IDs from other regions,
+        # so resolve the selection first and ask for the statuses 100 IDs at a time
+        ids = [i['InstanceId'] for i in select_instances(ec2, instance_filters(instance_ids, tags, states))]
+        for batch in batched(ids, STATUS_BATCH_SIZE):
+            for page in paginator.paginate(InstanceIds=batch, IncludeAllInstances=True):
+                statuses.extend(page.get('InstanceStatuses', []))
+    else:
+        filters = instance_filters(states=states)
+        for page in paginator.paginate(Filters=filters, IncludeAllInstances=True, PaginationConfig={'PageSize': 1000}):
+            statuses.extend(page.get('InstanceStatuses', []))
+    return ec2.meta.region_name, statuses
+
+# =============== TAGGING
+
+# resource types tagged when no --resource-id is given
+DEFAULT_TAG_RESOURCE_TYPES = ("instance", "volume", "snapshot")
+TAG_RESOURCE_TYPES = ["instance", "volume", "snapshot", "image", "security-group", "network-interface",
+                      "subnet", "vpc", "internet-gateway", "route-table", "elastic-ip", "launch-template"]
+# resource IDs sent per CreateTags/DeleteTags call
+TAG_BATCH_SIZE = 1000
+
+
+# resource types listed with their own Describe call, which returns every resource with
+# its tags, untagged ones included: type -> (paginator, result key, ID field, page size, parameters)
+TAG_LISTINGS = {
+    "instance": ("describe_instances", "Reservations", "InstanceId", 1000, {}),
+    "volume": ("describe_volumes", "Volumes", "VolumeId", 500, {}),
+    "snapshot": ("describe_snapshots", "Snapshots", "SnapshotId", 1000, {"OwnerIds": ["self"]}),
+}
+
+
+def listed_tags(ec2, resource_type):
+    """Yield (resource id, {key: value}) for every resource of a TAG_LISTINGS type, tagged or not."""
+    operation, key, id_field, page_size, params = TAG_LISTINGS[resource_type]
+    paginator = ec2.get_paginator(operation)
+    for page in paginator.paginate(**params, PaginationConfig={'PageSize': page_size}):
+        resources = page.get(key, [])
+        if key == "Reservations":
+            resources = [i for r in resources for i in r.get('Instances', [])]
+        for resource in resources:
+            yield resource[id_field], {t['Key']: t['Value'] for t in resource.get('Tags', [])}
+
+
+def current_tags(ec2, resource_ids, resource_types):
+    """
+    Return ({resource id: {key: value}}, {resource id: resource type}). Types in
+    TAG_LISTINGS are listed in full; named resources and other types come from
+    paginated DescribeTags, which only lists resources that have tags.
+    """
+    tags = defaultdict(dict)
+    types = {}
+    if not resource_ids:
+        for resource_type in [t for t in resource_types if t in TAG_LISTINGS]:
+            for resource_id, resource_tags in listed_tags(ec2, resource_type):
+                tags[resource_id] = resource_tags
+                types[resource_id] = resource_type
+        resource_types = [t for t in resource_types if t not in TAG_LISTINGS]
+        if not resource_types:
+            return tags, types
+
+    filters = []
+    if resource_ids:
+        filters.append({"Name": "resource-id", "Values": list(resource_ids)})
+    if resource_types:
+        filters.append({"Name": "resource-type", "Values": list(resource_types)})
+    paginator = ec2.get_paginator('describe_tags')
+    for page in paginator.paginate(Filters=filters, PaginationConfig={'PageSize': 1000}):
+        for tag in page.get('Tags', []):
+            tags[tag['ResourceId']][tag['Key']] = tag['Value']
+            types[tag['ResourceId']] = tag['ResourceType']
+    return tags, types
+
+
+def group_by_resources(changes):
+    """Merge changes that apply to exactly the same resources: {(resource ids): [changes]}."""
+    grouped = defaultdict(list)
+    for change, resources in changes.items():
+        grouped[tuple(resources)].append(change)
+    return grouped
+
+
+def tag_diff(tags, desired, remove):
+    """
+    Work out the writes that bring `tags` ({resource id: {key: value}}) to the
+    desired state. Returns (creates, deletes) as {(resource ids): [(key, value)]}
+    and {(resource ids): [key]}; compliant resources appear in neither.
+    """
+    creates = defaultdict(list)
+    deletes = defaultdict(list)
+    for resource_id, resource_tags in tags.items():
+        for key, value in desired.items():
+            if resource_tags.get(key) != value:
+                creates[(key, value)].append(resource_id)
+        for key in remove:
+            if key in resource_tags:
+                deletes[key].append(resource_id)
+    return group_by_resources(creates), group_by_resources(deletes)
+
+
+def tag_region(region, resource_ids, resource_types, match, desired, remove, dry_run):
+    """Bring one region's selected resources to the desired tags; return (region name, resources selected, rows, API calls)."""
+    ec2 = clients.aws("ec2", region)
+    tags, types = current_tags(ec2, resource_ids, resource_types)
+    # DescribeTags doesn't list named resources that have no tags yet; they are still tagged
+    for resource_id in resource_ids:
+        tags.setdefault(resource_id, {})
+    tags = {resource_id: resource_tags for resource_id, resource_tags in tags.items()
+            if all(resource_tags.get(k) == v if v is not None else k in resource_tags for k, v in match)}
+    creates, deletes = tag_diff(tags, desired, remove)
+
+    calls = 0
+    added = defaultdict(list)
+    removed = defaultdict(list)
+    for resources, changes in creates.items():
+        for batch in batched(list(resources), TAG_BATCH_SIZE):
+            if not dry_run:
+                ec2.create_tags(Resources=batch, Tags=[{"Key": k, "Value": v} for k, v in changes])
+                TAG_WRITES.inc(region=ec2.meta.region_name, operation="create")
+            calls += 1
+        for resource_id in resources:
+            added[resource_id].extend(f"{k}={v}" for k, v in changes)
+    for resources, keys in deletes.items():
+        for batch in batched(list(resources), TAG_BATCH_SIZE):
+            if not dry_run:
+                ec2.delete_tags(Resources=batch, Tags=[{"Key": k} for k in keys])
+                TAG_WRITES.inc(region=ec2.meta.region_name, operation="delete")
+            calls += 1
+        for resource_id in resources:
+            removed[resource_id].extend(keys)
+
+    rows = [{
+        'ResourceId': resource_id,
+        'ResourceType': types.get(resource_id, 'N/A'),
+        'Added': ", ".join(sorted(added.get(resource_id, []))),
+        'Removed': ", ".join(sorted(removed.get(resource_id, []))),
+        'Region': ec2.meta.region_name,
+    } for resource_id in tags if resource_id in added or resource_id in removed]
+    return ec2.meta.region_name, len(tags), rows, calls
+
+# =============== WATCHING
+
+# states in which an instance's addresses may still change, so it is re-read every poll
+TRANSITIONAL_STATES = ("pending", "stopping", "shutting-down")
+# fields compared between polls
+WATCHED_FIELDS = ("State", "PublicIp", "PrivateIp")
+# every Nth poll re-reads the whole region, to catch changes instance status doesn't show (e.g. a new Elastic IP)
+FULL_REFRESH_POLLS = 12
+# instance IDs per DescribeInstances filter when fetching details
+DETAIL_BATCH_SIZE = 200
+
+
+class InstanceWatch:
+    """
+    The last snapshot of one region's instances, indexed by instance ID, and
+    the polling that keeps it current. Apart from the occasional full refresh,
+    a poll reads every instance's state from DescribeInstanceStatus (a small
+    payload) and only describes instances that are new, changed state, are
+    mid-transition or have disappeared, so its cost follows the amount of
+    change rather than the size of the fleet.
+    """
+
+    def __init__(self, region, state=None):
+        self.ec2 = clients.aws("ec2", region)
+        self.region = self.ec2.meta.region_name
+        self.states = [state] if state else []
+        self.index = {}
+        self.polls = 0
+
+    def describe(self, instance_ids=()):
+        filters = instance_filters(instance_ids=instance_ids, states=self.states)
+        return {i['InstanceId']: instance_row(i, self.region) for i in select_instances(self.ec2, filters)}
+
+    def current_states(self):
+        paginator = self.ec2.get_paginator('describe_instance_status')
+        pages = paginator.paginate(Filters=instance_filters(states=self.states), IncludeAllInstances=True,
+                                   PaginationConfig={'PageSize': 1000})
+        return {s['InstanceId']: s['InstanceState']['Name'] for page in pages for s in page.get('InstanceStatuses', [])}
+
+    def poll(self):
+        """Refresh the snapshot; return the (change, row, details) tuples since the last poll."""
+        self.polls += 1
+        if self.polls == 1 or self.polls % FULL_REFRESH_POLLS == 0:
+            current = self.describe()
+        else:
+            states = self.current_states()
+            stale = [i for i, state in states.items()
+                     if i not in self.index or self.index[i]['State'] != state or state in TRANSITIONAL_STATES]
+            # instances missing from instance status may still be listed (e.g. recently terminated)
+            stale += [i for i in self.index if i not in states]
+            current = {i: self.index[i] for i in states if i in self.index and i not in stale}
+            for batch in batched(stale, DETAIL_BATCH_SIZE):
+                current.update(self.describe(batch))
+        changes = list(instance_changes(self.index, current))
+        self.index = current
+        return changes
+
+
+def instance_changes(before, after):
+    """Yield (change, row, details) for instances added, removed or changed between two snapshots."""
+    for instance_id, row in after.items():
+        old = before.get(instance_id)
+        if old is None:
+            yield "added", row, ""
+            continue
+        details = [f"{field} {old[field]} -> {row[field]}" for field in WATCHED_FIELDS if old[field] != row[field]]
+        if details:
+            yield "changed", row, "; ".join(details)
+    for instance_id, row in before.items():
+        if instance_id not in after:
+            yield "removed", row, ""
+
+
+def watch_instances(regions, state, interval, concurrency):
+    """Print every instance once, then only what changes, until interrupted."""
+    watches = [InstanceWatch(region, state) for region in regions or [None]]
+    runner = Runner(concurrency, label=lambda watch: watch.region, format_error=describe_error)
+    columns = ['Time', 'Change', 'Name', 'InstanceId', 'State', 'PublicIp', 'PrivateIp', 'Details']
+    if len(regions) > 1:
+        columns.append('Region')
+
+    with output.open_writer(columns) as out:
+        try:
+            while True:
+                started = time.monotonic()
+                now = datetime.datetime.now().strftime("%H:%M:%S")
+                for result in runner.map(lambda watch: watch.poll(), watches):
+                    if result.error is not None:
+                        # keep watching; the next poll catches up
+                        logger.warning("%s: %s", result.item.region, describe_error(result.error))
+                        continue
+                    for change, row, details in result.value:
+                        out.write({'Time': now, 'Change': change, 'Name': row['Name'], 'InstanceId': row['InstanceId'],
+                                   'State': row['State'], 'PublicIp': row['PublicIp'], 'PrivateIp': row['PrivateIp'],
+                                   'Details': details, 'Region': row['Region']})
+                out.flush()
+                runner.errors.clear()
+                time.sleep(max(0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
+
+# =============== UTILIZATION
+
+# GetMetricData limits per call: queries (returned or not) and datapoints returned
+METRIC_QUERIES_PER_CALL = 500
+METRIC_DATAPOINTS_PER_CALL = 100_800
+# (column prefix, CloudWatch metrics, statistic) reported for every instance; several
+# metrics come back summed as one metric-math series, so network in + out costs one series
+UTILIZATION_METRICS = (
+    ("Cpu", ("CPUUtilization",), "Average"),
+    ("Net", ("NetworkIn", "NetworkOut"), "Sum"),
 )
-logger = logging.getLogger(__name__)
+# GetMetricData calls in flight per region
+METRIC_CALLS_PER_REGION = 4
+
+
+def instances_per_call(start, end, period):
+    """How many instances' metrics fit in one GetMetricData call, so no call needs a second page."""
+    points = max(1, math.ceil((end - start).total_seconds() / period))
+    queries = sum(len(metrics) + (len(metrics) > 1) for _, metrics, _ in UTILIZATION_METRICS)
+    by_queries = METRIC_QUERIES_PER_CALL // queries
+    by_points = METRIC_DATAPOINTS_PER_CALL // (points * len(UTILIZATION_METRICS))
+    return max(1, min(by_queries, by_points))
+
+
+def metric_queries(instances, period):
+    """GetMetricData queries for `instances`; returns (queries, {returned query id: (instance id, column prefix)})."""
+    queries = []
+    ids = {}
+    for instance in instances:
+        for prefix, metric_names, stat in UTILIZATION_METRICS:
+            parts = []
+            for metric_name in metric_names:
+                parts.append(f"q{len(queries)}")
+                queries.append({
+                    'Id': parts[-1],
+                    'MetricStat': {
+                        'Metric': {'Namespace': 'AWS/EC2', 'MetricName': metric_name,
+                                   'Dimensions': [{'Name': 'InstanceId', 'Value': instance['InstanceId']}]},
+                        'Period': period,
+                        'Stat': stat,
+                    },
+                    # only the sum is returned when there are several metrics
+                    'ReturnData': len(metric_names) == 1,
+                })
+            if len(metric_names) > 1:
+                queries.append({'Id': f"q{len(queries)}", 'Expression': " + ".join(parts), 'ReturnData': True})
+            ids[queries[-1]['Id']] = (instance['InstanceId'], prefix)
+    return queries, ids
+
+
+def inventory_region(region, filters):
+    """Return (region name, instances matching `filters`) for one region."""
+    ec2 = clients.aws("ec2", region)
+    return ec2.meta.region_name, list(select_instances(ec2, filters))
+
+
+def fetch_utilization(region, instances, start, end, period):
+    """Return {instance id: {column prefix: values array}} for one batch of instances (see instances_per_call)."""
+    import numpy as np
+
+    cloudwatch = clients.aws("cloudwatch", region)
+    queries, ids = metric_queries(instances, period)
+    values = defaultdict(list)
+    paginator = cloudwatch.get_paginator('get_metric_data')
+    # batches are sized to fit one page; very long ranges at short periods may still need more
+    for page in paginator.paginate(MetricDataQueries=queries, StartTime=start, EndTime=end, ScanBy='TimestampAscending'):
+        for result in page.get('MetricDataResults', []):
+            values[result['Id']].extend(result.get('Values', []))
+    series = defaultdict(dict)
+    for query_id, (instance_id, prefix) in ids.items():
+        series[instance_id][prefix] = np.asarray(values.get(query_id, []), dtype=float)
+    return series
+
+
+def utilization_row(instance, series, period, cpu_threshold, network_threshold):
+    """The utilization row for one instance: CPU % and network KB/s percentiles, and whether it looks underused."""
+    import numpy as np
+
+    row = {'Name': instance_name(instance), 'InstanceId': instance['InstanceId'],
+           'InstanceType': instance.get('InstanceType', 'N/A')}
+    for prefix, _, stat in UTILIZATION_METRICS:
+        data = series.get(prefix, np.empty(0))
+        # network metrics are bytes per period; report KB/s
+        scale = 1 / (period * 1024) if stat == 'Sum' else 1
+        if data.size:
+            p50, p95 = np.percentile(data, [50, 95]) * scale
+            peak = data.max() * scale
+            row.update({f'{prefix}P50': round(float(p50), 1), f'{prefix}P95': round(float(p95), 1),
+                        f'{prefix}Max': round(float(peak), 1)})
+        else:
+            row.update({f'{prefix}P50': None, f'{prefix}P95': None, f'{prefix}Max': None})
+    has_data = row['CpuP95'] is not None
+    network = row['NetP95'] or 0
+    row['Underused'] = "yes" if has_data and row['CpuP95'] < cpu_threshold and network < network_threshold else ""
+    return row
 
 # =============== CLI GROUP SETUP
 
 @click.group(help="A CLI tool to automate AWS EC2 operations.")
 @click.option("--verbose", is_flag=True, help="Enable verbose output.")
-@click.option("--log-level", type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False), default="INFO", help="Set the logging level.")
+@click.option("--log-level", type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False), help="Set the logging level for this group (defaults to the dev-cli --log-level).")
 def ec2(verbose, log_level):
-    log_level = getattr(logging, log_level.upper(), logging.INFO)
-    logger.setLevel(log_level)
+    # only for this command, see commands/config/logger.py
+    click.get_current_context().with_resource(command_level(logger, log_level))
     if verbose:
       logger.debug("Verbose mode enabled.")
 
 # =============== CREATE COMMANDS
 # ===== DESCRIBE INSTANCES
 
-@click.command(help="Show detailed metadata of EC2 instances in a region.")
-@click.option("-r", "--region", help="AWS region.")
-@click.option("-s", "--state", help="Filter instances by state (e.g., running, stopped).")
-def describe(region, state):
-    # Initialise EC2 client
-    ec2 = boto3.client("ec2", region_name=region)
-    
-    try:
-        response = ec2.describe_instances()
-    except botocore.exceptions.BotoCoreError as e:
-        logger.error(f"AWS Boto3 error: {e}")
-        return
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return
+@click.command(help="""Show detailed metadata of EC2 instances in a region.
 
-    if not response['Reservations']:
-        logger.info("No EC2 instances found in your AWS account.")
+With --watch, every instance is listed once and then only the instances that
+are added, removed, or change state or IP address are printed, every
+--interval seconds until interrupted.""")
+@click.option("-r", "--region", "regions", multiple=True, help="AWS region. Can be repeated to describe several regions concurrently.")
+@click.option("-s", "--state", help="Filter instances by state (e.g., running, stopped).")
+@click.option("-w", "--watch", is_flag=True, help="Keep polling and print only the changes.")
+@click.option("--interval", type=click.FloatRange(min=1), default=5, show_default=True, help="Seconds between polls with --watch.")
+@concurrency_options(what="regions to describe")
+def describe(regions, state, watch, interval, concurrency, fail_fast):
+    if watch:
+        watch_instances(regions, state, interval, concurrency)
         return
 
-    grouped = defaultdict(list)
-
-    # Loop through reservations and instances
-    for reservation in response.get('Reservations', []):
-        for instance in reservation.get('Instances', []):
-            inst_state = instance.get('State', {}).get('Name', 'unknown')
-            
-            # Filter by state if provided
-            if state and inst_state != state:
+    # regions are described concurrently; no --region means the configured default
+    runner = Runner(concurrency, fail_fast, label=lambda region: region or "default region", format_error=describe_error)
+    columns = ['Name', 'InstanceId', 'State', 'InstanceType', 'AZ', 'PublicIp', 'PrivateIp']
+    # only tag rows with their region when several regions are listed together
+    if len(regions) > 1:
+        columns.append('Region')
+    found = False
+
+    # each region's instances are written as soon as that region has been described
+    with output.open_writer(columns) as out:
+        for result in runner.map(describe_region, regions or [None]):
+            if result.error is not None:
                 continue
+            region_name, reservations = result.value
+            counts = defaultdict(int)
+            rows = []
+
+            # Loop through reservations and instances
+            for reservation in reservations:
+                for instance in reservation.get('Instances', []):
+                    found = True
+                    inst_state = instance.get('State', {}).get('Name', 'unknown')
+                    counts[inst_state] += 1
+
+                    # Filter by state if provided
+                    if state and inst_state != state:
+                        continue
+
+                    rows.append(instance_row(instance, region_name))
+
+            for inst_state, count in counts.items():
+                INSTANCES.set(count, region=region_name, state=inst_state)
+
+            # Sort each region's instances by state, then Name
+            rows.sort(key=lambda x: (x['State'], x['Name']))
+            for row in rows:
+                if len(regions) <= 1:
+                    del row['Region']
+                out.write(row)
+
+    if not found and not runner.errors:
+        logger.info("No EC2 instances found in your AWS account.")
+    elif found and not out.count:
+        logger.info("No EC2 instances found in state: %s", state)
 
-            tags = {t['Key']: t['Value'] for t in instance.get('Tags', [])}
-            grouped[inst_state].append({
-                'Name': tags.get('Name', 'N/A'),
-                'InstanceId': instance.get('InstanceId', 'N/A'),
-                'InstanceType': instance.get('InstanceType', 'N/A'),
-                'AZ': instance.get('Placement', {}).get('AvailabilityZone', 'N/A'),
-                'PublicIp': instance.get('PublicIpAddress', 'N/A'),
-                'PrivateIp': instance.get('PrivateIpAddress', 'N/A')
-            })
-
-    # Sort instances in each state by Name
-    for state_group in grouped:
-        grouped[state_group] = sorted(grouped[state_group], key=lambda x: x['Name'])
-
-    if not any(grouped.values()):
-        logger.info(f"No EC2 instances found in state: {state}")
-        return
-
-    # Output result as pretty-printed JSON
-    print(json.dumps(grouped, indent=4))    
+    runner.finish("regions")
 
 # ===== TERMINATE EC2 INSTANCE
 
@@ -121,7 +685,7 @@ def describe(region, state):
 @click.option("-r", "--region", required=True, help="AWS region where the EC2 instance is located.")
 @click.option("--yes", is_flag=True, help="Skip confirmation prompt before termination.")
 def terminate(instance_id, region, yes):
-    ec2 = boto3.client('ec2', region_name=region)
+    ec2 = clients.aws("ec2", region)
 
     # Step 1: Check if the instance exists and retrieve its state
     try:
@@ -131,7 +695,7 @@ def terminate(instance_id, region, yes):
 
         # step 2: If the instance is already terminated, don't prompt for termination
         if current_state == 'terminated':
-            logger.info(f"Instance {instance_id} is already terminated")
+            logger.info("Instance %s is already terminated", instance_id)
             return
 
         # step 3: Only prompt for termination if it's in a valid state (running, stopped, etc.)
@@ -143,28 +707,29 @@ def terminate(instance_id, region, yes):
 
         # step 4: Proceed with termination
         terminate_response = ec2.terminate_instances(InstanceIds=[instance_id])
+        TERMINATED.inc(region=region)
 
         instance_info = terminate_response["TerminatingInstances"][0]
         state = instance_info["CurrentState"]["Name"]
         previous_state = instance_info["PreviousState"]["Name"]
 
-        logger.info(f"Termination initiated for instance: {instance_id}. Current state: {state}")
+        logger.info("Termination initiated for instance: %s. Current state: %s", instance_id, state)
         
-        # step 5: Print the response as clean JSON
-        output = {
-            "InstanceId": instance_id,
-            "CurrentState": state,
-            "PreviousState": previous_state
-        }
-        print(json.dumps(output, indent=4))
+        # step 5: Print the state change in the selected --output format
+        with output.open_writer() as out:
+            out.write({
+                "InstanceId": instance_id,
+                "CurrentState": state,
+                "PreviousState": previous_state
+            })
 
     # exception handling
     except botocore.exceptions.ClientError as e:
-        logger.error(f"AWS ClientError: {e.response['Error']['Message']}")
+        logger.error("AWS ClientError: %s", e.response['Error']['Message'])
     except botocore.exceptions.BotoCoreError as e:
-        logger.error(f"BotoCoreError: {e}")
+        logger.error("BotoCoreError: %s", e)
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
 
 # ===== LAUNCH EC2 INSTANCE
 
@@ -175,13 +740,222 @@ def terminate(instance_id, region, yes):
 @click.option("-r", "--region", default="eu-west-2", show_default=True, help="AWS region where to launch EC2 instance too.")
 def launch(region):
     # initialise EC2 client
-    ec2 = boto3.client("ec2", region_name=region)
+    ec2 = clients.aws("ec2", region)
     
+# ===== INSTANCE STATUS
+
+@click.command(help="Show the state and status checks of EC2 instances.")
+@instance_selectors("check")
+def status(regions, instance_ids, tags, states, concurrency, fail_fast):
+    runner = Runner(concurrency, fail_fast, label=lambda region: region or "default region", format_error=describe_error)
+    columns = ['InstanceId', 'State', 'SystemStatus', 'InstanceStatus', 'AZ', 'Events']
+    if len(regions) > 1:
+        columns.append('Region')
+    found = set()
+
+    with output.open_writer(columns) as out:
+        for result in runner.map(lambda region: status_region(region, instance_ids, tags, states), regions or [None]):
+            if result.error is not None:
+                continue
+            region_name, statuses = result.value
+            for item in sorted(statuses, key=lambda x: (x['InstanceState']['Name'], x['InstanceId'])):
+                found.add(item['InstanceId'])
+                row = {
+                    'InstanceId': item['InstanceId'],
+                    'State': item['InstanceState']['Name'],
+                    'SystemStatus': item.get('SystemStatus', {}).get('Status', 'N/A'),
+                    'InstanceStatus': item.get('InstanceStatus', {}).get('Status', 'N/A'),
+                    'AZ': item.get('AvailabilityZone', 'N/A'),
+                    'Events': "; ".join(e.get('Description', e['Code']) for e in item.get('Events', [])),
+                }
+                if len(regions) > 1:
+                    row['Region'] = region_name
+                out.write(row)
+
+    warn_missing(instance_ids, found)
+    if not out.count and not runner.errors:
+        logger.info("No matching EC2 instances found")
+    runner.finish("regions")
+
+# ===== INSTANCE UTILIZATION
+
+@click.command(help="""Report CPU and network utilization of EC2 instances and flag underused ones.
+
+Metrics for every selected instance come from CloudWatch GetMetricData, with
+regions and calls run concurrently. Each instance returns two series, CPU and
+network in + out (summed with metric math), and each call carries as many
+instances as fit its 500-query and 100,800-datapoint limits.
+An instance is flagged as underused when its p95 CPU and its p95 network
+throughput are both below the thresholds. Only running instances are checked
+unless --state is given.""")
+@instance_selectors("report on")
+@click.option("--days", type=click.IntRange(min=1, max=455), default=14, show_default=True, help="Days of metrics to look at.")
+@click.option("--period", type=click.IntRange(min=60), default=3600, show_default=True, help="Seconds per datapoint.")
+@click.option("--cpu-threshold", type=float, default=10, show_default=True, help="Underused below this p95 CPU %.")
+@click.option("--network-threshold", type=float, default=100, show_default=True, help="Underused below this p95 network in+out, in KB/s.")
+@click.option("--underused", "only_underused", is_flag=True, help="Only list the underused instances.")
+def utilization(regions, instance_ids, tags, states, concurrency, fail_fast, days, period, cpu_threshold, network_threshold, only_underused):
+    filters = instance_filters(instance_ids, tags, states or ["running"])
+    end = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start = end - datetime.timedelta(days=days)
+    # items are regions in step 1 and (region, instances) batches in step 2
+    runner = Runner(concurrency, fail_fast, format_error=describe_error,
+                    label=lambda item: f"{item[0]} metrics" if isinstance(item, tuple) else item or "default region",
+                    per_target=METRIC_CALLS_PER_REGION, target=lambda item: item[0] if isinstance(item, tuple) else None)
+
+    # step 1: the instance inventory of every region, concurrently
+    inventory = []
+    for result in runner.map(lambda region: inventory_region(region, filters), regions or [None]):
+        if result.error is None:
+            inventory.append(result.value)
+    warn_missing(instance_ids, {i['InstanceId'] for _, instances in inventory for i in instances})
+
+    # step 2: metrics in batches of as many instances as fit in one call
+    per_call = instances_per_call(start, end, period)
+    batches = [(region_name, batch) for region_name, instances in inventory for batch in batched(instances, per_call)]
+    columns = ['Name', 'InstanceId', 'InstanceType'] + [
+        f'{prefix}{stat}' for prefix, _, _ in UTILIZATION_METRICS for stat in ('P50', 'P95', 'Max')] + ['Underused']
+    if len(regions) > 1:
+        columns.append('Region')
+    underused = defaultdict(int)
+    checked = 0
+
+    with output.open_writer(columns) as out:
+        for result in runner.map(lambda item: fetch_utilization(item[0], item[1], start, end, period), batches):
+            if result.error is not None:
+                continue
+            region_name, instances = result.item
+            for instance in instances:
+                row = utilization_row(instance, result.value.get(instance['InstanceId'], {}), period,
+                                      cpu_threshold, network_threshold)
+                checked += 1
+                if row['Underused']:
+                    underused[region_name] += 1
+                elif only_underused:
+                    continue
+                row['Region'] = region_name
+                if len(regions) <= 1:
+                    del row['Region']
+                out.write(row)
+
+    for region_name, _ in inventory:
+        UNDERUSED.set(underused[region_name], region=region_name)
+    logger.info("%d of %d instances look underused (p95 CPU < %g%%, p95 network < %g KB/s over %d days)",
+                sum(underused.values()), checked, cpu_threshold, network_threshold, days)
+    runner.finish("regions and metric calls")
+
+# ===== START / STOP / REBOOT INSTANCES
+
+@click.command(help="""Start stopped EC2 instances selected by ID, tag or state.
+
+Instances are started with one API call per 1000 instances, and regions are handled concurrently.""")
+@instance_selectors("start instances in")
+@click.option("--yes", is_flag=True, help="Skip the confirmation prompt.")
+@click.option("--dry-run", is_flag=True, help="Only list the instances that would be started.")
+def start(regions, instance_ids, tags, states, concurrency, fail_fast, yes, dry_run):
+    change_state("start", regions, instance_ids, tags, states, yes, dry_run, concurrency, fail_fast)
+
+
+@click.command(help="""Stop running EC2 instances selected by ID, tag or state.
+
+Instances are stopped with one API call per 1000 instances, and regions are handled concurrently, e.g.:
+
+    dev-cli aws ec2 stop -t env=dev -r eu-west-1 -r eu-west-2 --yes""")
+@instance_selectors("stop instances in")
+@click.option("--yes", is_flag=True, help="Skip the confirmation prompt.")
+@click.option("--dry-run", is_flag=True, help="Only list the instances that would be stopped.")
+def stop(regions, instance_ids, tags, states, concurrency, fail_fast, yes, dry_run):
+    change_state("stop", regions, instance_ids, tags, states, yes, dry_run, concurrency, fail_fast)
+
+
+@click.command(help="""Reboot running EC2 instances selected by ID, tag or state.
+
+Instances are rebooted with one API call per 1000 instances, and regions are handled concurrently.""")
+@instance_selectors("reboot instances in")
+@click.option("--yes", is_flag=True, help="Skip the confirmation prompt.")
+@click.option("--dry-run", is_flag=True, help="Only list the instances that would be rebooted.")
+def reboot(regions, instance_ids, tags, states, concurrency, fail_fast, yes, dry_run):
+    change_state("reboot", regions, instance_ids, tags, states, yes, dry_run, concurrency, fail_fast)
+
+# ===== TAG RESOURCES
+
+@click.command(help="""Bring the tags on EC2 resources to a desired state with as few writes as possible.
+
+Current tags are read from DescribeInstances, DescribeVolumes and
+DescribeSnapshots (DescribeTags for other types and for --resource-id), and
+only the differences are written:
+resources that need the same change share one CreateTags/DeleteTags call, and
+resources that already comply cost no writes at all. e.g.:
+
+    dev-cli aws ec2 tag --set owner=platform --set env=dev -t team=platform -r eu-west-2
+
+Without --resource-id, instances, volumes and snapshots are selected (see
+--resource-type), untagged ones included. DescribeTags only lists resources
+that have at least one tag, so untagged resources of the other types are only
+reached by naming them with --resource-id.""")
+@click.option("--set", "set_tags", multiple=True, callback=parse_tags, metavar="KEY=VALUE",
+              help="Tag that every selected resource must have. Can be repeated.")
+@click.option("--remove", "remove_keys", multiple=True, metavar="KEY",
+              help="Tag key to remove from every selected resource. Can be repeated.")
+@click.option("-i", "--resource-id", "resource_ids", multiple=True,
+              help="Select this resource (instance, volume, snapshot, ...). Can be repeated.")
+@click.option("--resource-type", "resource_types", multiple=True, type=click.Choice(TAG_RESOURCE_TYPES),
+              help="Select resources of this type. Can be repeated. [default: instance, volume and snapshot without --resource-id]")
+@click.option("-t", "--tag", "match", multiple=True, callback=parse_tags,
+              help="Only change resources tagged KEY=VALUE, or with tag KEY. Can be repeated; all must match.")
+@click.option("-r", "--region", "regions", multiple=True,
+              help="AWS region. Can be repeated to tag several regions concurrently.")
+@click.option("--dry-run", is_flag=True, help="Only list the changes that would be made.")
+@concurrency_options(what="regions to tag")
+def tag(set_tags, remove_keys, resource_ids, resource_types, match, regions, dry_run, concurrency, fail_fast):
+    if any(value is None for _, value in set_tags):
+        raise click.BadParameter("expected KEY=VALUE", param_hint="--set")
+    desired = dict(set_tags)
+    if not desired and not remove_keys:
+        raise click.UsageError("give the tags to change with --set or --remove")
+    if set(desired) & set(remove_keys):
+        raise click.UsageError(f"tags both set and removed: {', '.join(sorted(set(desired) & set(remove_keys)))}")
+    if not resource_ids and not resource_types:
+        resource_types = DEFAULT_TAG_RESOURCE_TYPES
+    if resource_ids and len(regions) > 1:
+        # an ID that belongs to another region would fail the whole CreateTags batch
+        raise click.UsageError("--resource-id can only be used with a single --region")
+
+    runner = Runner(concurrency, fail_fast, label=lambda region: region or "default region", format_error=describe_error)
+    columns = ['ResourceId', 'ResourceType', 'Added', 'Removed']
+    if len(regions) > 1:
+        columns.append('Region')
+    selected = calls = 0
+
+    with output.open_writer(columns) as out:
+        for result in runner.map(lambda region: tag_region(region, resource_ids, resource_types, match,
+                                                           desired, remove_keys, dry_run), regions or [None]):
+            if result.error is not None:
+                continue
+            region_name, region_selected, rows, region_calls = result.value
+            selected += region_selected
+            calls += region_calls
+            for row in rows:
+                if len(regions) <= 1:
+                    del row['Region']
+                out.write(row)
+
+    verb = "Would change" if dry_run else "Changed"
+    logger.info("%s tags on %d of %d resources with %d API calls; %d already compliant",
+                verb, out.count, selected, calls, selected - out.count)
+    runner.finish("regions")
+
 # =============== ADD COMMANDS TO GROUP
 
 ec2.add_command(describe)
 ec2.add_command(launch)
 ec2.add_command(terminate)
+ec2.add_command(status)
+ec2.add_command(start)
+ec2.add_command(stop)
+ec2.add_command(reboot)
+ec2.add_command(tag)
+ec2.add_command(utilization)
 
 if __name__ == "__main__":
    ec2()
\ No newline at end of file
@@ -10,11 +10,15 @@ Usage:
 Commands:
     create         Create a new S3 bucket.
     delete         Delete an existing S3 bucket.
-    upload         Upload files to an S3 bucket.
-    download       Download files from an S3 bucket.
-    sync           Sync a local folder with an S3 bucket.
+    upload         Upload a file or directory to an S3 bucket.
+    download       Download an object or prefix from an S3 bucket.
+    sync           Sync a local folder to an S3 bucket prefix.
+    copy           Copy objects between buckets or prefixes, server-side.
     buckets        List all S3 buckets.
     ls             List objects within a specified S3 bucket.
+    index          Build or refresh a local index of a bucket's keys.
+    find           Find objects using the local index.
+    verify         Verify local files against their S3 ETags and checksums.
     set-policy     Apply a bucket policy to a specific S3 bucket.
     get-policy     View the current policy of an S3 bucket.
     del-policy  Delete a bucket policy from a specified S3 bucket.
@@ -26,11 +30,23 @@ import click
 import sys
 from pathlib import Path
 import boto3
-import botocore
+import botocore.config
 from botocore.exceptions import ClientError
 from rich.logging import RichHandler
 import logging
+from commands.config.logger import command_level, get_logger
+from commands.config import clients
+from commands.config import metrics
+from commands.config import output
+from commands.config.runner import Runner, concurrency_options
+import collections
+import concurrent.futures
+import contextlib
 import json
+import os
+import tempfile
+import time
+import urllib.parse
 
 # =============== PATH SETUP
 
@@ -43,20 +59,279 @@ sys.path.insert(0, (parent_dir))
 # =============== LOGGING SETUP
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(levelname)s: %(message)s.")
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+# =============== METRICS
+
+OBJECTS_LISTED = metrics.counter(
+    "dev_cli_s3_objects_listed_total", "Objects returned by S3 listings.", ("bucket",))
+BYTES_LISTED = metrics.counter(
+    "dev_cli_s3_listed_bytes_total", "Total size of the objects returned by S3 listings.", ("bucket",))
+
+TRANSFER_OBJECTS = metrics.counter(
+    "dev_cli_s3_transfer_objects_total", "Objects transferred, by direction.", ("direction",))
+TRANSFER_BYTES = metrics.counter(
+    "dev_cli_s3_transfer_bytes_total", "Bytes transferred, by direction.", ("direction",))
+TRANSFER_SECONDS = metrics.counter(
+    "dev_cli_s3_transfer_seconds_total", "Time spent transferring objects, by direction.", ("direction",))
+OBJECTS_DELETED = metrics.counter(
+    "dev_cli_s3_objects_deleted_total", "Objects deleted.", ("bucket",))
+OBJECTS_VERIFIED = metrics.counter(
+    "dev_cli_s3_objects_verified_total", "Local files verified against S3, by result.", ("result",))
+
+# =============== TRANSFER HELPERS
+
+# maximum number of keys accepted by a single DeleteObjects call
+MAX_DELETE_KEYS = 1000
+# objects transferred at once by default (matches the aws cli)
+DEFAULT_CONCURRENCY = 10
+# partitioned listings split a prefix into about this many sub-prefixes per worker
+PARTITIONS_PER_WORKER = 4
+# "/" levels explored when splitting a listing into sub-prefixes
+MAX_PARTITION_DEPTH = 3
+
+
+def s3_client(region=None, concurrency=DEFAULT_CONCURRENCY):
+    """Shared S3 client with a connection pool large enough for `concurrency` threads."""
+    return clients.aws('s3', region, max_pool_connections=max(10, concurrency))
+
+
+def iter_objects(s3, bucket_name, prefix=""):
+    """Yield every object under `prefix`, one listing page at a time."""
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        yield from page.get('Contents', [])
+
+
+def list_level(s3, bucket_name, prefix, on_page):
+    """List one "/"-delimited level under `prefix`: objects go to on_page(objects), sub-prefixes are returned."""
+    prefixes = []
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter='/'):
+        if page.get('Contents'):
+            on_page(page['Contents'])
+        prefixes.extend(p['Prefix'] for p in page.get('CommonPrefixes', []))
+    return prefixes
+
+
+def list_partitioned(s3, bucket_name, prefix, on_page, runner):
+    """
+    List every object under `prefix`, splitting the listing by sub-prefix so it runs in parallel.
+
+    The "/" hierarchy is expanded level by level (one delimited listing per prefix,
+    run concurrently) until there are enough sub-prefixes to keep the runner's
+    workers busy; each sub-prefix is then listed in full by its own worker.
+    on_page(objects) is called from the worker threads with each page. Raises if
+    any listing failed, since the result would be incomplete.
+    """
+    def list_all(partition):
+        paginator = s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=partition):
+            if page.get('Contents'):
+                on_page(page['Contents'])
+
+    failed = len(runner.errors)
+    partitions = [prefix]
+    for _ in range(MAX_PARTITION_DEPTH):
+        if not partitions or len(partitions) >= runner.concurrency * PARTITIONS_PER_WORKER:
+            break
+        expanded = []
+        for result in runner.map(lambda p: list_level(s3, bucket_name, p, on_page), partitions, ordered=False):
+            if result.error is None:
+                expanded.extend(result.value)
+        partitions = expanded
+    for _ in runner.map(list_all, partitions, ordered=False):
+        pass
+    if len(runner.errors) > failed:
+        raise RuntimeError(f"{len(runner.errors) - failed} listings under '{prefix}' failed")
+
+
+def iter_local_files(source):
+    """Yield (path, relative key name) for a file or every file below a directory."""
+    source = Path(source)
+    if source.is_file():
+        yield source, source.name
+        return
+    for path in sorted(source.rglob('*')):
+        if path.is_file():
+            yield path, path.relative_to(source).as_posix()
+
+
+def join_key(prefix, name):
+    return f"{prefix.rstrip('/')}/{name}" if prefix else name
+
+
+def record_transfer(direction, size, elapsed):
+    TRANSFER_OBJECTS.inc(direction=direction)
+    TRANSFER_BYTES.inc(size, direction=direction)
+    TRANSFER_SECONDS.inc(elapsed, direction=direction)
+
+
+def upload_one(s3, path, bucket_name, key, codec=None, executor=None):
+    """Upload a single file, compressed with `codec` on `executor` if given, and return the bytes sent."""
+    started = time.perf_counter()
+    if codec:
+        from commands.aws import s3_compress
+
+        # compressed chunks are fed straight into the multipart upload, without a temporary file
+        with s3_compress.CompressedReader(path, codec, executor) as stream:
+            s3.upload_fileobj(stream, bucket_name, key, ExtraArgs=s3_compress.upload_args(codec))
+        size = stream.bytes_out
+    else:
+        s3.upload_file(str(path), bucket_name, key)
+        size = path.stat().st_size
+    record_transfer("upload", size, time.perf_counter() - started)
+    return size
+
+
+def compression_pool(codec):
+    """Thread pool compressing upload chunks on every CPU (a no-op context without a codec)."""
+    if not codec:
+        return contextlib.nullcontext()
+    from commands.aws import s3_compress
+
+    s3_compress.require_codec(codec)
+    return concurrent.futures.ThreadPoolExecutor(os.cpu_count(), thread_name_prefix="dev-cli-compress")
+
+
+# key suffixes of objects written by upload --compress (s3_compress.SUFFIXES, without importing it)
+COMPRESSED_SUFFIXES = (".zst", ".gz")
+
+
+def compressed_key(key, codec):
+    if not codec:
+        return key
+    from commands.aws import s3_compress
+
+    return key + s3_compress.SUFFIXES[codec]
+
+
+def download_decompressed(s3, bucket_name, key, target):
+    """Download and decompress an object written by upload --compress. Returns the local path, or None for other objects."""
+    from commands.aws import s3_compress
+
+    head = s3.head_object(Bucket=bucket_name, Key=key)
+    codec = s3_compress.compressed_codec(key, head.get('Metadata', {}))
+    if codec is None:
+        return None
+    suffix = s3_compress.SUFFIXES[codec]
+    if target.name.endswith(suffix):
+        target = target.with_name(target.name[:-len(suffix)])
+    body = s3.get_object(Bucket=bucket_name, Key=key)['Body']
+    try:
+        with open(target, "wb") as out:
+            s3_compress.decompress_stream(body, out, codec)
+    except BaseException:
+        target.unlink(missing_ok=True)
+        raise
+    return target
+
+
+def download_one(s3, bucket_name, key, target, decompress=True):
+    """Download a single object to `target`, creating parent directories, and return its local size."""
+    started = time.perf_counter()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # only keys with a compression suffix can have been written by upload --compress
+    decompress = decompress and key.endswith(COMPRESSED_SUFFIXES)
+    decompressed = download_decompressed(s3, bucket_name, key, target) if decompress else None
+    if decompressed is None:
+        s3.download_file(bucket_name, key, str(target))
+    size = (decompressed or target).stat().st_size
+    record_transfer("download", size, time.perf_counter() - started)
+    return size
+
+
+def local_target(dest, relative):
+    """`dest / relative` resolved, or None if it falls outside `dest` (a key containing "../")."""
+    root = dest.resolve()
+    target = (root / relative).resolve()
+    return target if target != root and target.is_relative_to(root) else None
+
+
+def download_targets(objects, prefix, dest):
+    """(key, local path, decompress) for each object under `prefix`, skipping keys that can't be saved under `dest`.
+
+    A compressed key whose name without the suffix is also listed ('a' and 'a.gz') would be
+    decompressed over the other object's file, so it is downloaded as it is instead.
+    """
+    # the listing is in key order, so 'a' always comes before 'a.gz'; keys are only
+    # remembered until the listing has moved past every suffixed name they could take
+    recent, recent_keys = collections.deque(), set()
+    for obj in objects:
+        key = obj['Key']
+        # skip "directory" placeholder objects
+        if key.endswith('/'):
+            continue
+        target = local_target(dest, key[len(prefix):].lstrip('/'))
+        if target is None:
+            logger.warning("Skipping '%s': it would be written outside '%s'", key, dest)
+            continue
+        while recent and recent[0] + max(COMPRESSED_SUFFIXES) < key:
+            recent_keys.discard(recent.popleft())
+        suffix = next((suffix for suffix in COMPRESSED_SUFFIXES if key.endswith(suffix)), None)
+        decompress = suffix is None or key[:-len(suffix)] not in recent_keys
+        if not decompress:
+            logger.warning("Not decompressing '%s': '%s' is saved under the same name", key, key[:-len(suffix)])
+        recent.append(key)
+        recent_keys.add(key)
+        yield key, target, decompress
+
+
+def batched(keys, size=MAX_DELETE_KEYS):
+    """Group keys into lists of at most `size`, without reading ahead of the current batch."""
+    batch = []
+    for key in keys:
+        batch.append(key)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def delete_batch(s3, bucket_name, batch):
+    """Delete up to 1000 keys with one DeleteObjects call. Returns the number deleted."""
+    response = s3.delete_objects(
+        Bucket=bucket_name,
+        Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+    )
+    errors = response.get('Errors', [])
+    for error in errors:
+        logger.error("Failed to delete '%s': %s", error.get('Key'), error.get('Message'))
+    deleted = len(batch) - len(errors)
+    OBJECTS_DELETED.inc(deleted, bucket=bucket_name)
+    return deleted
+
+
+def delete_keys(s3, bucket_name, keys, runner=None):
+    """Delete keys in batches of up to 1000 per DeleteObjects call, sending batches concurrently. Returns the number deleted."""
+    runner = runner or Runner(format_error=describe_aws_error)
+    results = runner.map(lambda batch: delete_batch(s3, bucket_name, batch), batched(keys), ordered=False)
+    return sum(result.value for result in results if result.error is None)
+
+
+def describe_aws_error(e):
+    """Describe boto3/botocore errors in the module's usual format."""
+    if isinstance(e, botocore.exceptions.ClientError):
+        error = e.response.get('Error', {})
+        return f"AWS ClientError [{error.get('Code')}]: {error.get('Message', 'No error message provided.')}"
+    if isinstance(e, (botocore.exceptions.BotoCoreError, boto3.exceptions.Boto3Error)):
+        return f"AWS Boto3 error: {e}"
+    return f"Unexpected error: {e}"
+
+
+def log_aws_error(e):
+    logger.error("%s", describe_aws_error(e))
 
 # =============== CLI GROUP SETUP
 
 
 @click.group(help="A CLI tool to automate AWS S3 operations.")
 @click.option("--verbose", is_flag=True, help="Enable verbose output.")
-@click.option("--log-level", type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False), default="INFO", help="Set the logging level.")
+@click.option("--log-level", type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False), help="Set the logging level for this group (defaults to the dev-cli --log-level).")
 def s3(verbose, log_level):
-    log_level = getattr(logging, log_level.upper(), logging.INFO)
-    logger.setLevel(log_level)
+    # only for this command, see commands/config/logger.py
+    click.get_current_context().with_resource(command_level(logger, log_level))
     if verbose:
         logger.debug("Verbose mode enabled.")
 
@@ -70,22 +345,21 @@ def s3(verbose, log_level):
 def create(bucket_name, region):
     """Create an S3 bucket with the given name in the specified region."""
     # initalise the S3 client for the given region
-    s3_client = boto3.client('s3', region_name=region)
+    s3 = s3_client(region)
     # bucket config required for non-default regions
     # specifies the AWS region where the S3 bucket will be created
     config = {'LocationConstraint': region}
 
     try:
-        s3_client.create_bucket(
+        s3.create_bucket(
             Bucket=bucket_name,
             CreateBucketConfiguration=config
         )
-        logging.info(
-            f"S3 bucket '{bucket_name}' created successfully in region: '{region}'")
+        logger.info("S3 bucket '%s' created successfully in region: '%s'", bucket_name, region)
     except boto3.exceptions.Boto3Error as e:
-        logging.error(f"Failed to create bucket: {e}")
+        logger.error("Failed to create bucket: %s", e)
     except Exception as e:
-        logging.error(f"An unexpected error occured: {e}")
+        logger.error("An unexpected error occured: %s", e)
 
 # =============== DELETE S3 BUCKET
 
@@ -93,48 +367,155 @@ def create(bucket_name, region):
 @click.command(help="Delete an existing S3 bucket.")
 @click.option("-bn", "--bucket-name", required=True, help="The name of the bucket to delete.")
 @click.option("-r", "--region", required=True, help="The AWS region where the bucket will be deleted from (e.g., 'eu-west-2').")
-def delete(bucket_name, region):
+@click.option("--force", is_flag=True, help="Delete every object in the bucket first (versions are not removed).")
+@concurrency_options(DEFAULT_CONCURRENCY, "DeleteObjects batches")
+def delete(bucket_name, region, force, concurrency, fail_fast):
     # create an S3 client in the specified region
-    s3 = boto3.client('s3', region_name=region)
+    s3 = s3_client(region, concurrency)
+    runner = Runner(concurrency, fail_fast, label=lambda batch: f"batch starting at '{batch[0]}'",
+                    format_error=describe_aws_error)
     try:
-        # delete S3 bucket
-        s3.delete_bucket(Bucket=bucket_name)
-        logger.info(
-            f"Bucket '{bucket_name}' successfully deleted from region '{region}'")
+        if force:
+            # empty the bucket using batched DeleteObjects calls, streamed from the listing
+            deleted = delete_keys(s3, bucket_name, (obj['Key'] for obj in iter_objects(s3, bucket_name)), runner)
+            logger.info("Deleted %d objects from bucket '%s'", deleted, bucket_name)
+        # the bucket can't be deleted while any batch failed
+        if not runner.errors:
+            # delete S3 bucket
+            s3.delete_bucket(Bucket=bucket_name)
+            logger.info("Bucket '%s' successfully deleted from region '%s'", bucket_name, region)
     # hand aws client-side errors
     except botocore.exceptions.ClientError as e:
         error_code = e.response['Error']['Code']
         error_message = e.response['Error'].get(
             "Message", "No error message provided.")
-        logger.error(f"AWS ClientError [{error_code}]: {error_message}")
+        logger.error("AWS ClientError [%s]: %s", error_code, error_message)
 
     # handle boto3 related errors
     except botocore.exceptions.BotoCoreError as e:
-        logger.error(f"BotoCoreError: {e}")
+        logger.error("BotoCoreError: %s", e)
     # handle any other unexpected exceptions
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
+    runner.finish("delete batches")
 
-# INCOMPLETE ==========
+# =============== UPLOAD TO S3
 
 
 @click.command(help="Upload a file or directory to an S3 bucket.")
-def upload():
-    pass
+@click.option("-bn", "--bucket-name", required=True, help="Name of the bucket to upload to.")
+@click.option("-s", "--source", required=True, type=click.Path(exists=True), help="Local file or directory to upload.")
+@click.option("-p", "--prefix", default="", help="Key prefix to upload under.")
+@click.option("--compress", type=click.Choice(["zstd", "gzip"]),
+              help="Compress each file while uploading it, adding .zst or .gz to its key; `download` decompresses it again.")
+@click.option("-r", "--region", help="AWS region where the bucket is located.")
+@concurrency_options(DEFAULT_CONCURRENCY, "files to upload")
+def upload(bucket_name, source, prefix, compress, region, concurrency, fail_fast):
+    s3 = s3_client(region, concurrency)
+    runner = Runner(concurrency, fail_fast, label=lambda file: str(file[0]), format_error=describe_aws_error)
+    count = total = original = 0
+    try:
+        files = ((path, compressed_key(join_key(prefix, name), compress)) for path, name in iter_local_files(source))
+        with compression_pool(compress) as executor:
+            def upload_path(file):
+                return upload_one(s3, file[0], bucket_name, file[1], compress, executor)
 
-# INCOMPLETE ==========
+            for result in runner.map(upload_path, files, ordered=False):
+                if result.error is None:
+                    total += result.value
+                    original += result.item[0].stat().st_size
+                    count += 1
+        logger.info("Uploaded %d files (%d bytes) to 's3://%s/%s'", count, total, bucket_name, prefix)
+        if compress and original:
+            logger.info("Compressed %d bytes to %d (%.0f%%) with %s", original, total, 100 * total / original, compress)
+    except Exception as e:
+        log_aws_error(e)
+    runner.finish("uploads")
 
+# =============== DOWNLOAD FROM S3
 
-@click.command(help="Download a file or folder from an S3 bucket.")
-def download():
-    pass
 
-# INCOMPLETE ==========
+@click.command(help="""Download an object, or every object under a prefix, from an S3 bucket.
+
+Objects uploaded with --compress are decompressed on the way, and saved without
+their .zst or .gz suffix, unless another object already has that name ('a' and
+'a.gz'): those are saved as they are.""")
+@click.option("-bn", "--bucket-name", required=True, help="Name of the bucket to download from.")
+@click.option("-k", "--key", help="Key of a single object to download.")
+@click.option("-p", "--prefix", help="Download every object under this prefix.")
+@click.option("-d", "--dest", default=".", show_default=True, type=click.Path(), help="Local file or directory to download to.")
+@click.option("-r", "--region", help="AWS region where the bucket is located.")
+@concurrency_options(DEFAULT_CONCURRENCY, "objects to download")
+def download(bucket_name, key, prefix, dest, region, concurrency, fail_fast):
+    if (key is None) == (prefix is None):
+        raise click.UsageError("Provide exactly one of --key or --prefix.")
+    s3 = s3_client(region, concurrency)
+    runner = Runner(concurrency, fail_fast, label=lambda target: target[0], format_error=describe_aws_error)
+    dest = Path(dest)
+    target = local_target(dest, Path(key).name) if key and dest.is_dir() else dest
+    if target is None:
+        raise click.UsageError(f"Key '{key}' has no file name to save it under in '{dest}'; pass a file path as --dest.")
+    count = total = 0
+    try:
+        if key:
+            targets = [(key, target)]
+        else:
+            targets = download_targets(iter_objects(s3, bucket_name, prefix), prefix, dest)
+        for result in runner.map(lambda target: download_one(s3, bucket_name, *target), targets, ordered=False):
+            if result.error is None:
+                total += result.value
+                count += 1
+        logger.info("Downloaded %d objects (%d bytes) to '%s'", count, total, dest)
+    except Exception as e:
+        log_aws_error(e)
+    runner.finish("downloads")
 
+# =============== SYNC TO S3
 
-@click.command(help="Sync a local directory with an S3 bucket.")
-def sync():
-    pass
+
+@click.command(help="Sync a local directory to an S3 bucket prefix, uploading new and changed files.")
+@click.option("-bn", "--bucket-name", required=True, help="Name of the bucket to sync to.")
+@click.option("-s", "--source", required=True, type=click.Path(exists=True, file_okay=False), help="Local directory to sync.")
+@click.option("-p", "--prefix", default="", help="Key prefix to sync under.")
+@click.option("--delete", "delete_extra", is_flag=True, help="Delete objects under the prefix that no longer exist locally.")
+@click.option("--compress", type=click.Choice(["zstd", "gzip"]),
+              help="Compress changed files while uploading them, as `upload --compress` does.")
+@click.option("-r", "--region", help="AWS region where the bucket is located.")
+@concurrency_options(DEFAULT_CONCURRENCY, "files to upload")
+def sync(bucket_name, source, prefix, delete_extra, compress, region, concurrency, fail_fast):
+    s3 = s3_client(region, concurrency)
+    # items are (path, key) uploads or lists of keys to delete, so label both by their first element
+    runner = Runner(concurrency, fail_fast, label=lambda item: str(item[0]), format_error=describe_aws_error)
+    uploaded = skipped = deleted = 0
+    try:
+        # index the remote side once, then compare each local file against it
+        list_prefix = f"{prefix.rstrip('/')}/" if prefix else ""
+        remote = {obj['Key']: obj for obj in iter_objects(s3, bucket_name, list_prefix)}
+        changed = []
+        for path, name in iter_local_files(source):
+            key = compressed_key(join_key(prefix, name), compress)
+            stat = path.stat()
+            obj = remote.pop(key, None)
+            # S3 timestamps have one-second resolution, so compare whole seconds;
+            # compressed objects differ in size from their files, so only their age counts
+            if (obj and (compress or obj['Size'] == stat.st_size)
+                    and obj['LastModified'].timestamp() >= int(stat.st_mtime)):
+                skipped += 1
+                continue
+            changed.append((path, key))
+        with compression_pool(compress) as executor:
+            def upload_path(file):
+                return upload_one(s3, file[0], bucket_name, file[1], compress, executor)
+
+            for result in runner.map(upload_path, changed, ordered=False):
+                uploaded += result.error is None
+        # only prune the remote side when every upload succeeded
+        if delete_extra and not runner.errors:
+            deleted = delete_keys(s3, bucket_name, remote, runner)
+        logger.info("Sync complete: %d uploaded, %d unchanged, %d deleted", uploaded, skipped, deleted)
+    except Exception as e:
+        log_aws_error(e)
+    runner.finish("sync operations")
 
 # =============== LIST ALL S3 BUCKETS
 
@@ -142,16 +523,16 @@ def sync():
 @click.command(help="List all S3 buckets in your AWS account.")
 def buckets():
     # initialize the S3 client
-    s3 = boto3.client('s3')
+    s3 = s3_client()
 
     try:
         # fetch the list of S3 buckets
         response = s3.list_buckets()
     except botocore.exceptions.BotoCoreError as e:
-        logger.error(f"AWS Boto3 error: {e}")
+        logger.error("AWS Boto3 error: %s", e)
         return
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         return
 
     # if no buckets exist, notify the user and exit
@@ -160,48 +541,600 @@ def buckets():
         return
 
     logger.info("Existing S3 buckets:")
-    # enumerate through each bucket and print its name and creation date
-    for idx, bucket in enumerate(response['Buckets'], 1):
-        # fallback in case 'Name' is missing
-        name = bucket.get('Name', 'Unnamed')
-        # get creation date if available
-        created = bucket.get('CreationDate')
-        created_str = created.strftime(
-            '%Y-%m-%d %H:%M:%S') if created else 'Unknown date'
-        logger.info(f"\t{idx}: {name}\n\t   └─ Created on: {created_str}")
+    # write each bucket's name and creation date in the selected --output format
+    with output.open_writer(["Name", "CreationDate"]) as out:
+        for bucket in response['Buckets']:
+            # get creation date if available
+            created = bucket.get('CreationDate')
+            out.write({
+                # fallback in case 'Name' is missing
+                "Name": bucket.get('Name', 'Unnamed'),
+                "CreationDate": created.strftime('%Y-%m-%d %H:%M:%S') if created else None,
+            })
 
 # =============== LIST OBJECTS IN S3 BUCKET
 
 
-@click.command(help="List objects inside a specific S3 bucket.")
+@click.command(help="""List objects inside a specific S3 bucket.
+
+--summarize prints object counts and total sizes per key prefix, storage class
+and age instead of the objects. For very large buckets, --inventory reads an S3
+Inventory report (its manifest.json and CSV, ORC or Parquet data files) instead
+of listing the bucket; the data files are downloaded in parallel and read a
+batch of rows at a time, e.g.:
+
+    dev-cli aws s3 ls -bn my-bucket -r eu-west-2 --summarize --inventory s3://inventories/my-bucket/daily/2024-01-01T01-00Z/manifest.json""")
 @click.option("-bn", "--bucket-name", required=True, help="Name of the bucket to list objects from.")
 @click.option("-r", "--region", required=True, help="AWS region where the bucket is located.")
-def ls(bucket_name, region):
+@click.option("-p", "--prefix", default="", help="Only list objects under this prefix.")
+@click.option("--summarize", is_flag=True, help="Print totals per prefix, storage class and age instead of the objects.")
+@click.option("--depth", type=click.IntRange(min=0), default=1, show_default=True, help="Prefix levels to group by with --summarize.")
+@click.option("--inventory", "manifest_location", metavar="MANIFEST",
+              help="Read the objects from an S3 Inventory report (s3://.../manifest.json or a local file) instead of listing the bucket.")
+@concurrency_options(DEFAULT_CONCURRENCY, "inventory files to download")
+def ls(bucket_name, region, prefix, summarize, depth, manifest_location, concurrency, fail_fast):
     # initialise the S3 client
-    s3 = boto3.client('s3', region_name=region)
+    s3 = s3_client(region, concurrency)
+    runner = Runner(concurrency, fail_fast, label=lambda file: file['key'], format_error=describe_aws_error)
     try:
-        # attempt to list objects inside that specified bucket
-        response = s3.list_buckets_v2(Bucket=bucket_name)
-        if 'Contents' not in response:
-            logger.info(f"No objects found in bucket '{bucket_name}'.")
-            return
-
-        logger.info(f"Objects in bucket '{bucket_name}':")
-        for obj in response['Contents']:
-            key = obj['Key']
-            size = obj['Size']
-            last_modified = obj['LastModified'].strftime('%Y-%m-%d %H:%M:%S')
-            logger.info(
-                f"  ├─ {key} | {size} bytes | Last modified: {last_modified}")
+        if manifest_location:
+            ls_inventory(s3, bucket_name, prefix, summarize, depth, manifest_location, runner)
+        elif summarize:
+            ls_summary(s3, bucket_name, prefix, depth)
+        else:
+            ls_objects(s3, bucket_name, prefix)
 
+    except click.ClickException:
+        raise
     # handle specified aws client-side errors
-    except botocore.exceptions.ClientError as E:
+    except botocore.exceptions.ClientError as e:
         error_code = e.response['Error']['Code']
-        logger.error(
-            f"AWS ClientError [{error_code}]: {e.response['Error'].get('Message', '')}")
+        logger.error("AWS ClientError [%s]: %s", error_code, e.response['Error'].get('Message', ''))
     # handle any other unexpected errors
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
+
+    runner.finish("inventory files")
+
+
+def ls_objects(s3, bucket_name, prefix):
+    """List the bucket's objects, page by page."""
+    logger.info("Objects in bucket '%s':", bucket_name)
+    count = 0
+    total_bytes = 0
+    # rows are written page by page, so memory stays flat however large the bucket is
+    with output.open_writer(["Key", "Size", "LastModified"]) as out:
+        for obj in iter_objects(s3, bucket_name, prefix):
+            out.write({
+                "Key": obj['Key'],
+                "Size": obj['Size'],
+                "LastModified": obj['LastModified'].strftime('%Y-%m-%d %H:%M:%S'),
+            })
+            count += 1
+            total_bytes += obj['Size']
+    OBJECTS_LISTED.inc(count, bucket=bucket_name)
+    BYTES_LISTED.inc(total_bytes, bucket=bucket_name)
+    if not count:
+        logger.info("No objects found in bucket '%s'.", bucket_name)
+
+
+def write_summary(summary):
+    with output.open_writer(["Dimension", "Value", "Objects", "Size"]) as out:
+        out.write_all(summary.rows())
+
+
+def ls_summary(s3, bucket_name, prefix, depth):
+    """Summarise the bucket from a live listing."""
+    # pulls in pyarrow's readers, so only loaded when needed
+    from commands.aws import s3_inventory
+
+    summary = s3_inventory.Summary(depth)
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        if page.get('Contents'):
+            summary.add(s3_inventory.objects_table(page['Contents']))
+    OBJECTS_LISTED.inc(summary.objects, bucket=bucket_name)
+    BYTES_LISTED.inc(summary.bytes, bucket=bucket_name)
+    write_summary(summary)
+
+
+def ls_inventory(s3, bucket_name, prefix, summarize, depth, manifest_location, runner):
+    """List or summarise the bucket from an S3 Inventory report."""
+    from commands.aws import s3_inventory
+
+    manifest = s3_inventory.load_manifest(s3, manifest_location)
+    if manifest.source_bucket != bucket_name:
+        raise click.UsageError(f"the inventory is for bucket '{manifest.source_bucket}', not '{bucket_name}'")
+    logger.info("Reading %d %s inventory files from %s (created %s)", len(manifest.files), manifest.file_format,
+                manifest.destination_bucket, manifest.created.strftime('%Y-%m-%d %H:%M'))
+    url_encoded = manifest.file_format == "CSV"
+    started = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="dev-cli-inventory-") as workdir:
+        def fetch(file):
+            path = Path(workdir) / Path(file['key']).name
+            s3.download_file(manifest.destination_bucket, file['key'], str(path))
+            return path
+
+        def summarize_file(file):
+            path = fetch(file)
+            try:
+                # ages are measured from when the inventory was taken
+                summary = s3_inventory.Summary(depth, now=manifest.created, url_encoded=url_encoded)
+                for table in s3_inventory.read_inventory_file(path, manifest, prefix):
+                    summary.add(table)
+                return summary
+            finally:
+                path.unlink()
+
+        if summarize:
+            # files are downloaded and aggregated in parallel; pyarrow releases the GIL while parsing
+            summary = s3_inventory.Summary(depth, now=manifest.created, url_encoded=url_encoded)
+            for result in runner.map(summarize_file, manifest.files, ordered=False):
+                if result.error is None:
+                    summary.merge(result.value)
+            logger.info("Read %d objects from the inventory in %.1fs", summary.objects, time.perf_counter() - started)
+            OBJECTS_LISTED.inc(summary.objects, bucket=bucket_name)
+            BYTES_LISTED.inc(summary.bytes, bucket=bucket_name)
+            write_summary(summary)
+            return
+
+        # files are downloaded ahead in parallel and printed in manifest order
+        count = total_bytes = 0
+        with output.open_writer(["Key", "Size", "LastModified"]) as out:
+            for result in runner.map(fetch, manifest.files):
+                if result.error is not None:
+                    continue
+                for table in s3_inventory.read_inventory_file(result.value, manifest, prefix):
+                    for key, size, modified in zip(*(table.column(c).to_pylist() for c in ("key", "size", "last_modified"))):
+                        out.write({
+                            "Key": urllib.parse.unquote_plus(key) if url_encoded else key,
+                            "Size": size,
+                            "LastModified": modified.strftime('%Y-%m-%d %H:%M:%S') if modified else None,
+                        })
+                        total_bytes += size
+                    count += len(table)
+                result.value.unlink()
+        OBJECTS_LISTED.inc(count, bucket=bucket_name)
+        BYTES_LISTED.inc(total_bytes, bucket=bucket_name)
+
+# =============== INDEX S3 BUCKET KEYS
+
+# multipliers for the --min-size/--max-size suffixes
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(ctx, param, value):
+    """Click callback: turn 1500, 10K, 2.5G, ... into a number of bytes."""
+    if value is None:
+        return None
+    number = value.strip().upper().removesuffix("B").removesuffix("I")
+    unit = number[-1:] if number[-1:] in SIZE_UNITS else ""
+    try:
+        return int(float(number[:len(number) - len(unit)]) * SIZE_UNITS[unit])
+    except ValueError:
+        raise click.BadParameter(f"expected a size such as 1500, 10K or 2.5G, got {value!r}")
+
+
+def refresh_index(s3, bucket_name, key_index, prefix, runner):
+    """Re-list the keys under `prefix` into the index and return a summary row."""
+    started = time.perf_counter()
+    with key_index.refresh(prefix) as add:
+        list_partitioned(s3, bucket_name, prefix, add, runner)
+    stats = key_index.last_refresh
+    OBJECTS_LISTED.inc(stats["objects"], bucket=bucket_name)
+    return {
+        "Prefix": prefix or "/",
+        "Objects": stats["objects"],
+        "Added": stats["added"],
+        "Removed": stats["removed"],
+        "Seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+@click.command(help="""Build or refresh a local index of a bucket's keys for `s3 find`.
+
+The index is a SQLite database in the dev-cli cache directory. Each prefix is
+re-listed in full, split into sub-prefixes that are listed in parallel, and
+replaces what the index held for it; the rest of the index is left as it is.""")
+@click.option("-bn", "--bucket-name", required=True, help="Name of the bucket to index.")
+@click.option("-r", "--region", help="AWS region where the bucket is located.")
+@click.option("-p", "--prefix", "prefixes", multiple=True,
+              help="Only refresh the keys under this prefix (repeatable; defaults to the whole bucket).")
+@concurrency_options(DEFAULT_CONCURRENCY, "listings")
+def index(bucket_name, region, prefixes, concurrency, fail_fast):
+    # sqlite and the index schema are only loaded by the commands that use them
+    from commands.aws import s3_index
+
+    s3 = s3_client(region, concurrency)
+    runner = Runner(concurrency, fail_fast, label=lambda prefix: prefix or "/", format_error=describe_aws_error)
+    try:
+        with s3_index.KeyIndex(s3_index.index_path(bucket_name)) as key_index:
+            with output.open_writer(["Prefix", "Objects", "Added", "Removed", "Seconds"]) as out:
+                for prefix in prefixes or ("",):
+                    out.write(refresh_index(s3, bucket_name, key_index, prefix, runner))
+            logger.info("The index of '%s' holds %d objects", bucket_name, len(key_index))
+
+    # handle any unexpected errors; listing errors are reported by the runner
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+
+    runner.finish("listings")
+
+# =============== FIND OBJECTS IN THE INDEX
+
+
+@click.command(help="""Find objects using a bucket's local index (see `s3 index`).
+
+Queries read the SQLite index rather than S3, so they take milliseconds however
+large the bucket is. --refresh first re-lists just the prefix the query covers
+(from -p and the literal start of --glob). --glob matches whole keys and is
+case-sensitive; * also matches "/", e.g.:
+
+    dev-cli aws s3 find -bn my-bucket -g 'logs/2024-*.gz' --min-size 100M --older-than 90""")
+@click.option("-bn", "--bucket-name", required=True, help="Name of the indexed bucket.")
+@click.option("-p", "--prefix", default="", help="Only find keys under this prefix.")
+@click.option("-g", "--glob", help="Only find keys matching this pattern (*, ? and [...] wildcards).")
+@click.option("--min-size", callback=parse_size, help="Smallest object size, in bytes or with a K/M/G/T suffix.")
+@click.option("--max-size", callback=parse_size, help="Largest object size, in bytes or with a K/M/G/T suffix.")
+@click.option("--older-than", type=click.FloatRange(min=0), metavar="DAYS", help="Only objects last modified more than DAYS ago.")
+@click.option("--newer-than", type=click.FloatRange(min=0), metavar="DAYS", help="Only objects last modified within the last DAYS.")
+@click.option("--storage-class", "storage_classes", multiple=True, help="Only objects in this storage class (repeatable).")
+@click.option("--limit", type=click.IntRange(min=1), help="Stop after this many objects.")
+@click.option("--refresh", is_flag=True, help="Re-list the prefix the query covers before running it.")
+@click.option("-r", "--region", help="AWS region where the bucket is located (used by --refresh).")
+@concurrency_options(DEFAULT_CONCURRENCY, "listings for --refresh")
+def find(bucket_name, prefix, glob, min_size, max_size, older_than, newer_than, storage_classes, limit, refresh, region,
+         concurrency, fail_fast):
+    from commands.aws import s3_index
+
+    runner = Runner(concurrency, fail_fast, label=lambda prefix: prefix or "/", format_error=describe_aws_error)
+    # the narrowest prefix every match must start with
+    literal = s3_index.glob_prefix(glob) if glob else ""
+    covered = literal if literal.startswith(prefix) else prefix
+    path = s3_index.index_path(bucket_name)
+    not_indexed = click.UsageError(f"the index of '{bucket_name}' does not cover '{covered or '/'}': "
+                                   f"run `dev-cli aws s3 index -bn {bucket_name}` or pass --refresh")
+    if not refresh and not path.exists():
+        raise not_indexed
+    try:
+        with s3_index.KeyIndex(path) as key_index:
+            if refresh:
+                row = refresh_index(s3_client(region, concurrency), bucket_name, key_index, covered, runner)
+                logger.info("Refreshed %d objects under '%s' in %.1fs", row["Objects"], row["Prefix"], row["Seconds"])
+            refreshed_at = key_index.refreshed_at(covered)
+            if refreshed_at is None:
+                raise not_indexed
+            logger.info("Index last refreshed %s", time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(refreshed_at)))
+
+            now = time.time()
+            started = time.perf_counter()
+            count = total_bytes = 0
+            with output.open_writer(["Key", "Size", "LastModified", "StorageClass", "ETag"]) as out:
+                rows = key_index.find(
+                    prefix=prefix, glob=glob, min_size=min_size, max_size=max_size,
+                    modified_before=now - older_than * 86400 if older_than is not None else None,
+                    modified_after=now - newer_than * 86400 if newer_than is not None else None,
+                    storage_classes=[c.upper() for c in storage_classes], limit=limit)
+                for key, size, etag, modified, storage_class in rows:
+                    out.write({
+                        "Key": key,
+                        "Size": size,
+                        "LastModified": time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(modified)) if modified is not None else None,
+                        "StorageClass": storage_class,
+                        "ETag": etag,
+                    })
+                    count += 1
+                    total_bytes += size
+            logger.info("Found %d objects (%d bytes) in %.1f ms", count, total_bytes, (time.perf_counter() - started) * 1000)
+
+    except click.ClickException:
+        raise
+    # handle any unexpected errors; listing errors are reported by the runner
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+
+    runner.finish("listings")
+
+# =============== VERIFY LOCAL FILES AGAINST S3
+
+# part size of boto3's (and the aws cli's) multipart uploads
+DEFAULT_PART_SIZE = "8M"
+
+
+def is_missing(e):
+    return isinstance(e, ClientError) and e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound')
+
+
+def verify_file(s3, bucket_name, path, key, check, part_size, executor):
+    """Compare a local file with its object's ETag and/or checksum and return a result row."""
+    from commands.aws import s3_checksums
+
+    size = path.stat().st_size
+    row = {"Key": key, "Size": size, "Checked": "", "Status": "ok", "Detail": ""}
+    try:
+        head = s3.head_object(Bucket=bucket_name, Key=key, ChecksumMode='ENABLED')
+    except ClientError as e:
+        if not is_missing(e):
+            raise
+        return {**row, "Status": "missing"}
+    if head['ContentLength'] != size:
+        return {**row, "Status": "size differs", "Detail": f"{head['ContentLength']} bytes in S3"}
+
+    # (label, algorithm, value in S3, parts, formatter) for each value to compare
+    expected = []
+    skipped = []
+    if check in ("all", "etag"):
+        # the ETag of an SSE-KMS or SSE-C object is not an MD5 of its content
+        if head.get('ServerSideEncryption', '').startswith('aws:kms') or head.get('SSECustomerAlgorithm'):
+            skipped.append("etag (encrypted)")
+        else:
+            etag = head['ETag'].strip('"')
+            expected.append(("etag", "MD5", etag, s3_checksums.parse_multipart(etag)[1], s3_checksums.format_etag))
+    if check in ("all", "checksum"):
+        # an object carries at most one checksum
+        for algorithm, field in s3_checksums.CHECKSUM_FIELDS.items():
+            if not head.get(field):
+                continue
+            if s3_checksums.supported(algorithm):
+                expected.append((algorithm.lower(), algorithm, head[field], s3_checksums.parse_multipart(head[field])[1],
+                                 s3_checksums.format_checksum))
+            else:
+                skipped.append(f"{algorithm.lower()} (needs awscrt)")
+    if not expected:
+        return {**row, "Status": "unverified", "Detail": ", ".join(skipped) or "no ETag or checksum to compare"}
+
+    # multipart values depend on the upload's part size; part 1's length gives it exactly
+    parts = next((parts for _, _, _, parts, _ in expected if parts is not None), None)
+    if parts is not None and s3_checksums.part_count(size, part_size) != parts:
+        part_size = s3.head_object(Bucket=bucket_name, Key=key, PartNumber=1)['ContentLength']
+    digests = [s3_checksums.Digest(algorithm, part_size if parts is not None else None)
+               for _, algorithm, _, parts, _ in expected]
+    computed = s3_checksums.file_digests(path, digests, executor)
+
+    mismatched = [f"{label}: {value} in S3, {formatter(*result)} locally"
+                  for (label, _, value, _, formatter), result in zip(expected, computed) if formatter(*result) != value]
+    return {
+        **row,
+        "Checked": ", ".join(label for label, *_ in expected),
+        "Status": "mismatch" if mismatched else "ok",
+        "Detail": "; ".join(mismatched + [f"skipped {s}" for s in skipped]),
+    }
+
+
+@click.command(help="""Verify local files against their S3 objects without downloading them.
+
+Each file's S3 ETag (including the multipart "-N" form) and the object's
+CRC32/CRC32C/CRC64NVME/SHA1/SHA256 checksum, if it has one, are computed locally
+and compared with head_object. Files are memory-mapped and their parts hashed
+in parallel on every core while the HEAD requests run concurrently, so large
+backups verify at disk speed. Keys map to files as in `upload` and `download`.
+Exits with status 1 if any file is missing or differs.""")
+@click.option("-bn", "--bucket-name", required=True, help="Name of the bucket to verify against.")
+@click.option("-s", "--source", required=True, type=click.Path(exists=True), help="Local file or directory to verify.")
+@click.option("-p", "--prefix", default="", help="Key prefix the files are stored under.")
+@click.option("--check", type=click.Choice(["all", "etag", "checksum"]), default="all", show_default=True,
+              help="Compare the ETag, the additional checksum, or both.")
+@click.option("--part-size", callback=parse_size, default=DEFAULT_PART_SIZE, show_default=True,
+              help="Multipart part size the files were uploaded with; other sizes are detected with an extra HEAD request.")
+@click.option("--hash-workers", type=click.IntRange(min=1), help="Threads hashing file parts (defaults to the number of CPUs).")
+@click.option("--all", "show_all", is_flag=True, help="List every file, not just the ones that failed verification.")
+@click.option("-r", "--region", help="AWS region where the bucket is located.")
+@concurrency_options(DEFAULT_CONCURRENCY, "files to verify")
+def verify(bucket_name, source, prefix, check, part_size, hash_workers, show_all, region, concurrency, fail_fast):
+    s3 = s3_client(region, concurrency)
+    runner = Runner(concurrency, fail_fast, label=lambda file: str(file[0]), format_error=describe_aws_error)
+    statuses = collections.Counter()
+    total = 0
+    started = time.perf_counter()
+    try:
+        files = ((path, join_key(prefix, name)) for path, name in iter_local_files(source))
+        with concurrent.futures.ThreadPoolExecutor(hash_workers or os.cpu_count(), thread_name_prefix="dev-cli-hash") as executor, \
+                output.open_writer(["Key", "Size", "Checked", "Status", "Detail"]) as out:
+            def verify_one(file):
+                return verify_file(s3, bucket_name, file[0], file[1], check, part_size, executor)
+
+            for result in runner.map(verify_one, files, ordered=False):
+                if result.error is not None:
+                    continue
+                row = result.value
+                statuses[row["Status"]] += 1
+                OBJECTS_VERIFIED.inc(result=row["Status"])
+                total += row["Size"]
+                if show_all or row["Status"] != "ok":
+                    out.write(row)
+        elapsed = time.perf_counter() - started
+        logger.info("Verified %d files (%d bytes) in %.1fs: %s", sum(statuses.values()), total, elapsed,
+                    ", ".join(f"{count} {status}" for status, count in sorted(statuses.items())) or "nothing to verify")
+    except Exception as e:
+        log_aws_error(e)
+    runner.finish("verifications")
+
+    if statuses["missing"] or statuses["size differs"] or statuses["mismatch"]:
+        raise click.exceptions.Exit(1)
+
+# =============== COPY BETWEEN BUCKETS
+
+# S3 limits on multipart copies
+MIN_PART_SIZE = 5 << 20
+MAX_PART_SIZE = 5 << 30
+MAX_PARTS = 10_000
+# copy_object refuses larger objects, whatever --multipart-threshold says
+MAX_COPY_OBJECT_SIZE = 5 << 30
+# user metadata keeping the source ETag of objects copied in new parts
+SOURCE_ETAG_METADATA = "dev-cli-source-etag"
+# object headers carried over to multipart copies (copy_object copies them itself)
+COPIED_HEADERS = ("ContentType", "ContentEncoding", "ContentDisposition", "ContentLanguage", "CacheControl")
+
+
+def pair_with_destination(sources, destinations, rename):
+    """Walk two key-ordered listings together, yielding (source object, matching destination object or None)."""
+    dest = next(destinations, None)
+    for obj in sources:
+        key = rename(obj['Key'])
+        while dest is not None and dest['Key'] < key:
+            dest = next(destinations, None)
+        yield obj, dest if dest is not None and dest['Key'] == key else None
+
+
+def copied_in_parts(obj, threshold):
+    """Whether an object is copied with upload_part_copy rather than copy_object."""
+    from commands.aws import s3_checksums
+
+    return (s3_checksums.parse_multipart(obj['ETag'])[1] is not None
+            or obj['Size'] > min(threshold, MAX_COPY_OBJECT_SIZE))
+
+
+def is_up_to_date(s3, dest_bucket, obj, dest, threshold):
+    """Whether the destination object already holds the same data as the source object."""
+    if dest is None or dest['Size'] != obj['Size']:
+        return False
+    if dest['ETag'] == obj['ETag']:
+        return True
+    # single-part objects copied in new parts get a new ETag, so the source's is kept in their metadata
+    if copied_in_parts(obj, threshold) and '-' in dest['ETag']:
+        head = s3.head_object(Bucket=dest_bucket, Key=dest['Key'])
+        return head.get('Metadata', {}).get(SOURCE_ETAG_METADATA) == obj['ETag'].strip('"')
+    return False
+
+
+def multipart_copy(s3, source_s3, source_bucket, obj, dest_bucket, dest_key, part_size, executor):
+    """Copy one object with parallel upload_part_copy calls, keeping the source's part size when it has one."""
+    from commands.aws import s3_checksums
+
+    size = obj['Size']
+    source_parts = s3_checksums.parse_multipart(obj['ETag'])[1]
+    # for multipart sources, part 1's length is the part size the object was uploaded with
+    head = source_s3.head_object(Bucket=source_bucket, Key=obj['Key'], **({'PartNumber': 1} if source_parts else {}))
+    metadata = dict(head.get('Metadata', {}))
+    if source_parts and s3_checksums.part_count(size, head['ContentLength']) == source_parts:
+        # the same parts give the same ETag, so later runs can skip the object
+        part_size = head['ContentLength']
+    else:
+        part_size = max(part_size, -(-size // MAX_PARTS))
+        metadata[SOURCE_ETAG_METADATA] = obj['ETag'].strip('"')
+    # copy_object copies the tags itself, new uploads start without any
+    tags = source_s3.get_object_tagging(Bucket=source_bucket, Key=obj['Key'])['TagSet']
+    tagging = {'Tagging': urllib.parse.urlencode([(tag['Key'], tag['Value']) for tag in tags])} if tags else {}
+
+    upload_id = s3.create_multipart_upload(
+        Bucket=dest_bucket, Key=dest_key, Metadata=metadata, StorageClass=obj.get('StorageClass', 'STANDARD'),
+        **{field: head[field] for field in COPIED_HEADERS if head.get(field)}, **tagging,
+    )['UploadId']
+    copy_source = {'Bucket': source_bucket, 'Key': obj['Key']}
+
+    def copy_part(number, start, end):
+        response = s3.upload_part_copy(Bucket=dest_bucket, Key=dest_key, UploadId=upload_id, PartNumber=number,
+                                       CopySource=copy_source, CopySourceRange=f"bytes={start}-{end - 1}")
+        return {'PartNumber': number, 'ETag': response['CopyPartResult']['ETag']}
+
+    futures = []
+    try:
+        for number, (start, end) in enumerate(s3_checksums.part_ranges(size, part_size), 1):
+            futures.append(executor.submit(copy_part, number, start, end))
+        parts = [future.result() for future in futures]
+        s3.complete_multipart_upload(Bucket=dest_bucket, Key=dest_key, UploadId=upload_id,
+                                     MultipartUpload={'Parts': parts})
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        # parts still being copied would outlive the abort, so let them finish first
+        concurrent.futures.wait(futures)
+        s3.abort_multipart_upload(Bucket=dest_bucket, Key=dest_key, UploadId=upload_id)
+        raise
+
+
+def copy_one(s3, source_s3, source_bucket, obj, dest_bucket, dest_key, dest, threshold, part_size, executor):
+    """Copy one object server-side unless the destination already matches. Returns True if it was copied."""
+    if is_up_to_date(s3, dest_bucket, obj, dest, threshold):
+        return False
+    started = time.perf_counter()
+    if copied_in_parts(obj, threshold):
+        multipart_copy(s3, source_s3, source_bucket, obj, dest_bucket, dest_key, part_size, executor)
+    else:
+        s3.copy_object(Bucket=dest_bucket, Key=dest_key, CopySource={'Bucket': source_bucket, 'Key': obj['Key']},
+                       StorageClass=obj.get('StorageClass', 'STANDARD'), TaggingDirective='COPY')
+    record_transfer("copy", obj['Size'], time.perf_counter() - started)
+    return True
+
+
+@click.command(help="""Copy objects from one bucket or prefix to another, server-side.
+
+S3 copies the data itself, so nothing passes through this machine. The source
+listing is streamed alongside the destination's, and objects already there
+with the same size and ETag are skipped, so an interrupted copy can simply be
+re-run. Objects that were uploaded in parts, and single-part objects above
+--multipart-threshold (or above 5G, the most copy_object takes), are copied with
+parallel upload_part_copy calls (reusing the source's part size, so the ETag
+carries over); the rest use copy_object. Both keep the source's tags.
+Keys keep their path below the source prefix, e.g.:
+
+    dev-cli aws s3 copy -sb old-bucket -sp data/ -db new-bucket -dp archive/data/ --source-region eu-west-1 -r eu-west-2""")
+@click.option("-sb", "--source-bucket", required=True, help="Name of the bucket to copy from.")
+@click.option("-sp", "--source-prefix", default="", help="Only copy keys under this prefix.")
+@click.option("-db", "--dest-bucket", required=True, help="Name of the bucket to copy to.")
+@click.option("-dp", "--dest-prefix", help="Prefix that replaces the source prefix in the copied keys (defaults to the source prefix).")
+@click.option("--source-region", help="AWS region of the source bucket (defaults to --region).")
+@click.option("-r", "--region", help="AWS region of the destination bucket.")
+@click.option("--multipart-threshold", callback=parse_size, default="64M", show_default=True,
+              help="Copy single-part objects larger than this in parts (objects above 5G always are).")
+@click.option("--part-size", callback=parse_size, default="64M", show_default=True,
+              help="Part size for single-part objects copied in parts.")
+@click.option("--dry-run", is_flag=True, help="List the objects that would be copied without copying them.")
+@concurrency_options(DEFAULT_CONCURRENCY, "objects, and parts of each object, to copy")
+def copy(source_bucket, source_prefix, dest_bucket, dest_prefix, source_region, region, multipart_threshold, part_size,
+         dry_run, concurrency, fail_fast):
+    if not MIN_PART_SIZE <= part_size <= MAX_PART_SIZE:
+        raise click.BadParameter("must be between 5M and 5G", param_hint="--part-size")
+    dest_prefix = source_prefix if dest_prefix is None else dest_prefix
+    # copies landing under the source prefix would be listed and copied again
+    if source_bucket == dest_bucket and dest_prefix.startswith(source_prefix):
+        raise click.UsageError("the destination prefix is inside the source prefix")
+
+    source_s3 = s3_client(source_region or region, concurrency)
+    # objects and their parts each get `concurrency` connections
+    s3 = s3_client(region, concurrency * 2)
+    runner = Runner(concurrency, fail_fast, label=lambda pair: pair[0]['Key'], format_error=describe_aws_error)
+    copied = skipped = total = 0
+    started = time.perf_counter()
+    try:
+        def rename(key):
+            return dest_prefix + key[len(source_prefix):]
+
+        pairs = pair_with_destination(iter_objects(source_s3, source_bucket, source_prefix),
+                                      iter_objects(s3, dest_bucket, dest_prefix), rename)
+        if dry_run:
+            with output.open_writer(["Key", "Destination", "Size", "Method"]) as out:
+                for obj, dest in pairs:
+                    if is_up_to_date(s3, dest_bucket, obj, dest, multipart_threshold):
+                        continue
+                    out.write({
+                        "Key": obj['Key'],
+                        "Destination": rename(obj['Key']),
+                        "Size": obj['Size'],
+                        "Method": "upload_part_copy" if copied_in_parts(obj, multipart_threshold) else "copy_object",
+                    })
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(concurrency, thread_name_prefix="dev-cli-copy-part") as executor:
+            def copy_pair(pair):
+                obj, dest = pair
+                return copy_one(s3, source_s3, source_bucket, obj, dest_bucket, rename(obj['Key']), dest,
+                                multipart_threshold, part_size, executor)
+
+            for result in runner.map(copy_pair, pairs, ordered=False):
+                if result.error is not None:
+                    continue
+                if result.value:
+                    copied += 1
+                    total += result.item[0]['Size']
+                else:
+                    skipped += 1
+        logger.info("Copied %d objects (%d bytes) to 's3://%s/%s' in %.1fs, %d already up to date",
+                    copied, total, dest_bucket, dest_prefix, time.perf_counter() - started, skipped)
+    except Exception as e:
+        log_aws_error(e)
+    runner.finish("copies")
 
 # INCOMPLETE ==========
 
@@ -216,20 +1149,18 @@ def set_policy():
 @click.command(help="Retrieve and display the current policy of a bucket.")
 @click.option("-bn", "--bucket-name", required=True, help="Input the name of the existing bucket.")
 def get_policy(bucket_name):
-    s3 = boto3.client('s3')
+    s3 = s3_client()
     try:
         response = s3.get_bucket_policy(Bucket=bucket_name)
         policy = response['Policy']
         # pretty-print the bucket policy JSON
-        logger.info(
-            f"Policy for bucket '{bucket_name}':\n{json.dumps(json.loads(policy), indent=2)}")
+        logger.info("Policy for bucket '%s':\n%s", bucket_name, json.dumps(json.loads(policy), indent=2))
     except botocore.exceptions.ClientError as e:
         error_code = e.response['Error']['Code']
         if error_code == 'NoSuchBucketPolicy':
-            logger.warning(f"No policy attached to bucket '{bucket_name}'.")
+            logger.warning("No policy attached to bucket '%s'.", bucket_name)
         else:
-            logger.error(
-                f"Unable to retrieve policy for bucket '{bucket_name}': {e}")
+            logger.error("Unable to retrieve policy for bucket '%s': %s", bucket_name, e)
         # only return on exception
         return
 
@@ -249,11 +1180,15 @@ s3.add_command(delete)
 # lists all buckets
 s3.add_command(buckets)
 s3.add_command(ls)
+s3.add_command(index)
+s3.add_command(find)
 
 # object operations
 s3.add_command(upload)
 s3.add_command(download)
 s3.add_command(sync)
+s3.add_command(copy)
+s3.add_command(verify)
 
 # policy management
 s3.add_command(set_policy)
@@ -0,0 +1,155 @@
+"""
+Local S3 ETags and checksums for `dev-cli aws s3 verify`.
+
+S3 reports two kinds of fingerprint for an object, both computable from a local
+copy without downloading anything:
+
+    ETag      MD5 of the object (hex) for single-part uploads; for multipart
+              uploads, the MD5 of the concatenated part MD5s plus "-<parts>".
+    Checksum  CRC32, CRC32C, CRC64NVME, SHA1 or SHA256 (base64), either of the
+              FULL_OBJECT or, for multipart uploads, COMPOSITE: the checksum of
+              the concatenated part checksums plus "-<parts>".
+
+Multipart values depend on the part size used by the upload, which is why
+every Digest carries one (None for a whole-object value):
+
+    with concurrent.futures.ThreadPoolExecutor(os.cpu_count()) as executor:
+        etag, sha256 = file_digests(path, [Digest("MD5", 8 << 20), Digest("SHA256", None)], executor)
+        format_etag(*etag)  # '9b2cf535f27731c974343645a3985328-3'
+
+Files are memory-mapped and every part is hashed as its own task, so a large
+file keeps all cores busy; hashlib and zlib release the GIL while hashing.
+CRC32C and CRC64NVME need awscrt (pip install awscrt), like botocore does.
+"""
+
+import base64
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
+import mmap
+import os
+import zlib
+
+try:
+    from awscrt import checksums as crt_checksums
+except ImportError:  # pragma: no cover - optional dependency
+    crt_checksums = None
+
+# =============== ALGORITHMS
+
+# HeadObject response fields for each checksum algorithm
+CHECKSUM_FIELDS = {
+    "CRC32": "ChecksumCRC32",
+    "CRC32C": "ChecksumCRC32C",
+    "CRC64NVME": "ChecksumCRC64NVME",
+    "SHA1": "ChecksumSHA1",
+    "SHA256": "ChecksumSHA256",
+}
+
+Digest = collections.namedtuple("Digest", ["algorithm", "part_size"])
+
+
+class _Crc:
+    """hashlib-style wrapper around an incremental CRC function."""
+
+    def __init__(self, func, width):
+        self.func = func
+        self.width = width
+        self.value = 0
+
+    def update(self, data):
+        self.value = self.func(data, self.value)
+
+    def digest(self):
+        return self.value.to_bytes(self.width // 8, "big")
+
+
+def new_hasher(algorithm):
+    """A fresh hasher (update/digest) for an ETag ("MD5") or checksum algorithm."""
+    if algorithm in ("MD5", "SHA1", "SHA256"):
+        return hashlib.new(algorithm.lower())
+    if algorithm == "CRC32":
+        return _Crc(zlib.crc32, 32)
+    if algorithm in ("CRC32C", "CRC64NVME"):
+        if crt_checksums is None:
+            raise RuntimeError(f"{algorithm} checksums need awscrt: pip install awscrt")
+        return _Crc(crt_checksums.crc32c, 32) if algorithm == "CRC32C" else _Crc(crt_checksums.crc64nvme, 64)
+    raise ValueError(f"unsupported checksum algorithm: {algorithm}")
+
+
+def supported(algorithm):
+    return algorithm not in ("CRC32C", "CRC64NVME") or crt_checksums is not None
+
+# =============== PARTS
+
+
+def part_count(size, part_size):
+    """Number of parts a multipart upload of `size` bytes has with `part_size` parts."""
+    return max(1, -(-size // part_size))
+
+
+def part_ranges(size, part_size):
+    """(start, end) byte ranges of each part; one range for the whole file if part_size is None."""
+    if part_size is None:
+        return [(0, size)]
+    return [(start, min(start + part_size, size)) for start in range(0, max(size, 1), part_size)]
+
+
+def parse_multipart(value):
+    """Split an ETag or checksum into (value, parts); parts is None for whole-object values."""
+    value = value.strip('"')
+    digest, sep, parts = value.rpartition("-")
+    if sep and parts.isdigit():
+        return digest, int(parts)
+    return value, None
+
+
+def format_etag(digest, parts):
+    return f"{digest.hex()}-{parts}" if parts is not None else digest.hex()
+
+
+def format_checksum(digest, parts):
+    encoded = base64.b64encode(digest).decode()
+    return f"{encoded}-{parts}" if parts is not None else encoded
+
+# =============== HASHING
+
+
+def _hash_range(view, start, end, algorithm):
+    hasher = new_hasher(algorithm)
+    with view[start:end] as part:
+        hasher.update(part)
+    return hasher.digest()
+
+
+def file_digests(path, digests, executor):
+    """
+    Compute each Digest for a local file, as (digest bytes, parts) pairs in the
+    same order; parts is None for whole-object digests. The file is mapped once
+    and all of its parts are submitted to `executor` together.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f, \
+            (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else contextlib.nullcontext(b"")) as mapped, \
+            memoryview(mapped) as view:
+        pending = [[executor.submit(_hash_range, view, start, end, digest.algorithm)
+                    for start, end in part_ranges(size, digest.part_size)] for digest in digests]
+        try:
+            results = []
+            for digest, futures in zip(digests, pending):
+                parts = [future.result() for future in futures]
+                if digest.part_size is None:
+                    results.append((parts[0], None))
+                    continue
+                # multipart values hash the concatenated part digests
+                combined = new_hasher(digest.algorithm)
+                combined.update(b"".join(parts))
+                results.append((combined.digest(), len(parts)))
+            return results
+        finally:
+            # the mapping can only be closed once no task is reading it
+            for futures in pending:
+                for future in futures:
+                    future.cancel()
+            concurrent.futures.wait([future for futures in pending for future in futures])
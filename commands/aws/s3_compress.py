@@ -0,0 +1,144 @@
+"""
+Streaming compression for `dev-cli aws s3 upload/sync --compress` and `download`.
+
+A file is read in fixed-size chunks and every chunk is compressed on its own,
+as a separate zstd frame or gzip member, on a shared thread pool (zstandard
+and zlib release the GIL, so chunks compress in parallel on every core).
+Concatenated frames/members are a valid stream for any zstd or gzip decoder,
+so the compressed chunks are handed on in order, as a read-only stream that
+upload_fileobj cuts into multipart parts:
+
+    with CompressedReader(path, "zstd", executor) as stream:
+        s3.upload_fileobj(stream, bucket, key + SUFFIXES["zstd"], ExtraArgs=upload_args("zstd"))
+
+Nothing is written to disk, and memory is bounded by the chunks compressed
+ahead of the reader plus the parts boto3 holds for upload. Compressed objects
+get the codec's suffix and a metadata marker, so `download` only decompresses
+objects that dev-cli compressed, not every .gz it finds.
+"""
+
+import collections
+import gzip
+import io
+import os
+import threading
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# =============== CONSTANTS
+
+CODECS = ("zstd", "gzip")
+SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+# user metadata recording the codec of objects compressed by dev-cli
+METADATA_KEY = "dev-cli-compression"
+# bytes of the source file compressed as one frame/member
+CHUNK_SIZE = 4 << 20
+# chunks compressed ahead of the reader, per CPU
+CHUNKS_AHEAD = 2
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+
+# compressors keep state, so each pool thread gets its own
+_local = threading.local()
+
+
+def require_codec(codec):
+    if codec == "zstd" and zstandard is None:
+        raise RuntimeError("zstandard is required for zstd compression: pip install zstandard")
+
+
+def upload_args(codec):
+    """ExtraArgs for uploading an object compressed with `codec`."""
+    return {"Metadata": {METADATA_KEY: codec}}
+
+
+def compressed_codec(key, metadata):
+    """The codec a dev-cli-compressed object was written with, or None for other objects."""
+    codec = metadata.get(METADATA_KEY)
+    return codec if codec in CODECS and key.endswith(SUFFIXES[codec]) else None
+
+# =============== COMPRESSION
+
+
+def compress_chunk(data, codec):
+    if codec == "gzip":
+        # mtime=0 keeps the output reproducible, so unchanged files compress to the same bytes
+        return gzip.compress(data, GZIP_LEVEL, mtime=0)
+    compressor = getattr(_local, "zstd", None)
+    if compressor is None:
+        compressor = _local.zstd = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return compressor.compress(data)
+
+
+class CompressedReader(io.RawIOBase):
+    """A file's content, compressed chunk by chunk on `executor`, as a read-only stream. See the module docstring."""
+
+    def __init__(self, path, codec, executor, ahead=None):
+        require_codec(codec)
+        self.codec = codec
+        self.executor = executor
+        self.ahead = ahead or CHUNKS_AHEAD * (os.cpu_count() or 1)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._file = open(path, "rb")
+        self._pending = collections.deque()
+        self._buffer = memoryview(b"")
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def _schedule(self):
+        """Keep `ahead` chunks compressing while there is input left."""
+        while not self._eof and len(self._pending) < self.ahead:
+            chunk = self._file.read(CHUNK_SIZE)
+            if not chunk:
+                self._eof = True
+                # an empty file still compresses to one (empty) frame, so decoders accept the object
+                if self.bytes_in:
+                    break
+            self.bytes_in += len(chunk)
+            self._pending.append(self.executor.submit(compress_chunk, chunk, self.codec))
+
+    def readinto(self, buffer):
+        # fills the whole buffer unless the stream ends: boto3 treats a short read as the last part
+        filled = 0
+        while filled < len(buffer):
+            if not self._buffer:
+                self._schedule()
+                if not self._pending:
+                    break
+                self._buffer = memoryview(self._pending.popleft().result())
+                self.bytes_out += len(self._buffer)
+            count = min(len(buffer) - filled, len(self._buffer))
+            buffer[filled:filled + count] = self._buffer[:count]
+            self._buffer = self._buffer[count:]
+            filled += count
+        return filled
+
+    def close(self):
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._file.close()
+        super().close()
+
+# =============== DECOMPRESSION
+
+
+def decompress_stream(source, target, codec):
+    """Decompress a readable stream of concatenated frames/members into the binary file `target`."""
+    require_codec(codec)
+    if codec == "gzip":
+        reader = gzip.GzipFile(fileobj=source, mode="rb")
+    else:
+        reader = zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True)
+    with reader:
+        while True:
+            data = reader.read(CHUNK_SIZE)
+            if not data:
+                return
+            target.write(data)
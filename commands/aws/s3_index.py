@@ -0,0 +1,191 @@
+"""
+Local SQLite index of a bucket's keys for `dev-cli aws s3 index` and `s3 find`.
+
+Each bucket gets its own database under the dev-cli cache directory
+(s3-index/<bucket>.sqlite3) with one row per object: key, size, etag,
+last-modified and storage class. Keys are the primary key of a WITHOUT ROWID
+table, so every prefix is a contiguous range and a query under a prefix only
+touches that range, whatever the size of the bucket:
+
+    with KeyIndex(index_path("my-bucket")) as index:
+        with index.refresh("logs/") as add:
+            for page in pages:
+                add(page)
+        rows = index.find(prefix="logs/2024/", glob="*.gz", min_size=1 << 20)
+
+A refresh is incremental per prefix: the listed objects are upserted with a
+new generation number, then the rows under the prefix still carrying an older
+generation (objects deleted since the last refresh) are swept, all in one
+transaction. Other prefixes are left as they are, and a failed listing rolls
+the prefix back to its previous state.
+"""
+
+import contextlib
+import sqlite3
+import threading
+import time
+
+from commands.config.paths import get_cache_dir
+
+# =============== CONSTANTS
+
+# characters that end the literal prefix of a GLOB pattern
+GLOB_SPECIAL = "*?["
+# rows fetched per step when streaming query results
+FETCH_ROWS = 1000
+
+UPSERT = (
+    "INSERT INTO objects (key, size, etag, last_modified, storage_class, generation) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (key) DO UPDATE SET size = excluded.size, etag = excluded.etag, "
+    "last_modified = excluded.last_modified, storage_class = excluded.storage_class, generation = excluded.generation"
+)
+
+
+def index_path(bucket_name):
+    return get_cache_dir("s3-index") / f"{bucket_name}.sqlite3"
+
+
+def glob_prefix(pattern):
+    """The literal part of a GLOB pattern before its first wildcard."""
+    end = min((i for i in (pattern.find(c) for c in GLOB_SPECIAL) if i >= 0), default=len(pattern))
+    return pattern[:end]
+
+
+def prefix_range(prefix, column="key"):
+    """SQL condition and parameters selecting the values of `column` that start with `prefix`, as a range."""
+    if not prefix:
+        return "1", []
+    # sqlite compares TEXT as UTF-8 bytes, which sorts like S3 does
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return f"{column} >= ? AND {column} < ?", [prefix, upper]
+
+# =============== INDEX
+
+
+class KeyIndex:
+    """A persistent index of one bucket's objects. See the module docstring."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            "key TEXT PRIMARY KEY, size INTEGER NOT NULL, etag TEXT, last_modified INTEGER, "
+            "storage_class TEXT, generation INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS objects_size ON objects (size)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS objects_last_modified ON objects (last_modified)")
+        # the prefixes refreshed so far, when, and with which generation
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS refreshes ("
+            "prefix TEXT PRIMARY KEY, refreshed_at REAL NOT NULL, generation INTEGER NOT NULL)"
+        )
+
+    # =============== WRITES
+
+    @contextlib.contextmanager
+    def refresh(self, prefix=""):
+        """
+        Replace the rows under `prefix` with a fresh listing, in one transaction.
+
+        Yields add(objects), which takes list_objects_v2 Contents entries and may be
+        called from several threads. On leaving the block, rows under the prefix that
+        were not added are removed; if the block raises, nothing changes. The
+        counts of objects indexed, added and removed are left in `self.last_refresh`.
+        """
+        condition, params = prefix_range(prefix)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            generation = self._conn.execute("SELECT COALESCE(MAX(generation), 0) + 1 FROM refreshes").fetchone()[0]
+            before = self._conn.execute(f"SELECT COUNT(*) FROM objects WHERE {condition}", params).fetchone()[0]
+        added = 0
+
+        def add(objects):
+            nonlocal added
+            rows = [(o['Key'], o['Size'], o.get('ETag', '').strip('"'),
+                     int(o['LastModified'].timestamp()) if o.get('LastModified') else None,
+                     o.get('StorageClass', 'STANDARD'), generation) for o in objects]
+            with self._lock:
+                self._conn.executemany(UPSERT, rows)
+                added += len(rows)
+
+        try:
+            yield add
+            with self._lock:
+                removed = self._conn.execute(
+                    f"DELETE FROM objects WHERE {condition} AND generation < ?", params + [generation]).rowcount
+                # a refresh of the prefix supersedes the refreshes of anything under it
+                self._conn.execute(f"DELETE FROM refreshes WHERE {prefix_range(prefix, 'prefix')[0]}", params)
+                self._conn.execute("INSERT INTO refreshes VALUES (?, ?, ?)", (prefix, time.time(), generation))
+                self._conn.execute("COMMIT")
+        except BaseException:
+            with self._lock:
+                self._conn.execute("ROLLBACK")
+            raise
+        self.last_refresh = {"objects": added, "added": added + removed - before, "removed": removed}
+
+    # =============== READS
+
+    def refreshed_at(self, prefix=""):
+        """When the keys under `prefix` were last listed in full (None if never)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT prefix, refreshed_at FROM refreshes").fetchall()
+        covering = [at for refreshed, at in rows if prefix.startswith(refreshed)]
+        return max(covering, default=None)
+
+    def find(self, prefix="", glob=None, min_size=None, max_size=None, modified_after=None, modified_before=None,
+             storage_classes=(), limit=None):
+        """
+        Yield (key, size, etag, last_modified, storage_class) rows matching every
+        given filter, in key order. `glob` matches the whole key (sqlite GLOB:
+        case-sensitive, `*` also matches "/"); modification times are unix seconds.
+        """
+        clauses, params = [], []
+        # the literal prefixes become primary key ranges, so only that part of the index is scanned
+        for literal in (prefix, glob_prefix(glob) if glob else ""):
+            if literal:
+                condition, values = prefix_range(literal)
+                clauses.append(condition)
+                params += values
+        if glob:
+            clauses.append("key GLOB ?")
+            params.append(glob)
+        for condition, value in (("size >= ?", min_size), ("size <= ?", max_size),
+                                 ("last_modified >= ?", modified_after), ("last_modified < ?", modified_before)):
+            if value is not None:
+                clauses.append(condition)
+                params.append(value)
+        if storage_classes:
+            clauses.append(f"storage_class IN ({','.join('?' * len(storage_classes))})")
+            params += list(storage_classes)
+        sql = ("SELECT key, size, etag, last_modified, storage_class FROM objects WHERE "
+               + (" AND ".join(clauses) or "1") + " ORDER BY key")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        while True:
+            # fetched in chunks, so large results stream rather than load at once
+            with self._lock:
+                rows = cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                return
+            yield from rows
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,249 @@
+"""
+S3 Inventory reports and object summaries for `dev-cli aws s3 ls`.
+
+An S3 Inventory configuration delivers a manifest.json plus CSV (gzipped),
+ORC or Parquet data files that list every object in the source bucket. For
+buckets with hundreds of millions of keys, reading those files is far quicker
+than paging through list_objects_v2:
+
+    manifest = load_manifest(s3, "s3://inventories/my-bucket/daily/2024-01-01T01-00Z/manifest.json")
+    summary = Summary(depth=1)
+    for file in manifest.files:
+        s3.download_file(manifest.destination_bucket, file["key"], path)
+        for table in read_inventory_file(path, manifest):
+            summary.add(table)
+
+Every reader yields pyarrow Tables with the same columns (key, size,
+storage_class, last_modified), one batch at a time, so a data file of any size
+is read in bounded memory and the aggregation stays columnar. Only current
+object versions are kept; delete markers are dropped.
+"""
+
+import collections
+import datetime
+import json
+import re
+import urllib.parse
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv
+    import pyarrow.orc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+# =============== CONSTANTS
+
+FORMATS = ("CSV", "ORC", "Parquet")
+# inventory fields read from the data files (snake_case, as in ORC/Parquet)
+FIELDS = ("key", "size", "last_modified_date", "storage_class", "is_latest", "is_delete_marker")
+# rows per batch read from a data file
+BATCH_ROWS = 256 * 1024
+# bytes per block read from a CSV data file
+CSV_BLOCK_SIZE = 16 << 20
+# age buckets for summaries: (label, upper bound in days)
+AGE_BUCKETS = (("< 30 days", 30), ("30-90 days", 90), ("90-180 days", 180), ("180-365 days", 365),
+               ("> 1 year", None))
+MS_PER_DAY = 86_400_000
+
+Manifest = collections.namedtuple(
+    "Manifest", ["source_bucket", "destination_bucket", "file_format", "columns", "files", "created"])
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is required to read S3 inventories: pip install pyarrow")
+
+# =============== MANIFESTS
+
+
+def parse_s3_url(url):
+    """Split s3://bucket/key into (bucket, key)."""
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme != "s3" or not parsed.netloc:
+        raise ValueError(f"not an s3:// URL: {url}")
+    return parsed.netloc, parsed.path.lstrip("/")
+
+
+def snake_case(name):
+    """Inventory CSV schema names (LastModifiedDate) -> ORC/Parquet column names (last_modified_date)."""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name.strip()).lower()
+
+
+def load_manifest(s3, location):
+    """Read an inventory manifest.json from an s3:// URL or a local file."""
+    if location.startswith("s3://"):
+        bucket, key = parse_s3_url(location)
+        data = json.loads(s3.get_object(Bucket=bucket, Key=key)['Body'].read())
+    else:
+        data = json.loads(Path(location).read_text())
+    file_format = data["fileFormat"]
+    if file_format not in FORMATS:
+        raise ValueError(f"unsupported inventory format: {file_format}")
+    # CSV files have no header; the manifest lists their columns. ORC/Parquet name their own.
+    columns = [snake_case(c) for c in data["fileSchema"].split(",")] if file_format == "CSV" else None
+    created = datetime.datetime.fromtimestamp(int(data["creationTimestamp"]) / 1000, datetime.timezone.utc)
+    return Manifest(
+        source_bucket=data["sourceBucket"],
+        # arn:aws:s3:::bucket-name
+        destination_bucket=data["destinationBucket"].split(":::")[-1],
+        file_format=file_format,
+        columns=columns,
+        files=data["files"],
+        created=created,
+    )
+
+# =============== DATA FILES
+
+
+def _csv_batches(path, manifest):
+    wanted = [c for c in FIELDS if c in manifest.columns]
+    types = {"key": pa.string(), "size": pa.int64(), "storage_class": pa.string(),
+             "last_modified_date": pa.timestamp("ms", tz="UTC"), "is_latest": pa.bool_(), "is_delete_marker": pa.bool_()}
+    reader = pyarrow.csv.open_csv(
+        pa.input_stream(str(path), compression="gzip" if str(path).endswith(".gz") else None),
+        read_options=pyarrow.csv.ReadOptions(column_names=manifest.columns, block_size=CSV_BLOCK_SIZE),
+        convert_options=pyarrow.csv.ConvertOptions(
+            include_columns=wanted, column_types={c: types[c] for c in wanted}, quoted_strings_can_be_null=False),
+    )
+    for batch in reader:
+        # CSV inventories URL-encode keys
+        keys = pc.replace_substring_regex(batch.column("key"), pattern=r"%2[Ff]", replacement="/")
+        yield batch, keys
+
+
+def _orc_batches(path):
+    orc = pyarrow.orc.ORCFile(str(path))
+    wanted = [c for c in FIELDS if c in orc.schema.names]
+    for stripe in range(orc.nstripes):
+        batch = orc.read_stripe(stripe, columns=wanted)
+        yield batch, batch.column("key")
+
+
+def _parquet_batches(path):
+    parquet = pyarrow.parquet.ParquetFile(str(path))
+    wanted = [c for c in FIELDS if c in parquet.schema_arrow.names]
+    for batch in parquet.iter_batches(batch_size=BATCH_ROWS, columns=wanted):
+        yield batch, batch.column("key")
+
+
+def read_inventory_file(path, manifest, prefix=""):
+    """Yield Tables of (key, size, storage_class, last_modified) for the current objects in one data file."""
+    require_pyarrow()
+    if manifest.file_format == "CSV":
+        batches = _csv_batches(path, manifest)
+    elif manifest.file_format == "ORC":
+        batches = _orc_batches(path)
+    else:
+        batches = _parquet_batches(path)
+
+    for batch, keys in batches:
+        names = batch.schema.names
+        mask = None
+        # versioned inventories list every version; keep the current, non-deleted ones
+        if "is_latest" in names:
+            mask = pc.fill_null(batch.column("is_latest"), True)
+        if "is_delete_marker" in names:
+            live = pc.invert(pc.fill_null(batch.column("is_delete_marker"), False))
+            mask = live if mask is None else pc.and_(mask, live)
+        if prefix:
+            under = pc.starts_with(keys, urllib.parse.quote_plus(prefix, safe="/") if manifest.file_format == "CSV" else prefix)
+            mask = under if mask is None else pc.and_(mask, under)
+        table = pa.table({
+            "key": keys,
+            "size": pc.fill_null(batch.column("size"), 0) if "size" in names else pa.array(np.zeros(len(batch), np.int64)),
+            "storage_class": (pc.fill_null(batch.column("storage_class"), "STANDARD") if "storage_class" in names
+                              else pa.array(["STANDARD"] * len(batch))),
+            "last_modified": (pc.cast(batch.column("last_modified_date"), pa.timestamp("ms", tz="UTC"), safe=False)
+                              if "last_modified_date" in names else pa.nulls(len(batch), pa.timestamp("ms", tz="UTC"))),
+        })
+        yield table.filter(mask) if mask is not None else table
+
+
+def objects_table(objects):
+    """A list_objects_v2 page's Contents as a Table with the inventory columns."""
+    require_pyarrow()
+    return pa.table({
+        "key": pa.array([o['Key'] for o in objects], pa.string()),
+        "size": pa.array([o['Size'] for o in objects], pa.int64()),
+        "storage_class": pa.array([o.get('StorageClass', 'STANDARD') for o in objects], pa.string()),
+        "last_modified": pa.array([o['LastModified'] for o in objects], pa.timestamp("ms", tz="UTC")),
+    })
+
+# =============== SUMMARIES
+
+
+class Summary:
+    """Object count and total size per key prefix (down to `depth` levels), storage class and age."""
+
+    def __init__(self, depth=1, now=None, url_encoded=False):
+        self.depth = depth
+        self.now = now or datetime.datetime.now(datetime.timezone.utc)
+        self.url_encoded = url_encoded
+        self.prefixes = collections.defaultdict(lambda: [0, 0])
+        self.storage_classes = collections.defaultdict(lambda: [0, 0])
+        self.age_counts = np.zeros(len(AGE_BUCKETS), dtype=np.int64)
+        self.age_bytes = np.zeros(len(AGE_BUCKETS), dtype=np.int64)
+        self.objects = 0
+        self.bytes = 0
+
+    def _group(self, groups, keys, sizes):
+        table = pa.table({"group": keys, "size": sizes})
+        for row in table.group_by("group").aggregate([("size", "sum"), ("size", "count")]).to_pylist():
+            entry = groups[row["group"]]
+            entry[0] += row["size_count"]
+            entry[1] += row["size_sum"] or 0
+
+    def add(self, table):
+        """Add a Table of (key, size, storage_class, last_modified) rows."""
+        if not len(table):
+            return
+        sizes = table.column("size")
+        # the first `depth` "/"-separated levels of each key ("" for keys above that)
+        prefixes = pc.replace_substring_regex(table.column("key"), pattern=rf"(?s)^((?:[^/]*/){{0,{self.depth}}}).*$",
+                                              replacement=r"\1")
+        self._group(self.prefixes, prefixes, sizes)
+        self._group(self.storage_classes, table.column("storage_class"), sizes)
+
+        now_ms = int(self.now.timestamp() * 1000)
+        # objects without a modification date count as new
+        modified = pc.fill_null(table.column("last_modified").cast(pa.int64()), now_ms).to_numpy(zero_copy_only=False)
+        size_values = sizes.to_numpy(zero_copy_only=False)
+        bounds = [days * MS_PER_DAY for _, days in AGE_BUCKETS[:-1]]
+        buckets = np.digitize(now_ms - modified, bounds)
+        self.age_counts += np.bincount(buckets, minlength=len(AGE_BUCKETS))
+        self.age_bytes += np.bincount(buckets, weights=size_values, minlength=len(AGE_BUCKETS)).astype(np.int64)
+        self.objects += len(table)
+        self.bytes += int(size_values.sum())
+
+    def merge(self, other):
+        """Fold another Summary (e.g. from another data file) into this one."""
+        for mine, theirs in ((self.prefixes, other.prefixes), (self.storage_classes, other.storage_classes)):
+            for group, (count, size) in theirs.items():
+                mine[group][0] += count
+                mine[group][1] += size
+        self.age_counts += other.age_counts
+        self.age_bytes += other.age_bytes
+        self.objects += other.objects
+        self.bytes += other.bytes
+
+    def rows(self):
+        """Yield one record per group: Dimension, Value, Objects, Size."""
+        yield {"Dimension": "total", "Value": "", "Objects": self.objects, "Size": self.bytes}
+        prefixes = collections.defaultdict(lambda: [0, 0])
+        for prefix, (count, size) in self.prefixes.items():
+            # decoding after grouping touches each prefix once rather than every key
+            label = urllib.parse.unquote_plus(prefix) if self.url_encoded else prefix
+            prefixes[label][0] += count
+            prefixes[label][1] += size
+        for prefix, (count, size) in sorted(prefixes.items()):
+            yield {"Dimension": "prefix", "Value": prefix or "/", "Objects": count, "Size": size}
+        for storage_class, (count, size) in sorted(self.storage_classes.items()):
+            yield {"Dimension": "storage_class", "Value": storage_class, "Objects": count, "Size": size}
+        for (label, _), count, size in zip(AGE_BUCKETS, self.age_counts, self.age_bytes):
+            yield {"Dimension": "age", "Value": label, "Objects": int(count), "Size": int(size)}
@@ -0,0 +1,110 @@
+# commands/config/clients.py
+"""
+Process-wide cache of API clients, HTTP sessions and disk caches.
+
+Building a boto3 client resolves credentials and loads the service model,
+and every new requests.Session or Docker client opens its own connections.
+Commands get them from here instead, so commands run one after another in
+the same process (`dev-cli batch`) reuse them:
+
+    s3 = clients.aws("s3", region)
+    docker_client = clients.docker(host)
+    session = clients.http_session(pool_size=8)
+
+The clients are safe to share between threads; creating them is serialised
+because boto3 sessions are not. Everything is closed when the process exits.
+"""
+
+import atexit
+import os
+import threading
+
+# =============== CACHE
+
+_lock = threading.Lock()
+_shared = {}
+# one lock per key being created, so a slow client (e.g. an unreachable Docker host) only blocks its own key
+_creating = {}
+# boto3's default session is not thread-safe
+_boto_lock = threading.Lock()
+
+
+def shared(key, factory):
+    """Return the object cached under `key`, creating it with `factory()` on first use."""
+    with _lock:
+        if key in _shared:
+            return _shared[key]
+        key_lock = _creating.setdefault(key, threading.Lock())
+    with key_lock:
+        with _lock:
+            if key in _shared:
+                return _shared[key]
+        # a failing factory caches nothing, so the next caller tries again
+        value = factory()
+        with _lock:
+            _shared[key] = value
+            _creating.pop(key, None)
+        return value
+
+
+def close_all():
+    """Close every cached object that can be closed and empty the cache."""
+    with _lock:
+        values = list(_shared.values())
+        _shared.clear()
+    for value in values:
+        close = getattr(value, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+
+atexit.register(close_all)
+
+# =============== CLIENTS
+
+
+def aws(service, region=None, max_pool_connections=None):
+    """A boto3 client for `service` in `region` (the configured default if None)."""
+    def create():
+        import boto3
+        import botocore.config
+
+        config = botocore.config.Config(max_pool_connections=max_pool_connections) if max_pool_connections else None
+        with _boto_lock:
+            return boto3.client(service, region_name=region, config=config)
+
+    return shared(("aws", service, region, max_pool_connections), create)
+
+
+def docker(host=None):
+    """A Docker client for `host`, or for the daemon the environment points at (DOCKER_HOST)."""
+    def create():
+        import docker
+
+        return docker.DockerClient(base_url=host) if host else docker.from_env()
+
+    return shared(("docker", host or os.environ.get("DOCKER_HOST")), create)
+
+
+def http_session(pool_size=10):
+    """A requests.Session whose connection pool holds `pool_size` connections per host."""
+    def create():
+        import requests
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    return shared(("http", pool_size), create)
+
+
+def disk_cache(path, ttl=None, max_entries=100_000):
+    """A DiskCache on `path`; callers must not close it."""
+    from commands.config.disk_cache import DiskCache
+
+    return shared(("disk_cache", str(path), ttl, max_entries), lambda: DiskCache(path, ttl=ttl, max_entries=max_entries))
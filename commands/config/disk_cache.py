@@ -0,0 +1,123 @@
+# commands/config/disk_cache.py
+"""
+Single-file, SQLite-backed key/value cache shared by commands that want to
+avoid re-fetching slow or rate-limited API responses.
+
+Values are stored as JSON. Entries older than the TTL are treated as misses,
+and once the cache grows past `max_entries` the least recently used entries
+are evicted.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+# sqlite limits the number of bound parameters per statement
+MAX_PARAMS_PER_QUERY = 500
+
+
+class DiskCache:
+    """A persistent key/value cache with TTL and LRU eviction."""
+
+    def __init__(self, path, ttl=None, max_entries=100_000):
+        self.path = str(path)
+        # default maximum age of an entry in seconds (None = never expires)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+
+    # =============== READS
+
+    def get_many(self, keys, max_age=None):
+        """Return a dict of the fresh entries found for `keys`; misses are left out."""
+        keys = list(dict.fromkeys(keys))
+        max_age = self.ttl if max_age is None else max_age
+        now = time.time()
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), MAX_PARAMS_PER_QUERY):
+                chunk = keys[i:i + MAX_PARAMS_PER_QUERY]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value, stored_at FROM cache WHERE key IN ({placeholders})", chunk
+                )
+                for key, value, stored_at in rows:
+                    if max_age is None or now - stored_at <= max_age:
+                        found[key] = json.loads(value)
+            # record the hits so eviction drops the least recently used entries first
+            if found:
+                self._conn.executemany(
+                    "UPDATE cache SET accessed_at = ? WHERE key = ?", [(now, key) for key in found]
+                )
+        return found
+
+    def get(self, key, max_age=None):
+        """Return the cached value for `key`, or None on a miss."""
+        return self.get_many([key], max_age).get(key)
+
+    # =============== WRITES
+
+    def set_many(self, items):
+        """Store a dict of key -> JSON-serialisable value."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, json.dumps(value), now, now) for key, value in items.items()]
+        # the connection context commits, or rolls back if a statement fails, so a failed
+        # write never leaves the transaction open for the next one
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)", rows)
+            self._evict(now)
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        with self._lock:
+            for i in range(0, len(keys), MAX_PARAMS_PER_QUERY):
+                chunk = keys[i:i + MAX_PARAMS_PER_QUERY]
+                placeholders = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM cache WHERE key IN ({placeholders})", chunk)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def _evict(self, now):
+        """Drop expired entries, then the least recently used ones above the size cap."""
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM cache WHERE stored_at < ?", (now - self.ttl,))
+        if self.max_entries is not None:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,294 @@
+# commands/config/instrumentation.py
+"""
+Opt-in timing instrumentation for dev-cli runs.
+
+When enabled from the root CLI (--timings / --timings-file), this records:
+    - import time per command module (recorded by dev_cli.py at load time)
+    - boto3 client creation time (includes credential and model resolution)
+    - per-call latency, retry and error counts for every AWS API call,
+      using botocore's before-call / after-call event hooks
+    - per-request latency and retry counts for HTTP and Docker Engine calls,
+      by wrapping requests.Session.send (the Docker SDK is built on requests),
+      keyed by route template so resource IDs don't become separate operations
+
+Recording is in-memory only; the summary is written once at the end of the run.
+Other in-process consumers (e.g. the metrics layer) can subscribe to the same
+hooks with add_listener().
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# =============== RECORDER
+
+# dev_cli.py imports this module first, so this approximates the start of the run
+process_started = time.perf_counter()
+
+# botocore error codes that mean the call was throttled
+THROTTLE_CODES = {
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottled",
+    "RequestThrottledException", "TooManyRequestsException", "SlowDown",
+    "RequestLimitExceeded", "ProvisionedThroughputExceededException",
+}
+
+
+class CallStats:
+    __slots__ = ("calls", "total", "max", "retries", "errors", "throttles")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.retries = 0
+        self.errors = 0
+        self.throttles = 0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total * 1000 / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "retries": self.retries,
+            "errors": self.errors,
+            "throttles": self.throttles,
+        }
+
+
+class Timings:
+    """Thread-safe, in-memory aggregate of timed calls keyed by (kind, operation)."""
+
+    def __init__(self):
+        self.started = process_started
+        self.imports = {}
+        self.calls = defaultdict(CallStats)
+        self._lock = threading.Lock()
+
+    def record(self, kind, operation, elapsed, retries=0, error=None, throttled=False):
+        with self._lock:
+            stats = self.calls[(kind, operation)]
+            stats.calls += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.retries += retries
+            stats.errors += 1 if error else 0
+            stats.throttles += 1 if throttled else 0
+
+    def summary(self):
+        with self._lock:
+            calls = [
+                {"kind": kind, "operation": operation, **stats.as_dict()}
+                for (kind, operation), stats in sorted(self.calls.items())
+            ]
+        return {
+            "wall_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "imports_ms": {name: round(seconds * 1000, 3) for name, seconds in self.imports.items()},
+            "calls": calls,
+        }
+
+
+# process-wide recorder; None until instrumentation is enabled
+timings = None
+# import times are measured before the CLI parses its options, so keep them here
+import_times = {}
+# callables notified of every timed call: fn(kind, operation, elapsed, retries, error, throttled)
+listeners = []
+_hooks_installed = False
+
+
+def _active():
+    return timings is not None or bool(listeners)
+
+
+def _record(kind, operation, elapsed, retries=0, error=None, throttled=False):
+    if timings is not None:
+        timings.record(kind, operation, elapsed, retries, error, throttled)
+    for listener in listeners:
+        listener(kind, operation, elapsed, retries, error, throttled)
+
+# =============== BOTO3 / BOTOCORE HOOKS
+
+
+def _before_call(context=None, **kwargs):
+    if context is not None:
+        context["dev_cli_started"] = time.perf_counter()
+
+
+def _after_call(http_response=None, parsed=None, model=None, context=None, **kwargs):
+    started = (context or {}).get("dev_cli_started")
+    if started is None or not _active():
+        return
+    parsed = parsed or {}
+    error_code = parsed.get("Error", {}).get("Code")
+    retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+    operation = f"{model.service_model.service_name}.{model.name}"
+    _record("aws", operation, time.perf_counter() - started, retries,
+            error_code, error_code in THROTTLE_CODES)
+
+
+def _after_call_error(exception=None, context=None, event_name=None, **kwargs):
+    started = (context or {}).get("dev_cli_started")
+    if started is None or not _active():
+        return
+    # event name is after-call-error.<service-id>.<operation>
+    _, service, operation = event_name.split(".", 2)
+    _record("aws", f"{service}.{operation}", time.perf_counter() - started,
+            error=type(exception).__name__)
+
+
+def install_boto_hooks():
+    """Register timing hooks on the default boto3 session and time client creation."""
+    import boto3
+    import boto3.session
+
+    session = boto3._get_default_session()
+    session.events.register("before-call", _before_call)
+    session.events.register("after-call", _after_call)
+    session.events.register("after-call-error", _after_call_error)
+
+    original_client = boto3.session.Session.client
+    if getattr(original_client, "dev_cli_timed", False):
+        return
+
+    def client(self, service_name, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original_client(self, service_name, *args, **kwargs)
+        finally:
+            if timings is not None:
+                timings.record("aws", f"{service_name}.<create-client>", time.perf_counter() - started)
+
+    client.dev_cli_timed = True
+    boto3.session.Session.client = client
+
+# =============== REQUESTS / DOCKER HOOKS
+
+# Docker Engine API paths embed resource IDs and names; they are reported as
+# route templates (/containers/{id}/json) so every container doesn't get its own operation
+DOCKER_VERSION_PREFIX = re.compile(r"^/v\d+(\.\d+)?(?=/)")
+# collection-level endpoints, e.g. /containers/json, /images/prune
+DOCKER_COLLECTION_ACTIONS = {"json", "create", "prune", "search", "load", "get", "build"}
+# image names may contain "/", so the action of an image route is its last segment
+DOCKER_IMAGE_ACTIONS = {"json", "history", "push", "tag", "get"}
+# path segments of plain HTTP APIs that look like IDs: numbers, long hex strings and UUIDs
+ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{12,}|[0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12})$")
+
+
+def docker_route(path):
+    """The route template of a Docker Engine API path, without the API version."""
+    segments = DOCKER_VERSION_PREFIX.sub("", path).strip("/").split("/")
+    if len(segments) < 2 or (len(segments) == 2 and segments[1] in DOCKER_COLLECTION_ACTIONS):
+        return "/" + "/".join(segments)
+    collection = segments[0]
+    if collection in ("images", "distribution"):
+        action = segments[-1] if len(segments) > 2 and segments[-1] in DOCKER_IMAGE_ACTIONS else None
+        return f"/{collection}/{{id}}" + (f"/{action}" if action else "")
+    return "/".join([f"/{collection}", "{id}"] + segments[2:])
+
+
+def http_route(path):
+    """`path` with the segments that look like IDs replaced by {id}."""
+    return "/".join("{id}" if ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+def install_requests_hooks():
+    """Time every requests.Session.send, which also covers the Docker SDK."""
+    import requests
+
+    original_send = requests.Session.send
+    if getattr(original_send, "dev_cli_timed", False):
+        return
+
+    def send(self, request, **kwargs):
+        started = time.perf_counter()
+        error = None
+        response = None
+        try:
+            response = original_send(self, request, **kwargs)
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            if _active():
+                url = requests.utils.urlparse(request.url)
+                kind = "docker" if url.scheme.startswith("http+") else "http"
+                target = docker_route(url.path) if kind == "docker" else f"{url.netloc}{http_route(url.path)}"
+                retries = 0
+                status = getattr(response, "status_code", None)
+                raw_retries = getattr(getattr(response, "raw", None), "retries", None)
+                if raw_retries is not None:
+                    retries = len(raw_retries.history)
+                if status is not None and status >= 400:
+                    error = error or str(status)
+                _record(kind, f"{request.method} {target}", time.perf_counter() - started,
+                        retries, error, status == 429)
+
+    send.dev_cli_timed = True
+    requests.Session.send = send
+
+# =============== ENABLE / REPORT
+
+
+def install_hooks():
+    """Install the SDK hooks once per process."""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+    for install in (install_boto_hooks, install_requests_hooks):
+        try:
+            install()
+        # the optional SDKs may not be installed
+        except ImportError:
+            pass
+
+
+def enable():
+    """Start a fresh timings recording."""
+    global timings
+    timings = Timings()
+    timings.imports.update(import_times)
+    install_hooks()
+    return timings
+
+
+def add_listener(listener):
+    """Subscribe `listener` to every timed call."""
+    if listener not in listeners:
+        listeners.append(listener)
+    install_hooks()
+
+
+def format_summary(summary):
+    """Render a summary as an aligned text table."""
+    lines = [f"dev-cli timings: wall {summary['wall_ms']:.1f} ms"]
+    if summary["imports_ms"]:
+        lines.append("imports:")
+        for name, ms in sorted(summary["imports_ms"].items(), key=lambda item: -item[1]):
+            lines.append(f"  {ms:10.1f} ms  {name}")
+    if summary["calls"]:
+        lines.append("calls:")
+        lines.append(f"  {'kind':<7} {'calls':>6} {'total ms':>10} {'avg ms':>9} {'max ms':>9} "
+                     f"{'retries':>7} {'errors':>6}  operation")
+        for call in sorted(summary["calls"], key=lambda c: -c["total_ms"]):
+            lines.append(f"  {call['kind']:<7} {call['calls']:>6} {call['total_ms']:>10.1f} {call['avg_ms']:>9.1f} "
+                         f"{call['max_ms']:>9.1f} {call['retries']:>7} {call['errors']:>6}  {call['operation']}")
+    return "\n".join(lines) + "\n"
+
+
+def report(to_stderr=True, path=None):
+    """Write the summary to stderr and/or a JSON file."""
+    if timings is None:
+        return
+    summary = timings.summary()
+    if path:
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
+    if to_stderr:
+        sys.stderr.write(format_summary(summary))
+        sys.stderr.flush()
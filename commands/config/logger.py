@@ -1,15 +1,159 @@
-
 # commands/config/logger.py
+"""
+Single logging setup for every dev-cli command module.
+
+Modules get their logger with `get_logger(__name__)` instead of calling
+logging.basicConfig themselves. Records are handed to a QueueHandler and
+written to stderr by a background QueueListener, so slow terminals or pipes
+don't block the command. Use lazy %-style arguments, e.g.
+`logger.info("Deleted %d objects", count)`, so messages below the active
+level are never formatted.
+
+Bulk data (listings, query results) should be written to stdout directly,
+not logged.
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
 
 # =============== LOGGING SETUP
 
-# configure basic logging settings
-logging.basicConfig(
-    # set default log level to INFO
-    level=logging.INFO,
-    # set the log message format
-    format="%(levelname)s: %(message)s."
-)
-# create a logger instance for this module
-logger = logging.getLogger(__name__)
\ No newline at end of file
+LOG_FORMAT = "%(levelname)s: %(message)s."
+LOG_FORMATS = ["text", "json"]
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+_listener = None
+# (level, format, stream) the listener was started with
+_config = None
+# serialises (re)configuration and flushes, which commands run in parallel may do at once
+_lock = threading.RLock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format each record as one JSON object per line."""
+
+    def format(self, record):
+        payload = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def setup_logging(level=None, fmt=None, stream=None):
+    """
+    Configure the root logger to write through a queue to `stream` (stderr by default).
+    Safe to call again, e.g. once the root CLI has parsed --log-level/--log-format;
+    calling it again with the same settings is a no-op.
+    Defaults come from DEV_CLI_LOG_LEVEL and DEV_CLI_LOG_FORMAT.
+    """
+    global _listener, _config
+    level = level or os.environ.get("DEV_CLI_LOG_LEVEL", "INFO")
+    fmt = (fmt or os.environ.get("DEV_CLI_LOG_FORMAT", "text")).lower()
+    if isinstance(level, str):
+        level = getattr(logging, level.upper(), logging.INFO)
+    stream = stream or sys.stderr
+
+    with _lock:
+        # commands run in one process (dev-cli batch/serve) each configure logging the same way
+        if _config == (level, fmt, stream) and (_listener is not None or getattr(stream, "routed", False)):
+            return
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(LOG_FORMAT))
+
+        stop_logging()
+        root = logging.getLogger()
+        root.setLevel(level)
+        _config = (level, fmt, stream)
+        if getattr(stream, "routed", False):
+            # a per-command stream (commands/config/streams.py) has to be resolved
+            # in the thread that logs, not in the listener's thread
+            root.handlers = [handler]
+            return
+        log_queue = queue.SimpleQueue()
+        root.handlers = [logging.handlers.QueueHandler(log_queue)]
+        _listener = logging.handlers.QueueListener(log_queue, handler)
+        _listener.start()
+
+
+def stop_logging():
+    """Flush queued records and stop the background listener."""
+    global _listener, _config
+    with _lock:
+        _config = None
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def flush_logging():
+    """Block until every queued record has been written (e.g. at the end of a command)."""
+    with _lock:
+        if _listener is not None:
+            # stopping drains the queue; the listener can then be restarted on the same queue
+            _listener.stop()
+            _listener.start()
+
+
+def get_logger(name):
+    """Return a logger for `name`, setting up logging with defaults on first use."""
+    if _config is None:
+        setup_logging()
+    logger = logging.getLogger(name)
+    if type(logger) is logging.Logger:
+        # command module loggers honour command_level()
+        logger.__class__ = CommandLogger
+    return logger
+
+# =============== PER-COMMAND LEVELS
+
+# levels set by a command group's own --log-level, {logger name: level}. They are kept in a
+# context variable rather than on the logger, so they end with the command and commands
+# sharing a process (dev-cli batch/serve) don't change each other's levels
+_command_levels = contextvars.ContextVar("dev_cli_command_levels", default={})
+
+
+class CommandLogger(logging.Logger):
+    """Logger that uses the level command_level() set for the current context, if any."""
+
+    def isEnabledFor(self, level):
+        override = _command_levels.get().get(self.name)
+        if override is not None:
+            return level >= override
+        return super().isEnabledFor(level)
+
+
+@contextlib.contextmanager
+def command_level(logger, level):
+    """
+    Log through `logger` at `level` (a name or number) until the block exits;
+    None keeps the dev-cli --log-level. Groups use it as a context resource:
+
+        click.get_current_context().with_resource(command_level(logger, log_level))
+    """
+    if level is None:
+        yield
+        return
+    if isinstance(level, str):
+        level = getattr(logging, level.upper(), logging.INFO)
+    token = _command_levels.set({**_command_levels.get(), logger.name: level})
+    try:
+        yield
+    finally:
+        _command_levels.reset(token)
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,239 @@
+# commands/config/metrics.py
+"""
+In-process metrics with Prometheus textfile-collector export.
+
+Commands record into module-level counters, gauges and histograms; recording
+only updates in-memory numbers, so it is cheap enough for hot loops. Bind
+labels once outside a loop for the cheapest path:
+
+    listed = S3_OBJECTS_LISTED.labels(bucket=bucket_name)
+    for obj in page["Contents"]:
+        listed.inc()
+
+When the root CLI is given --metrics-file (or DEV_CLI_METRICS_FILE), the
+registry is rendered in the Prometheus text format and written atomically at
+the end of the run, ready for node_exporter's textfile collector.
+"""
+
+import math
+import os
+import tempfile
+import threading
+
+# =============== METRIC TYPES
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Child:
+    """A single labelled time series of a counter or gauge."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        return _Child()
+
+    def labels(self, **labels):
+        """Return the series for these label values (bind once, reuse in loops)."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def clear(self):
+        with self._lock:
+            self._children = {}
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield "", tuple(zip(self.labelnames, key)), child.value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        self.labels(**labels).inc(amount)
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        self.labels(**labels).set(value)
+
+    def inc(self, amount=1, **labels):
+        self.labels(**labels).inc(amount)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(child.buckets, child.counts):
+                cumulative += count
+                yield "_bucket", labels + (("le", _format_value(float(bound))),), cumulative
+            yield "_bucket", labels + (("le", "+Inf"),), child.count
+            yield "_sum", labels, child.sum
+            yield "_count", labels, child.count
+
+# =============== REGISTRY
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self):
+        """Render every metric that has samples in the Prometheus text format."""
+        lines = []
+        for metric in self._metrics.values():
+            if metric._children:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Write the registry to `path` atomically (temp file + rename in the same directory)."""
+        path = os.path.abspath(path)
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".dev-cli-metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+# =============== SHARED METRICS
+
+COMMAND_DURATION = histogram(
+    "dev_cli_command_duration_seconds", "Wall time of a dev-cli command.", ("command", "status"))
+LAST_RUN = gauge(
+    "dev_cli_last_run_timestamp_seconds", "Unix time the command last finished.", ("command", "status"))
+API_CALLS = counter(
+    "dev_cli_api_calls_total", "API calls made, by kind (aws/http/docker) and operation.", ("kind", "operation"))
+API_ERRORS = counter(
+    "dev_cli_api_errors_total", "API calls that failed.", ("kind", "operation"))
+API_THROTTLES = counter(
+    "dev_cli_api_throttles_total", "API calls rejected by throttling.", ("kind", "operation"))
+API_RETRIES = counter(
+    "dev_cli_api_retries_total", "Retry attempts made by the SDKs.", ("kind", "operation"))
+API_DURATION = histogram(
+    "dev_cli_api_call_duration_seconds", "Latency of API calls.", ("kind",))
+
+
+def record_api_call(kind, operation, elapsed, retries=0, error=None, throttled=False):
+    """Instrumentation listener: fold one timed API call into the shared metrics."""
+    API_CALLS.inc(kind=kind, operation=operation)
+    API_DURATION.observe(elapsed, kind=kind)
+    if retries:
+        API_RETRIES.inc(retries, kind=kind, operation=operation)
+    if error:
+        API_ERRORS.inc(kind=kind, operation=operation)
+    if throttled:
+        API_THROTTLES.inc(kind=kind, operation=operation)
@@ -0,0 +1,236 @@
+# commands/config/output.py
+"""
+Shared output layer for commands that print records (listings, lookups).
+
+Commands describe each record as a dict and hand them to a writer one at a
+time, so nothing has to be collected before the first line is printed:
+
+    with output.open_writer(["Key", "Size"]) as out:
+        for obj in iter_objects(...):
+            out.write({"Key": obj["Key"], "Size": obj["Size"]})
+
+The format comes from the root `--output` option (or DEV_CLI_OUTPUT):
+
+    table   aligned columns, sized from the first rows (the default)
+    json    a JSON array, written element by element
+    ndjson  one JSON object per line
+    csv     a header row, then one row per record
+
+Records go to stdout through its normal buffering; logs stay on stderr.
+When the reader goes away (e.g. `dev-cli aws s3 ls ... | head`) the writer
+raises OutputClosed, which the root CLI turns into a quiet exit.
+"""
+
+import csv
+import json
+import os
+import sys
+
+import click
+from rich.cells import cell_len, set_cell_size
+from rich.console import Console
+
+# =============== SETTINGS
+
+FORMATS = ["table", "json", "ndjson", "csv"]
+DEFAULT_FORMAT = "table"
+# key the root CLI stores the selected --output format under in ctx.meta
+FORMAT_KEY = "dev_cli.output"
+# rows the table writer holds back to size its columns before printing anything
+TABLE_SAMPLE_ROWS = 100
+MAX_COLUMN_WIDTH = 60
+MIN_COLUMN_WIDTH = 6
+COLUMN_GAP = "  "
+
+
+class OutputClosed(BaseException):
+    """
+    Raised when stdout is closed by the reader. Derives from BaseException,
+    like KeyboardInterrupt, so the commands' `except Exception` handlers
+    don't log it as a failure.
+    """
+
+
+def selected_format(fmt=None, default=DEFAULT_FORMAT):
+    """Return `fmt`, else the root --output format, else the command's default."""
+    if fmt:
+        return fmt
+    ctx = click.get_current_context(silent=True)
+    return (ctx.find_root().meta.get(FORMAT_KEY) if ctx else None) or default
+
+
+def silence_stdout():
+    """Point stdout at /dev/null so the interpreter's final flush doesn't fail on the closed pipe."""
+    try:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+    except (AttributeError, OSError, ValueError):
+        # stdout is not a real file (e.g. captured in-process)
+        pass
+
+# =============== WRITERS
+
+
+class Writer:
+    """Base class: write records (dicts) to `stream` incrementally."""
+
+    def __init__(self, columns=None, stream=None):
+        self.columns = list(columns) if columns else None
+        self.stream = stream or sys.stdout
+        self.count = 0
+
+    def _emit(self, text):
+        try:
+            self.stream.write(text)
+        except BrokenPipeError:
+            silence_stdout()
+            raise OutputClosed() from None
+
+    def write(self, row):
+        if self.columns is None:
+            self.columns = list(row)
+        self._write(row)
+        self.count += 1
+
+    def write_all(self, rows):
+        for row in rows:
+            self.write(row)
+        return self
+
+    def _write(self, row):
+        raise NotImplementedError
+
+    def flush(self):
+        """Print everything written so far (for commands that write records over time, e.g. watch modes)."""
+        try:
+            self.stream.flush()
+        except BrokenPipeError:
+            silence_stdout()
+            raise OutputClosed() from None
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # a failed command still flushes what it produced; a closed pipe has nothing to flush to
+        if exc_type is not OutputClosed:
+            self.close()
+        return False
+
+
+class NdjsonWriter(Writer):
+    def _write(self, row):
+        self._emit(json.dumps(row, default=str) + "\n")
+
+
+class JsonWriter(Writer):
+    """A JSON array written one element per line, so it never has to be held in memory."""
+
+    def _write(self, row):
+        self._emit(("[\n    " if not self.count else ",\n    ") + json.dumps(row, default=str))
+
+    def close(self):
+        self._emit("\n]\n" if self.count else "[]\n")
+        super().close()
+
+
+class _Sink:
+    """File-like adapter so csv writes go through Writer._emit."""
+
+    def __init__(self, emit):
+        self.write = emit
+
+
+class CsvWriter(Writer):
+    def _write(self, row):
+        if not self.count:
+            self.writer = csv.DictWriter(_Sink(self._emit), fieldnames=self.columns, extrasaction="ignore")
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+
+class TableWriter(Writer):
+    """
+    Aligned columns. The first TABLE_SAMPLE_ROWS rows are held back to size
+    the columns, then every row is printed as soon as it is written. On a
+    terminal, text cells that don't fit are cut with an ellipsis.
+    """
+
+    def __init__(self, columns=None, stream=None):
+        super().__init__(columns, stream)
+        self.sample = []
+        self.widths = None
+        self.numeric = None
+        # `dev-cli serve` streams carry the client's terminal width
+        self.console = Console(file=self.stream, highlight=False, width=getattr(self.stream, "terminal_width", None))
+
+    def _cells(self, row):
+        return ["" if row.get(c) is None else str(row.get(c)) for c in self.columns]
+
+    def _layout(self):
+        cells = [self._cells(row) for row in self.sample]
+        self.widths = [min(MAX_COLUMN_WIDTH, max([cell_len(str(c))] + [cell_len(r[i]) for r in cells]))
+                       for i, c in enumerate(self.columns)]
+        # right-align columns whose sampled values are all numbers
+        self.numeric = [bool(self.sample) and all(isinstance(row.get(c), (int, float)) and not isinstance(row.get(c), bool)
+                                                 for row in self.sample if row.get(c) is not None)
+                        for c in self.columns]
+        if self.console.is_terminal:
+            # shrink the widest columns until the table fits the terminal
+            available = self.console.width - len(COLUMN_GAP) * (len(self.columns) - 1)
+            while sum(self.widths) > available and max(self.widths) > MIN_COLUMN_WIDTH:
+                widest = self.widths.index(max(self.widths))
+                self.widths[widest] -= 1
+        header = COLUMN_GAP.join(self._fit(str(c), i) for i, c in enumerate(self.columns)).rstrip()
+        try:
+            self.console.print(header, style="bold", markup=False, soft_wrap=True)
+        except BrokenPipeError:
+            silence_stdout()
+            raise OutputClosed() from None
+        for row in self.sample:
+            self._emit_row(row)
+        self.sample = None
+
+    def _fit(self, text, i):
+        width = self.widths[i]
+        size = cell_len(text)
+        if size > width:
+            # numbers, and anything not going to a terminal, overflow rather than lose data
+            if self.numeric[i] or not self.console.is_terminal:
+                return text
+            return set_cell_size(text, width - 1) + "…"
+        padding = " " * (width - size)
+        return padding + text if self.numeric[i] else text + padding
+
+    def _emit_row(self, row):
+        self._emit(COLUMN_GAP.join(self._fit(text, i) for i, text in enumerate(self._cells(row))).rstrip() + "\n")
+
+    def _write(self, row):
+        if self.widths is not None:
+            self._emit_row(row)
+            return
+        self.sample.append(row)
+        if len(self.sample) >= TABLE_SAMPLE_ROWS:
+            self._layout()
+
+    def flush(self):
+        # stop sampling: the rows so far decide the column widths
+        if self.widths is None and self.sample:
+            self._layout()
+        super().flush()
+
+
+WRITERS = {"table": TableWriter, "json": JsonWriter, "ndjson": NdjsonWriter, "csv": CsvWriter}
+
+
+def open_writer(columns=None, fmt=None, stream=None):
+    """
+    Return a writer for the selected format. `columns` fixes the table/CSV
+    columns and their order; without it they come from the first record.
+    JSON formats always write the whole record.
+    """
+    return WRITERS[selected_format(fmt)](columns, stream)
@@ -1,5 +1,5 @@
-
 # commands/config/paths.py
+import os
 import sys
 from pathlib import Path
 
@@ -11,3 +11,15 @@ current_dir = Path(__file__).resolve().parent
 parent_dir = current_dir.parent
 # Add root to import path
 sys.path.insert(0, (parent_dir))
+
+# =============== CACHE DIRECTORY
+
+def get_cache_dir(*parts):
+    """
+    Return the dev-cli cache directory (or a sub-directory of it), creating it if needed.
+    Defaults to ~/.cache/dev-cli and can be overridden with DEV_CLI_CACHE_DIR.
+    """
+    base = os.environ.get("DEV_CLI_CACHE_DIR") or Path.home() / ".cache" / "dev-cli"
+    path = Path(base).expanduser().joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
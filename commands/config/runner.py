@@ -0,0 +1,235 @@
+# commands/config/runner.py
+"""
+Bounded-concurrency task runner shared by the bulk commands.
+
+A Runner applies a function to many items with at most `concurrency` calls in
+flight, optionally at most `per_target` per target (e.g. per region or per
+Docker host), and streams the outcomes back as Result(item, value, error)
+tuples, in input order or as they complete. Items are pulled from the input
+lazily, so a paginated listing can feed uploads or deletes without being
+held in memory.
+
+Plain functions run on a thread pool; coroutine functions (async def) run as
+tasks on a shared asyncio event loop, under the same limits, ordering and
+fail_fast handling. Either way each task runs in a copy of the caller's
+context (contextvars). Ctrl-C cancels everything that has not started yet,
+and coroutine tasks that are still awaiting. With fail_fast, the first
+failure stops new work from being scheduled; results of tasks that were
+already running are still yielded.
+
+Commands add the shared options with @concurrency_options and finish with
+runner.finish("uploads"), which logs the aggregated failures and exits with
+status 1 if any task failed:
+
+    runner = Runner(concurrency, fail_fast, label=lambda f: f.name)
+    for result in runner.map(upload, files, ordered=False):
+        ...
+    runner.finish("uploads")
+"""
+
+import asyncio
+import collections
+import contextvars
+import threading
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, InvalidStateError, ThreadPoolExecutor, wait
+
+import click
+
+from commands.config.logger import get_logger
+
+logger = get_logger(__name__)
+
+# =============== SETTINGS
+
+DEFAULT_CONCURRENCY = 8
+# ordered mode holds at most this many results per worker while waiting on a slow earlier task
+WINDOW_PER_WORKER = 4
+# failures listed individually by finish(); the rest are only counted
+MAX_REPORTED_ERRORS = 10
+
+Result = collections.namedtuple("Result", ["item", "value", "error"])
+
+# =============== EXECUTORS
+
+
+class _LoopExecutor:
+    """
+    Run coroutine functions as tasks on the shared event loop, behind the part
+    of the Executor interface Runner uses. The loop thread starts on first use
+    and is shared by every Runner; each Runner's scheduling bounds how many of
+    its own tasks are in flight. Cancelling a returned future cancels its task.
+    """
+
+    loop = None
+    lock = threading.Lock()
+
+    @classmethod
+    def shared_loop(cls):
+        with cls.lock:
+            if cls.loop is None:
+                cls.loop = asyncio.new_event_loop()
+                threading.Thread(target=cls.loop.run_forever, name="dev-cli-runner-loop", daemon=True).start()
+            return cls.loop
+
+    def submit(self, run, func, *args):
+        """Start func(*args) as a task; `run` is the Context.run of the context it runs in."""
+        loop = self.shared_loop()
+        future = Future()
+
+        def start():
+            if future.cancelled():
+                return
+            # a task runs in a copy of the context current when it is created
+            task = run(lambda: loop.create_task(func(*args)))
+            task.add_done_callback(lambda _: _copy_outcome(task, future))
+            future.add_done_callback(lambda f: f.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+        loop.call_soon_threadsafe(start)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        # the loop is shared; Runner.map has already cancelled its unfinished futures
+        pass
+
+
+def _copy_outcome(task, future):
+    """Pass a finished task's result or exception on to the future Runner waits on."""
+    try:
+        if task.cancelled():
+            future.set_exception(CancelledError())
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+    except InvalidStateError:
+        # the future was cancelled from the runner's thread in the meantime
+        pass
+
+# =============== RUNNER
+
+
+class Runner:
+    """Apply a function to many items with bounded concurrency. See the module docstring."""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, fail_fast=False, per_target=None, target=None,
+                 label=str, format_error=str):
+        self.concurrency = max(1, concurrency)
+        self.fail_fast = fail_fast
+        # per_target limits apply to items sharing the same target(item) value
+        self.per_target = per_target
+        self.target = target
+        self.label = label
+        self.format_error = format_error
+        self.errors = []
+        self.succeeded = 0
+        self.stopped = False
+
+    def _take(self, pending, busy):
+        """Pop the first pending item whose target has a free slot."""
+        for i, entry in enumerate(pending):
+            if self.per_target is None or busy[entry[2]] < self.per_target:
+                del pending[i]
+                return entry
+        return None
+
+    def map(self, func, items, ordered=True):
+        """
+        Yield a Result for each item, in input order (ordered=True) or as tasks
+        complete. `func` may be a plain function or a coroutine function.
+        """
+        executor = (_LoopExecutor() if asyncio.iscoroutinefunction(func)
+                    else ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="dev-cli-runner"))
+        source = enumerate(items)
+        exhausted = False
+        window = self.concurrency * WINDOW_PER_WORKER
+        # (index, item, target) pulled from the source but waiting for a per-target slot
+        pending = collections.deque()
+        running = {}
+        busy = collections.Counter()
+        # finished results held back until everything before them is done (ordered mode)
+        finished = {}
+        pulled = yielded = next_index = 0
+        interrupted = False
+        try:
+            while True:
+                # start as many tasks as the global and per-target limits allow
+                while not self.stopped and len(running) < self.concurrency:
+                    entry = self._take(pending, busy)
+                    if entry is None:
+                        if exhausted or pulled - yielded >= window:
+                            break
+                        try:
+                            index, item = next(source)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        pulled += 1
+                        pending.append((index, item, self.target(item) if self.target else None))
+                        continue
+                    busy[entry[2]] += 1
+                    running[executor.submit(contextvars.copy_context().run, func, entry[1])] = entry
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, item, target = running.pop(future)
+                    busy[target] -= 1
+                    try:
+                        result = Result(item, future.result(), None)
+                        self.succeeded += 1
+                    except (Exception, CancelledError) as e:
+                        result = Result(item, None, e)
+                        self.errors.append(result)
+                        # stop scheduling; tasks already running still finish and are reported
+                        self.stopped = self.stopped or self.fail_fast
+                    if ordered:
+                        finished[index] = result
+                    else:
+                        yielded += 1
+                        yield result
+                while next_index in finished:
+                    yielded += 1
+                    yield finished.pop(next_index)
+                    next_index += 1
+            # after a --fail-fast stop, items waiting for a per-target slot never run, so results
+            # held back behind them would never become next in order; yield them in input order
+            for index in sorted(finished):
+                yield finished.pop(index)
+        except KeyboardInterrupt:
+            interrupted = True
+            logger.warning("Interrupted: cancelling %d queued tasks, %d already running will finish",
+                           len(pending), sum(not f.cancel() for f in running))
+            raise
+        finally:
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=not interrupted, cancel_futures=True)
+
+    def finish(self, what="tasks"):
+        """Log the aggregated failures and exit with status 1 if any task failed."""
+        if not self.errors:
+            return
+        total = self.succeeded + len(self.errors)
+        logger.error("%d of %d %s failed", len(self.errors), total, what)
+        for result in self.errors[:MAX_REPORTED_ERRORS]:
+            logger.error("  %s: %s", self.label(result.item), self.format_error(result.error))
+        if len(self.errors) > MAX_REPORTED_ERRORS:
+            logger.error("  ... and %d more", len(self.errors) - MAX_REPORTED_ERRORS)
+        if self.stopped:
+            logger.error("Stopped early because of --fail-fast; the remaining %s were not attempted", what)
+        raise click.exceptions.Exit(1)
+
+# =============== CLI OPTIONS
+
+
+def concurrency_options(default=DEFAULT_CONCURRENCY, what="operations", aliases=()):
+    """Add the shared --concurrency and --fail-fast options to a command."""
+    def decorator(func):
+        func = click.option("--fail-fast", is_flag=True,
+                            help="Stop at the first failure instead of finishing the rest and reporting every failure.")(func)
+        func = click.option("--concurrency", *aliases, "concurrency", type=click.IntRange(min=1), default=default,
+                            show_default=True, envvar="DEV_CLI_CONCURRENCY",
+                            help=f"Maximum number of {what} to run at once.")(func)
+        return func
+    return decorator
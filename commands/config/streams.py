@@ -0,0 +1,87 @@
+# commands/config/streams.py
+"""
+Per-command stdin/stdout/stderr for running several commands in one process
+(`dev-cli batch`, `dev-cli serve`).
+
+install() replaces sys.stdin, sys.stdout and sys.stderr with RoutedStream
+objects once. Each one forwards to the stream that redirect() has set for
+the current context, or to the original stream if none is set:
+
+    streams.install()
+    with streams.redirect(stdout=buffer):
+        run_command()    # everything it prints lands in `buffer`
+
+Routing uses context variables rather than thread-locals so that Runner
+worker threads, which run in a copy of the submitting context, write to the
+same place as the command that started them.
+"""
+
+import contextlib
+import contextvars
+import sys
+
+# =============== ROUTING
+
+NAMES = ("stdin", "stdout", "stderr")
+_targets = {name: contextvars.ContextVar(f"dev_cli_{name}", default=None) for name in NAMES}
+
+
+class RoutedStream:
+    """File-like object that forwards to the current context's stream for `name`."""
+
+    # lets logger.setup_logging() write from the emitting thread rather than through its queue
+    routed = True
+
+    def __init__(self, name, default):
+        self.name = name
+        self.default = default
+
+    def target(self):
+        return _targets[self.name].get() or self.default
+
+    # encoding is fixed so click, which caches a wrapper per stream object, never re-wraps a target
+    @property
+    def encoding(self):
+        return getattr(self.default, "encoding", None) or "utf-8"
+
+    def write(self, text):
+        return self.target().write(text)
+
+    def flush(self):
+        return self.target().flush()
+
+    def read(self, *args):
+        return self.target().read(*args)
+
+    def readline(self, *args):
+        return self.target().readline(*args)
+
+    def isatty(self):
+        return self.target().isatty()
+
+    def __iter__(self):
+        return iter(self.target())
+
+    def __getattr__(self, attr):
+        return getattr(self.target(), attr)
+
+
+def install():
+    """Replace sys.stdin/stdout/stderr with RoutedStreams (once)."""
+    for name in NAMES:
+        stream = getattr(sys, name)
+        if not isinstance(stream, RoutedStream):
+            setattr(sys, name, RoutedStream(name, stream))
+
+
+@contextlib.contextmanager
+def redirect(stdin=None, stdout=None, stderr=None):
+    """Route the given streams for the current context until the block exits."""
+    install()
+    tokens = [(_targets[name], _targets[name].set(stream))
+              for name, stream in zip(NAMES, (stdin, stdout, stderr)) if stream is not None]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
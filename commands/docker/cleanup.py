@@ -26,6 +26,10 @@ import sys
 from pathlib import Path
 import docker
 import logging
+from commands.config.logger import command_level, get_logger
+from commands.config import clients
+from commands.config import metrics
+from commands.config.runner import Runner, concurrency_options
 
 # =============== PATH SETUP
 
@@ -35,31 +39,78 @@ sys.path.insert(0, str(parent_dir))
 
 # =============== LOGGING SETUP
 
-logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s.")
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+# =============== METRICS
+
+PRUNED = metrics.counter(
+    "dev_cli_docker_pruned_total", "Docker resources removed by prune.", ("resource",))
+RECLAIMED_BYTES = metrics.counter(
+    "dev_cli_docker_reclaimed_bytes_total", "Disk space reclaimed by Docker prune.", ("resource",))
+PRUNE_CANDIDATES = metrics.gauge(
+    "dev_cli_docker_prune_candidates", "Resources a dry-run found that would be affected.", ("host", "resource"))
+
+
+def record_prune(resource_type, result):
+    """Fold a prune API response (e.g. {'ContainersDeleted': [...], 'SpaceReclaimed': N}) into metrics."""
+    result = result or {}
+    deleted = next((v for k, v in result.items() if k.endswith("Deleted")), None) or []
+    PRUNED.inc(len(deleted), resource=resource_type)
+    RECLAIMED_BYTES.inc(result.get("SpaceReclaimed") or 0, resource=resource_type)
+    return result
 
 # =============== DOCKER CLIENT
 
-def get_docker_client():
-    """Returns a Docker client instance, handling errors properly."""
+# the order resources are pruned in; containers go first so their images, volumes and networks become unused
+RESOURCE_TYPES = ("containers", "images", "volumes", "networks")
+
+
+def get_docker_client(host=None):
+    """Returns a Docker client for `host` (or the environment's daemon), handling errors properly."""
     try:
-        return docker.from_env()
+        # shared, so later commands in the same process reuse its connections
+        return clients.docker(host)
     except docker.errors.DockerException as e:
-        logger.error(f"Failed to initialise Docker client: {e}")
-        sys.exit(1)
+        # raised rather than exiting so one unreachable host doesn't stop the others
+        raise docker.errors.DockerException(f"Failed to initialise Docker client: {e}") from e
 
 # =============== CLI COMMANDS
 
-def docker_connection_checker():
+def docker_connection_checker(client, host=None):
     """Check if Docker Daemon is running before executing any command."""
-    client = get_docker_client()
     try:
         client.ping()
         return True
     except docker.errors.DockerException:
-        logger.error("Docker daemon is not running or not accessible.")
+        logger.error("%sDocker daemon is not running or not accessible.", host_prefix(host))
         return False
 
+
+def host_prefix(host):
+    return f"[{host}] " if host else ""
+
+
+def describe_error(e):
+    """Describe Docker SDK errors in the module's usual format."""
+    if isinstance(e, docker.errors.APIError):
+        return f"Docker API error: {e}"
+    if isinstance(e, docker.errors.DockerException):
+        return f"Docker exception: {e}"
+    return f"Error: {e}"
+
+
+def cleanup_runner(per_target=None):
+    """Runner configured from the cleanup group's --host/--concurrency/--fail-fast options."""
+    settings = click.get_current_context().meta.get("dev_cli.docker.cleanup", {})
+    return Runner(settings.get("concurrency", 1), settings.get("fail_fast", False), per_target=per_target,
+                  target=lambda task: task[0], label=lambda task: " ".join(filter(None, task)) or "local daemon",
+                  format_error=describe_error)
+
+
+def cleanup_hosts():
+    # None means the daemon from the environment (DOCKER_HOST or the local socket)
+    return click.get_current_context().meta.get("dev_cli.docker.cleanup", {}).get("hosts") or [None]
+
 # =============== CLICK GROUP
 
 @click.group(help="""A CLI tool to clean up unused Docker resources.
@@ -70,49 +121,55 @@ without actually deleting anything. Use --force to bypass confirmation.
 Example: 'dev-cli docker-cleanup a --dry-run'""")
 @click.option("--verbose", is_flag=True, help="Enable verbose output.")
 @click.option("--log-level", type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False),
-              default="INFO", help="Set the logging level.")
-def cleanup(verbose, log_level):
-    log_level = getattr(logging, log_level.upper(), logging.INFO)
-    logger.setLevel(log_level)
+              help="Set the logging level for this group (defaults to the dev-cli --log-level).")
+@click.option("-H", "--host", "hosts", multiple=True,
+              help="Docker daemon to clean up, e.g. 'ssh://user@host' or 'tcp://host:2376'. Can be repeated (default: DOCKER_HOST or the local daemon).")
+@concurrency_options(what="Docker hosts to clean up")
+def cleanup(verbose, log_level, hosts, concurrency, fail_fast):
+    # shared with the sub-commands through the context
+    click.get_current_context().meta["dev_cli.docker.cleanup"] = {
+        "hosts": list(hosts), "concurrency": concurrency, "fail_fast": fail_fast}
+    # only for this command, see commands/config/logger.py
+    click.get_current_context().with_resource(command_level(logger, log_level))
     if verbose:
         logger.debug("Verbose mode enabled.")
 
 # =============== CLI COMMANDS
 
+def list_resources(client, resource_type, filter_args=None):
+    """List the resources of one type that a prune would consider."""
+    if resource_type == "containers":
+        return client.containers.list(all=True, filters=filter_args)
+    return getattr(client, resource_type).list(filters=filter_args)
+
+
+def prune_on_host(host, resource_type, dry_run, filter_args=None):
+    """Dry-run or prune one resource type on one Docker host. Errors propagate to the runner."""
+    client = get_docker_client(host)
+    if not docker_connection_checker(client, host):
+        raise docker.errors.DockerException("Docker daemon is not running or not accessible.")
+    prefix = host_prefix(host)
+    if dry_run:
+        logger.info("%s[dry-run] Would remove all unused %s.", prefix, resource_type)
+        # Log which resources would be affected in dry-run mode
+        resources = list_resources(client, resource_type, filter_args)
+        logger.info("%s[dry-run] %s %s would be affected.", prefix, len(resources), resource_type)
+        PRUNE_CANDIDATES.set(len(resources), host=host or "default", resource=resource_type)
+    else:
+        logger.info("%sRemoving all unused %s.", prefix, resource_type)
+        record_prune(resource_type, getattr(client, resource_type).prune(filters=filter_args))
+        logger.info("%sAll unused %s removed successfully.", prefix, resource_type)
+
+
 def prune_resource(resource_type, dry_run, force, filter_args=None):
-    """Generalised function to prune Docker resources."""
-    if not docker_connection_checker():
+    """Generalised function to prune Docker resources on every selected host."""
+    if not dry_run and not force and not click.confirm(f"Are you sure you want to remove all unused {resource_type}?"):
         return
-    client = get_docker_client()
-    try:
-        prune_func = getattr(client, resource_type).prune
-        if dry_run:
-            logger.info(f"[dry-run] Would remove all unused {resource_type}.")
-            # Log which resources would be affected in dry-run mode
-            if resource_type == "containers":
-                resources = client.containers.list(
-                    all=True, filters=filter_args)
-            elif resource_type == "images":
-                resources = client.images.list(filters=filter_args)
-            elif resource_type == "volumes":
-                resources = client.volumes.list(filters=filter_args)
-            elif resource_type == "networks":
-                resources = client.networks.list(filters=filter_args)
-            logger.info(
-                f"[dry-run] {len(resources)} {resource_type} would be affected.")
-        else:
-            if not force and not click.confirm(f"Are you sure you want to remove all unused {resource_type}?"):
-                return
-            logger.info(f"Removing all unused {resource_type}.")
-            prune_func(filters=filter_args)
-            logger.info(f"All unused {resource_type} removed successfully.")
-
-    except docker.errors.APIError as e:
-        logger.error(f"Docker API error while pruning {resource_type}: {e}")
-    except docker.errors.DockerException as e:
-        logger.error(f"Docker exception while pruning {resource_type}: {e}")
-    except Exception as e:
-        logger.error(f"Error while pruning {resource_type}: {e}")
+    runner = cleanup_runner()
+    tasks = [(host, resource_type) for host in cleanup_hosts()]
+    for _ in runner.map(lambda task: prune_on_host(task[0], resource_type, dry_run, filter_args), tasks):
+        pass
+    runner.finish(f"{resource_type} prunes")
 
 
 @click.command("c", help="Remove all stopped containers. Use --dry-run to preview.")
@@ -149,34 +206,22 @@ def prune_networks(dry_run, force):
 @click.option("--force", is_flag=True, help="Skip confirmation prompts.")
 def prune_all(dry_run, force):
     """Prune all unused containers, images, volumes, and networks."""
-    if not docker_connection_checker():
+    if not dry_run and not force and not click.confirm("Are you sure you want to remove all unused Docker resources?"):
         return
-    client = get_docker_client()
-    try:
-        if dry_run:
-            logger.info("[dry-run] Would remove all unused Docker resources.")
-            # Log dry-run for all resources
-            containers = client.containers.list(all=True)
-            images = client.images.list()
-            volumes = client.volumes.list()
-            networks = client.networks.list()
-            logger.info(f"[dry-run] {len(containers)} containers, {len(images)} images, {len(volumes)} volumes, "
-                        f"{len(networks)} networks would be affected.")
-        else:
-            if not force and not click.confirm("Are you sure you want to remove all unused Docker resources?"):
-                return
-            logger.info("Removing all unused Docker resources.")
-            client.containers.prune()
-            client.images.prune()
-            client.volumes.prune()
-            client.networks.prune()
-            logger.info("All unused Docker resources removed successfully.")
-    except docker.errors.APIError as e:
-        logger.error(f"Docker API error while pruning all resources: {e}")
-    except docker.errors.DockerException as e:
-        logger.error(f"Docker exception while pruning all resources: {e}")
-    except Exception as e:
-        logger.error(f"Error while pruning all resources: {e}")
+    if dry_run:
+        logger.info("[dry-run] Would remove all unused Docker resources.")
+    else:
+        logger.info("Removing all unused Docker resources.")
+    # hosts run concurrently, but each host's prunes run one at a time and in
+    # order: the daemon rejects concurrent prunes, and pruning containers
+    # first frees their images, volumes and networks
+    runner = cleanup_runner(per_target=1)
+    tasks = [(host, resource_type) for resource_type in RESOURCE_TYPES for host in cleanup_hosts()]
+    for _ in runner.map(lambda task: prune_on_host(*task, dry_run), tasks):
+        pass
+    if not runner.errors and not dry_run:
+        logger.info("All unused Docker resources removed successfully.")
+    runner.finish("prunes")
 
 # =============== ADDING COMMANDS TO GROUPS
 
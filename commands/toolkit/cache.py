@@ -4,6 +4,7 @@
 import click
 import json
 import logging
+from commands.config.logger import get_logger
 import sys
 import datetime
 from pathlib import Path
@@ -16,8 +17,7 @@ sys.path.insert(0, str(parent_dir))
 
 # ========== LOGGING CONFIG
 
-logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s.")
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 # ========== CACHE GROUP
 
@@ -0,0 +1,166 @@
+# dev_cli/batch.py
+"""
+`dev-cli batch`: run many dev-cli command lines in one process.
+
+Each line of the input is parsed like a shell command line (quotes, `#`
+comments; a leading `dev-cli` is optional) and run through the root CLI.
+Imports, API clients, connection pools and caches (commands/config/clients.py)
+are set up once and shared by every line, instead of once per process.
+
+    $ cat jobs.txt
+    aws ec2 describe -r eu-west-2 -s running
+    --output csv aws s3 ls -bn my-bucket -r eu-west-2
+    automations random-api gender -n alice -n bob
+
+    $ dev-cli batch jobs.txt --report results.ndjson
+
+Lines inherit the batch's --log-level, --log-format and --output settings
+and can override them. They run non-interactively: prompts read an empty
+stdin and abort, so pass --force/--yes where a command asks to confirm.
+"""
+
+import collections
+import io
+import json
+import shlex
+import sys
+import time
+
+import click
+
+from commands.config import output
+from commands.config import streams
+from commands.config.logger import get_logger
+from commands.config.runner import Runner, concurrency_options
+
+logger = get_logger(__name__)
+
+# =============== LINES
+
+Line = collections.namedtuple("Line", ["number", "text", "args"])
+LineResult = collections.namedtuple("LineResult", ["line", "exit_code", "duration", "output"])
+
+# root options a line inherits from the batch invocation unless it sets them itself
+INHERITED_OPTIONS = ("log_level", "log_format", "output_format")
+
+
+class LineFailed(Exception):
+    """A line exited with a non-zero status; carries its LineResult for reporting."""
+
+    def __init__(self, result):
+        super().__init__(f"exit code {result.exit_code}")
+        self.result = result
+
+
+def read_lines(file):
+    """Yield a Line for every command in `file`, skipping blank lines and comments."""
+    for number, text in enumerate(file, 1):
+        text = text.strip()
+        if not text or text.startswith("#"):
+            continue
+        try:
+            args = shlex.split(text, comments=True)
+        except ValueError as e:
+            # reported as a failure of this line rather than stopping the batch
+            args = e
+        if isinstance(args, list) and args[:1] == ["dev-cli"]:
+            args = args[1:]
+        yield Line(number, text, args)
+
+
+# =============== RUNNING LINES
+
+
+def exit_code_of(root, args, defaults):
+    """Run one command line through the root CLI and return its exit status."""
+    try:
+        result = root.main(args, prog_name="dev-cli", standalone_mode=False, default_map=defaults)
+        # standalone_mode=False returns the exit code of ctx.exit()/Exit, else the command's return value
+        return result if isinstance(result, int) else 0
+    except click.exceptions.Abort:
+        click.echo("Aborted!", err=True)
+        return 1
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except SystemExit as e:
+        # commands that call sys.exit() end their line, not the batch
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return 1
+
+
+def run_line(root, line, defaults, capture=False):
+    """Run a Line and return its LineResult; raise LineFailed if it exited non-zero."""
+    buffer = io.StringIO() if capture else None
+    started = time.perf_counter()
+    # lines run non-interactively and must never read the batch's own input
+    with streams.redirect(stdin=io.StringIO(), stdout=buffer):
+        if isinstance(line.args, ValueError):
+            logger.error("line %d: cannot parse command: %s", line.number, line.args)
+            exit_code = 2
+        elif line.args[:1] in (["batch"], ["serve"]):
+            logger.error("line %d: %s cannot run inside a batch", line.number, line.args[0])
+            exit_code = 2
+        else:
+            exit_code = exit_code_of(root, line.args, defaults)
+    captured = buffer.getvalue() if capture else None
+    result = LineResult(line, exit_code, time.perf_counter() - started, captured)
+    if exit_code != 0:
+        raise LineFailed(result)
+    return result
+
+
+def report_entry(result):
+    entry = {
+        "line": result.line.number,
+        "command": result.line.text,
+        "exit_code": result.exit_code,
+        "duration_s": round(result.duration, 3),
+    }
+    if result.output is not None:
+        entry["output"] = result.output
+    return entry
+
+# =============== CLI COMMAND
+
+
+@click.command(help="""Run dev-cli command lines from FILE (default: stdin) in one process.
+
+Each line is a dev-cli command line, e.g. 'aws s3 ls -bn my-bucket -r eu-west-2'.
+Clients, connections and caches are shared between lines. Lines run in order
+unless --concurrency is raised, and the batch exits with status 1 if any line fails.""")
+@click.argument("file", type=click.File("r"), default="-")
+@concurrency_options(1, "command lines")
+@click.option("--capture", is_flag=True,
+              help="Hold each line's output and print it once the line finishes (always on with --concurrency above 1).")
+@click.option("--report", "report_file", type=click.File("w"),
+              help="Write one JSON object per line (exit code, duration and, with --capture, output) to this file.")
+def batch(file, concurrency, fail_fast, capture, report_file):
+    ctx = click.get_current_context()
+    root = ctx.find_root()
+    defaults = {name: root.params.get(name) for name in INHERITED_OPTIONS if root.params.get(name) is not None}
+    # parallel lines must not interleave their output
+    capture = capture or concurrency > 1
+    runner = Runner(concurrency, fail_fast, label=lambda line: f"line {line.number}: {line.text}")
+    started = time.perf_counter()
+
+    # results come back in input order, so captured output is printed in order too
+    for result in runner.map(lambda line: run_line(root.command, line, defaults, capture), read_lines(file)):
+        line_result = result.value if result.error is None else getattr(result.error, "result", None)
+        if line_result is None:
+            continue
+        if line_result.output:
+            try:
+                sys.stdout.write(line_result.output)
+                sys.stdout.flush()
+            except BrokenPipeError:
+                output.silence_stdout()
+                raise output.OutputClosed() from None
+        if report_file is not None:
+            report_file.write(json.dumps(report_entry(line_result)) + "\n")
+            report_file.flush()
+
+    logger.info("Ran %d command lines in %.2fs", runner.succeeded + len(runner.errors), time.perf_counter() - started)
+    runner.finish("command lines")
@@ -0,0 +1,195 @@
+# dev_cli/client.py
+"""
+Console-script entry point for dev-cli.
+
+If a `dev-cli serve` process is listening on the socket, argv, the working
+directory and stdin are forwarded to it, and its stdout, stderr and exit
+code are replayed here. That skips the interpreter-side startup: importing
+click, boto3, docker and pandas, building clients, resolving credentials.
+Otherwise the command runs in this process as before.
+
+The server only accepts a command when its environment matches (AWS_*,
+DOCKER_*, DEV_CLI_*, HOME and the cache directory). Otherwise it asks the
+client to run the command itself, so output and exit codes are always the
+same either way. Stdin is only forwarded once the server has accepted the
+command, so a command handed back still finds all of its input. Set
+DEV_CLI_NO_DAEMON=1 to never forward.
+
+This module only imports the standard library; keep it that way.
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+
+# =============== PROTOCOL
+
+# every message is one frame: a channel byte, a 4-byte big-endian length, the payload
+FRAME = struct.Struct("!cI")
+HELLO = b"h"      # client -> server: JSON request header
+STDIN = b"i"      # client -> server: stdin bytes (an empty frame means EOF)
+STDOUT = b"o"     # server -> client
+STDERR = b"r"     # server -> client
+EXIT = b"x"       # server -> client: JSON {"code": n} or {"fallback": reason}
+ACCEPTED = b"a"   # server -> client: the server runs the command; stdin may be sent from now on
+CANCEL = b"c"     # client -> server: stop the command (Ctrl-C)
+
+PROTOCOL_VERSION = 3
+CONNECT_TIMEOUT = 0.5
+# environment variables that change what a command does; the server must match them
+ENV_PREFIXES = ("AWS_", "BOTO_", "DOCKER_", "DEV_CLI_")
+ENV_NAMES = ("HOME", "XDG_CACHE_HOME")
+# client-side switches that don't affect the command itself
+ENV_IGNORED = ("DEV_CLI_SOCKET", "DEV_CLI_NO_DAEMON")
+
+
+def socket_path():
+    """The server's unix socket: DEV_CLI_SOCKET, else in XDG_RUNTIME_DIR, else in /tmp."""
+    path = os.environ.get("DEV_CLI_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "dev-cli.sock")
+    return os.path.join("/tmp", f"dev-cli-{os.getuid()}.sock")
+
+
+def environment():
+    """The part of the environment a forwarded command must share with the server."""
+    return {k: v for k, v in os.environ.items()
+            if (k.startswith(ENV_PREFIXES) or k in ENV_NAMES) and k not in ENV_IGNORED}
+
+
+def send_frame(sock, channel, payload=b""):
+    sock.sendall(FRAME.pack(channel, len(payload)) + payload)
+
+
+def recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 16))
+        if not chunk:
+            raise EOFError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    channel, size = FRAME.unpack(recv_exact(sock, FRAME.size))
+    return channel, recv_exact(sock, size) if size else b""
+
+# =============== CLIENT
+
+
+def isatty(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def terminal_width():
+    try:
+        return os.get_terminal_size(sys.stdout.fileno()).columns
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def forward_stdin(sock, lock):
+    """Copy our stdin to the server until EOF (runs in a daemon thread)."""
+    try:
+        fd = sys.stdin.fileno()
+        while True:
+            data = os.read(fd, 1 << 16)
+            with lock:
+                send_frame(sock, STDIN, data)
+            if not data:
+                return
+    except (AttributeError, OSError, ValueError):
+        # no usable stdin, or the connection is gone
+        try:
+            with lock:
+                send_frame(sock, STDIN)
+        except OSError:
+            pass
+
+
+def forward(argv):
+    """
+    Run argv on the server. Returns the exit code, or None if no server is
+    running or it asked us to run the command ourselves.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path())
+        sock.settimeout(None)
+        send_frame(sock, HELLO, json.dumps({
+            "version": PROTOCOL_VERSION,
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "env": environment(),
+            "tty": {"stdin": isatty(sys.stdin), "stdout": isatty(sys.stdout), "stderr": isatty(sys.stderr)},
+            "width": terminal_width(),
+        }).encode())
+    except OSError:
+        sock.close()
+        return None
+
+    # frames from the stdin thread and a cancel frame must not interleave
+    send_lock = threading.Lock()
+    outputs = {STDOUT: sys.stdout, STDERR: sys.stderr}
+    try:
+        while True:
+            channel, payload = recv_frame(sock)
+            if channel == ACCEPTED:
+                # only now: stdin read before a fallback would be lost to the in-process run
+                threading.Thread(target=forward_stdin, args=(sock, send_lock), daemon=True).start()
+            elif channel in outputs:
+                stream = outputs[channel]
+                stream.buffer.write(payload)
+                stream.flush()
+            elif channel == EXIT:
+                reply = json.loads(payload)
+                return None if "fallback" in reply else reply["code"]
+    except BrokenPipeError:
+        # our reader went away (e.g. `| head`); the same quiet exit as in-process
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    except KeyboardInterrupt:
+        # stop the command on the server too; closing the connection below does the same if this fails
+        # don't wait on a stdin frame that is stuck sending
+        if send_lock.acquire(timeout=1):
+            try:
+                send_frame(sock, CANCEL)
+            except OSError:
+                pass
+            finally:
+                send_lock.release()
+        return 130
+    except (EOFError, OSError) as e:
+        sys.stderr.write(f"dev-cli: lost connection to the dev-cli server: {e}\n")
+        return 1
+    finally:
+        sock.close()
+
+
+def main():
+    argv = sys.argv[1:]
+    # the server itself, and anything explicitly opted out, always runs here
+    if not os.environ.get("DEV_CLI_NO_DAEMON") and "serve" not in argv:
+        code = forward(argv)
+        if code is not None:
+            sys.exit(code)
+
+    from dev_cli.dev_cli import cli
+    cli(prog_name="dev-cli")
+
+
+if __name__ == "__main__":
+    main()
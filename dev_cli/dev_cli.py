@@ -2,15 +2,35 @@
 
 # =============== IMPORTING MODULES
 
-from commands.docker import cleanup
-from commands.aws import s3
-from commands.aws import ec2
+from commands.config import instrumentation
+from commands.config import metrics
+from commands.config import output
+import cProfile
+import importlib
+import time
 import click
 import sys
 from pathlib import Path
-from commands.toolkit import cache
-from commands.automations import random_api
-from commands.automations.finhub import stocks
+from commands.config.logger import LOG_FORMATS, LOG_LEVELS, flush_logging, setup_logging
+
+
+def timed_import(name):
+    """Import a command module, recording how long it took for --timings."""
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    instrumentation.import_times[name] = time.perf_counter() - started
+    return module
+
+
+# the first module to import a shared SDK (boto3, docker, ...) pays for it
+cleanup = timed_import("commands.docker.cleanup")
+s3 = timed_import("commands.aws.s3")
+ec2 = timed_import("commands.aws.ec2")
+cache = timed_import("commands.toolkit.cache")
+random_api = timed_import("commands.automations.random_api")
+stocks = timed_import("commands.automations.finhub.stocks")
+batch = timed_import("dev_cli.batch")
+serve = timed_import("dev_cli.serve")
 
 
 # =============== PATH SETUP
@@ -22,13 +42,99 @@ sys.path.insert(0, str(parentdir))
 
 # =============== CLI MAIN GROUP
 
+def resolve_command_path(group, ctx):
+    """Work out which sub-command (e.g. 'aws s3 ls') the parsed args will run."""
+    path = []
+    command = group
+    args = [*getattr(ctx, "_protected_args", []), *ctx.args]
+    try:
+        while isinstance(command, click.Group) and args:
+            name, command, args = command.resolve_command(ctx, args)
+            path.append(name)
+            if isinstance(command, click.Group):
+                # parse the sub-group's own options without running its callback
+                ctx = command.make_context(name, args, parent=ctx, resilient_parsing=True)
+                args = [*getattr(ctx, "_protected_args", []), *ctx.args]
+    except click.ClickException:
+        pass
+    return " ".join(path) or group.name
+
+
+class DevCliGroup(click.Group):
+    """Root group that times every command and exports metrics when asked to."""
+
+    def invoke(self, ctx):
+        try:
+            return self.invoke_measured(ctx)
+        except output.OutputClosed:
+            # the reader of stdout went away (e.g. `| head`); that's not an error
+            ctx.exit(0)
+
+    def invoke_measured(self, ctx):
+        metrics_file = ctx.params.get("metrics_file")
+        if not metrics_file:
+            return super().invoke(ctx)
+
+        metrics.REGISTRY.reset()
+        instrumentation.add_listener(metrics.record_api_call)
+        command = resolve_command_path(self, ctx)
+        started = time.perf_counter()
+        status = "failure"
+        try:
+            result = super().invoke(ctx)
+            status = "success"
+            return result
+        except click.exceptions.Exit as e:
+            status = "success" if e.exit_code == 0 else "failure"
+            raise
+        except output.OutputClosed:
+            status = "success"
+            raise
+        finally:
+            metrics.COMMAND_DURATION.observe(time.perf_counter() - started, command=command, status=status)
+            metrics.LAST_RUN.set(time.time(), command=command, status=status)
+            try:
+                metrics.REGISTRY.write_textfile(metrics_file)
+            except OSError as e:
+                sys.stderr.write(f"dev-cli: unable to write metrics to {metrics_file}: {e}\n")
+
+
 # define main command group for the cli tool
-@click.group(help="dev-cli tool: a command-line interface for various devops utilities.")
-def cli():
+@click.group(cls=DevCliGroup, help="dev-cli tool: a command-line interface for various devops utilities.")
+@click.option("--log-level", type=click.Choice(LOG_LEVELS, case_sensitive=False), envvar="DEV_CLI_LOG_LEVEL",
+              default="INFO", show_default=True, help="Set the logging level for all commands.")
+@click.option("--log-format", type=click.Choice(LOG_FORMATS), envvar="DEV_CLI_LOG_FORMAT",
+              default="text", show_default=True, help="Write log records as plain text or JSON lines (to stderr).")
+@click.option("--output", "output_format", type=click.Choice(output.FORMATS), envvar="DEV_CLI_OUTPUT",
+              help="Format for listings and lookups written to stdout (default: table).")
+@click.option("--timings", is_flag=True, help="Print import, API call and HTTP request timings to stderr.")
+@click.option("--timings-file", type=click.Path(dir_okay=False, writable=True), help="Write the timings summary as JSON to this file.")
+@click.option("--profile", "profile_file", type=click.Path(dir_okay=False, writable=True), help="Write a cProfile dump (pstats format) to this file.")
+@click.option("--metrics-file", type=click.Path(dir_okay=False, writable=True), envvar="DEV_CLI_METRICS_FILE",
+              help="Write run metrics to this file in the Prometheus textfile-collector format.")
+def cli(log_level, log_format, output_format, timings, timings_file, profile_file, metrics_file):
     """Main entry point for dev-cli Tool."""
-    # function doesn't do anything.
-    # is REQUIRED for defining the command group
-    pass
+    ctx = click.get_current_context()
+    # commands pick this up through output.open_writer()
+    ctx.meta[output.FORMAT_KEY] = output_format
+    # logging is configured once here for every command module
+    setup_logging(log_level, log_format)
+    # make sure queued log records are written before the command returns
+    ctx.call_on_close(flush_logging)
+
+    if timings or timings_file:
+        instrumentation.enable()
+        ctx.call_on_close(lambda: instrumentation.report(to_stderr=timings, path=timings_file))
+
+    if profile_file:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def dump_profile():
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+
+        ctx.call_on_close(dump_profile)
 
 # =============== SUB-GROUPS
 
@@ -64,6 +170,9 @@ cli.add_command(docker)
 cli.add_command(toolkit)
 cli.add_command(automations)
 automations.add_command(finhub)
+# run many command lines in one process
+cli.add_command(batch.batch)
+cli.add_command(serve.serve)
 
 # =============== ADD COMMANDS TO SUB-GROUPS
 
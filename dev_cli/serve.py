@@ -0,0 +1,138 @@
+# dev_cli/serve.py
+"""
+`dev-cli serve`: keep dev-cli warm in a background process.
+
+The server (dev_cli/server.py) listens on a unix socket (see dev_cli/client.py
+for the path and the wire protocol). Each connection carries one command line
+from the thin client. The command runs here, with its stdin, stdout and stderr
+routed to that connection (commands/config/streams.py), through the same root
+CLI and the same exit-code handling as `dev-cli batch`. Ctrl-C in the client
+interrupts the command on the server, as it would in-process. Imports and the shared
+clients, connection pools and caches (commands/config/clients.py) stay warm
+between commands.
+
+Commands from different connections run concurrently. The working
+directory, log level and log format belong to the whole process, so a
+command that needs other values waits until the running ones have finished.
+Commands given --metrics-file, --timings, --timings-file or --profile, and
+`batch`, run alone, as those record everything the process does.
+
+    dev-cli serve --detach       # start in the background
+    dev-cli aws s3 ls ...        # forwarded to the server
+    dev-cli serve --stop         # shut it down
+"""
+
+import json
+import os
+import signal
+import socket
+import threading
+
+import click
+
+from commands.config import clients
+from commands.config import streams
+from commands.config.logger import get_logger
+from dev_cli import client as protocol
+
+logger = get_logger(__name__)
+
+# =============== HELPERS
+
+
+def send_control(path, control):
+    """Send a control request (e.g. stop) to a running server. Returns False if none is running."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(protocol.CONNECT_TIMEOUT)
+        sock.connect(path)
+        sock.settimeout(None)
+        protocol.send_frame(sock, protocol.HELLO, json.dumps({
+            "version": protocol.PROTOCOL_VERSION, "control": control, "env": protocol.environment()}).encode())
+        protocol.recv_frame(sock)
+        return True
+    except (OSError, EOFError):
+        return False
+    finally:
+        sock.close()
+
+
+def warm_up():
+    """Build the commonly used clients ahead of the first command (best effort, in the background)."""
+    def build():
+        from commands.aws.s3 import s3_client
+
+        for name, create in (("s3", lambda: s3_client()), ("ec2", lambda: clients.aws("ec2"))):
+            try:
+                create()
+            except Exception as e:
+                logger.debug("Could not pre-build the %s client: %s", name, e)
+
+    threading.Thread(target=build, daemon=True).start()
+
+
+def daemonize():
+    """Fork into the background; returns True in the parent and False in the child."""
+    if os.fork():
+        return True
+    os.setsid()
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    return False
+
+# =============== CLI COMMAND
+
+
+@click.command(help="""Keep dev-cli running in the background so later commands start instantly.
+
+While the server is running, `dev-cli` forwards each command line to it over a
+unix socket and prints its output. Commands run in-process as usual when no
+server is running or when their environment differs from the server's.""")
+@click.option("--socket", "path", type=click.Path(dir_okay=False), default=protocol.socket_path, show_default="DEV_CLI_SOCKET, or dev-cli.sock in XDG_RUNTIME_DIR",
+              help="Unix socket to listen on.")
+@click.option("--idle-timeout", type=click.IntRange(min=0), default=3600, show_default=True,
+              help="Exit after this many seconds without commands (0 = never).")
+@click.option("--detach", is_flag=True, help="Run in the background.")
+@click.option("--stop", is_flag=True, help="Stop the server listening on the socket.")
+def serve(path, idle_timeout, detach, stop):
+    if stop:
+        if send_control(path, "stop"):
+            logger.info("Stopped the dev-cli server on %s", path)
+        else:
+            logger.warning("No dev-cli server is running on %s", path)
+        return
+
+    if os.path.exists(path):
+        if send_control(path, "ping"):
+            raise click.ClickException(f"a dev-cli server is already running on {path}")
+        # left behind by a server that didn't shut down cleanly
+        os.unlink(path)
+
+    # the server itself is only needed here, so plain startup doesn't import socketserver
+    from dev_cli.server import Server
+
+    root = click.get_current_context().find_root().command
+    # bind before forking, so the socket is there as soon as --detach returns
+    server = Server(path, root, idle_timeout)
+    if detach and daemonize():
+        server.socket.close()
+        logger.info("Started the dev-cli server on %s", path)
+        return
+
+    streams.install()
+    warm_up()
+    # SIGTERM (e.g. from a service manager) shuts down cleanly, like Ctrl-C
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    if idle_timeout:
+        threading.Thread(target=server.watch_idle, daemon=True).start()
+    logger.info("dev-cli server listening on %s", path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+        logger.info("dev-cli server stopped")
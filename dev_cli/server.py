@@ -0,0 +1,306 @@
+# dev_cli/server.py
+"""
+The unix socket server behind `dev-cli serve` (dev_cli/serve.py).
+
+One thread per connection: it reads the client's request header, runs the
+command line through the root CLI with stdin, stdout and stderr routed to the
+connection, and sends back the exit code. When the client is interrupted
+(Ctrl-C) or goes away, the command gets a KeyboardInterrupt, as it would
+have in the client's own process. Kept out of dev_cli/serve.py so an
+ordinary dev-cli start doesn't import socketserver.
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+from commands.config import streams
+from commands.config.logger import get_logger
+from dev_cli import client as protocol
+from dev_cli.batch import exit_code_of
+
+logger = get_logger(__name__)
+
+# =============== CONNECTION STREAMS
+
+
+class FrameWriter(io.RawIOBase):
+    """Raw byte stream that sends everything written to it as frames on one channel."""
+
+    def __init__(self, sock, channel, lock):
+        self.sock = sock
+        self.channel = channel
+        self.lock = lock
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        try:
+            with self.lock:
+                protocol.send_frame(self.sock, self.channel, bytes(data))
+        except OSError:
+            # the client has gone; surface it the way a closed pipe would be
+            raise BrokenPipeError("dev-cli client disconnected") from None
+        return len(data)
+
+
+class ClientStream(io.TextIOWrapper):
+    """Text stream over a FrameWriter that reports the client's terminal settings."""
+
+    def __init__(self, raw, tty, width=None):
+        super().__init__(io.BufferedWriter(raw), encoding="utf-8", errors="replace", line_buffering=tty)
+        self.tty = tty
+        # read by output.TableWriter to fit tables to the client's terminal
+        self.terminal_width = width
+
+    def isatty(self):
+        return self.tty
+
+    def fileno(self):
+        raise io.UnsupportedOperation("fileno")
+
+
+def pump_client(sock, write_fd, interrupt):
+    """
+    Copy the client's stdin frames into a pipe until EOF, then keep reading the
+    connection: a cancel frame or the client going away (Ctrl-C on its side)
+    interrupts the command. Runs in a daemon thread.
+    """
+    pipe = os.fdopen(write_fd, "wb")
+    try:
+        while True:
+            channel, payload = protocol.recv_frame(sock)
+            if channel == protocol.CANCEL:
+                break
+            if channel != protocol.STDIN or pipe.closed:
+                continue
+            if not payload:
+                pipe.close()
+                continue
+            try:
+                pipe.write(payload)
+                pipe.flush()
+            except OSError:
+                # the command stopped reading its stdin; that's not a reason to stop it
+                pipe.close()
+    except (EOFError, OSError):
+        pass
+    finally:
+        pipe.close()
+    interrupt.fire()
+
+# =============== INTERRUPTS
+
+
+def raise_in_thread(thread, exception):
+    """Raise `exception` in `thread` when it next runs Python code; None clears one not raised yet."""
+    import ctypes
+
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+        ctypes.c_ulong(thread.ident), ctypes.py_object(exception) if exception is not None else None)
+
+
+class Interrupt:
+    """
+    Raise KeyboardInterrupt in the thread running a command, as Ctrl-C would in
+    the client's own process, but only while the command is running:
+
+        with interrupt:
+            run_command()    # interrupt.fire() from another thread lands in here
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.fired = False
+
+    def fire(self):
+        with self.lock:
+            if self.thread is not None and not self.fired:
+                self.fired = True
+                raise_in_thread(self.thread, KeyboardInterrupt)
+
+    def __enter__(self):
+        with self.lock:
+            self.thread = threading.current_thread()
+        return self
+
+    def __exit__(self, *exc):
+        with self.lock:
+            # fired as the command returned: drop the exception rather than raise it later
+            if self.fired:
+                raise_in_thread(self.thread, None)
+            self.thread = None
+
+# =============== PROCESS SETTINGS
+
+# root options that act on state shared by the whole process (the metrics
+# registry, the timings recorder, the profiler): a command using them runs alone
+EXCLUSIVE_OPTIONS = ("metrics_file", "timings", "timings_file", "profile_file")
+# commands that run other command lines, each with root options of its own
+EXCLUSIVE_COMMANDS = ("batch",)
+
+
+def process_settings(root, argv, cwd):
+    """
+    The process-wide settings a command line runs with, as (settings, exclusive).
+    Commands only run side by side when their settings (working directory, log
+    level and log format) are equal; an exclusive command runs alone.
+    """
+    try:
+        ctx = root.make_context("dev-cli", list(argv), resilient_parsing=True)
+    except Exception:
+        # the command reports what is wrong with its arguments itself; run it alone to be safe
+        return (cwd, None, None), True
+    params = ctx.params
+    command = getattr(ctx, "_protected_args", [])[:1]
+    exclusive = any(params.get(name) for name in EXCLUSIVE_OPTIONS) or any(
+        name in command for name in EXCLUSIVE_COMMANDS)
+    return (cwd, params.get("log_level"), params.get("log_format")), exclusive
+
+
+class ProcessSettings:
+    """
+    Let commands share the process-wide settings from process_settings(). The
+    working directory and the logging setup only change while no command is
+    running, and an exclusive command waits for the others and keeps new ones out.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.active = 0
+        self.current = None
+        self.exclusive = False
+
+    def enter(self, settings, exclusive=False):
+        with self.condition:
+            while self.active and (exclusive or self.exclusive or settings != self.current):
+                self.condition.wait()
+            if os.getcwd() != settings[0]:
+                os.chdir(settings[0])
+            self.current = settings
+            self.exclusive = exclusive
+            self.active += 1
+
+    def leave(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+# =============== SERVER
+
+
+class Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        sock = self.request
+        server.touch(+1)
+        try:
+            channel, payload = protocol.recv_frame(sock)
+            request = json.loads(payload) if channel == protocol.HELLO else {}
+            reason = server.refusal(sock, request)
+            if reason:
+                logger.debug("Handing a command back to the client: %s", reason)
+                protocol.send_frame(sock, protocol.EXIT, json.dumps({"fallback": reason}).encode())
+                return
+            if "control" in request:
+                # "ping" only checks that the server is up; "stop" shuts it down
+                protocol.send_frame(sock, protocol.EXIT, json.dumps({"code": 0}).encode())
+                if request["control"] == "stop":
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                return
+            protocol.send_frame(sock, protocol.ACCEPTED)
+            code = self.run(sock, request)
+            protocol.send_frame(sock, protocol.EXIT, json.dumps({"code": code}).encode())
+        except (EOFError, OSError, ValueError) as e:
+            logger.debug("Dropped a client connection: %s", e)
+        finally:
+            server.touch(-1)
+
+    def run(self, sock, request):
+        lock = threading.Lock()
+        tty = request.get("tty", {})
+        stdout = ClientStream(FrameWriter(sock, protocol.STDOUT, lock), tty.get("stdout", False), request.get("width"))
+        stderr = ClientStream(FrameWriter(sock, protocol.STDERR, lock), tty.get("stderr", False), request.get("width"))
+        read_fd, write_fd = os.pipe()
+        interrupt = Interrupt()
+        threading.Thread(target=pump_client, args=(sock, write_fd, interrupt), daemon=True).start()
+        stdin = open(read_fd, "r", encoding="utf-8", errors="replace")
+
+        self.server.settings.enter(*process_settings(self.server.root, request["argv"], request["cwd"]))
+        try:
+            with streams.redirect(stdin=stdin, stdout=stdout, stderr=stderr):
+                try:
+                    with interrupt:
+                        code = exit_code_of(self.server.root, request["argv"], None)
+                except KeyboardInterrupt:
+                    logger.debug("The client cancelled '%s'", " ".join(request["argv"]))
+                    code = 130
+                for stream in (stdout, stderr):
+                    try:
+                        stream.flush()
+                    except BrokenPipeError:
+                        pass
+            return code
+        finally:
+            self.server.settings.leave()
+            stdin.close()
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, root, idle_timeout):
+        self.root = root
+        self.settings = ProcessSettings()
+        self.idle_timeout = idle_timeout
+        self.active = 0
+        self.last_used = time.monotonic()
+        self.activity = threading.Lock()
+        self.environment = protocol.environment()
+        # the socket grants the power to run commands with our credentials: owner only
+        previous = os.umask(0o177)
+        try:
+            super().__init__(path, Handler)
+        finally:
+            os.umask(previous)
+
+    def touch(self, delta):
+        with self.activity:
+            self.active += delta
+            self.last_used = time.monotonic()
+
+    def refusal(self, sock, request):
+        """Why this server can't run the request for the client (None if it can)."""
+        if peer_uid(sock) not in (None, os.getuid()):
+            return "the server belongs to another user"
+        if request.get("version") != protocol.PROTOCOL_VERSION:
+            return "protocol version mismatch"
+        if request.get("env") != self.environment:
+            return "the environment differs from the server's"
+        return None
+
+    def watch_idle(self):
+        """Shut the server down after idle_timeout seconds without commands."""
+        while True:
+            time.sleep(min(self.idle_timeout, 5))
+            with self.activity:
+                idle = not self.active and time.monotonic() - self.last_used >= self.idle_timeout
+            if idle:
+                logger.info("Idle for %ds, shutting down", self.idle_timeout)
+                self.shutdown()
+                return
+
+
+def peer_uid(sock):
+    """The uid of the process on the other end of a unix socket, where the platform tells us."""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1]
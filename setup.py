@@ -33,10 +33,11 @@ setup(
     # Entry points for creating executable commands via the command line
     entry_points={
         'console_scripts': [
-            # This defines a command called 'dev-cli' that runs the cli() function
-            # from the dev_cli.dev_cli module (your main CLI script)
-            # Points to the `cli` function in `dev_cli/dev_cli.py`
-            'dev-cli = dev_cli.dev_cli:cli',
+            # This defines a command called 'dev-cli' that runs the main() function
+            # from the dev_cli.client module, which forwards to a running
+            # `dev-cli serve` process or else runs the cli() function
+            # from `dev_cli/dev_cli.py` (your main CLI script)
+            'dev-cli = dev_cli.client:main',
         ],
     },
 )
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the commands package lives at the repository root, next to tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,21 @@
+"""
+Writes to the SQLite-backed DiskCache.
+"""
+
+import sqlite3
+
+import pytest
+
+from commands.config.disk_cache import DiskCache
+
+
+def test_failed_write_is_rolled_back(tmp_path):
+    with DiskCache(tmp_path / "cache.sqlite3") as cache:
+        cache.set("kept", 1)
+        # a key sqlite can't bind fails halfway through the batch
+        with pytest.raises(sqlite3.Error):
+            cache.set_many({"lost": 2, ("not", "a", "key"): 3})
+        assert cache.get("lost") is None
+        # the next write starts a transaction of its own
+        cache.set_many({"later": 4})
+        assert cache.get_many(["kept", "later"]) == {"kept": 1, "later": 4}
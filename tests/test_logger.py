@@ -0,0 +1,33 @@
+"""
+Per-command log levels (a group's --log-level) in commands/config/logger.py.
+"""
+
+import contextvars
+import logging
+import threading
+
+from commands.config.logger import command_level, get_logger
+
+
+def test_command_level_ends_with_the_block():
+    logger = get_logger("dev_cli_tests.scoped")
+    default = logger.isEnabledFor(logging.WARNING)
+    with command_level(logger, "ERROR"):
+        assert not logger.isEnabledFor(logging.WARNING)
+        with command_level(logger, "DEBUG"):
+            assert logger.isEnabledFor(logging.DEBUG)
+        assert not logger.isEnabledFor(logging.WARNING)
+    assert logger.isEnabledFor(logging.WARNING) == default
+
+
+def test_command_level_is_not_seen_by_other_commands():
+    logger = get_logger("dev_cli_tests.concurrent")
+    seen = []
+    with command_level(logger, "ERROR"):
+        # a command running alongside, e.g. another connection to dev-cli serve
+        other = threading.Thread(target=lambda: seen.append(logger.isEnabledFor(logging.WARNING)))
+        other.start()
+        other.join()
+        # work handed to a Runner worker runs in a copy of this context and keeps the level
+        assert contextvars.copy_context().run(logger.isEnabledFor, logging.WARNING) is False
+    assert seen == [logger.getEffectiveLevel() <= logging.WARNING]
@@ -0,0 +1,140 @@
+"""
+Batched name predictions in random_api, against a local stub of the
+genderize/agify/nationalize batch endpoint.
+"""
+
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from commands.automations import random_api
+from commands.config.runner import Runner
+
+
+class StubServer(ThreadingHTTPServer):
+    """Answers ?name[]=a&name[]=b with one prediction per name, in order, and records every request."""
+
+    daemon_threads = True
+
+    def __init__(self, delay=0.0, fail_names=()):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = delay
+        self.fail_names = set(fail_names)
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        names = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query).get("name[]", [])
+        with server.lock:
+            server.batches.append(names)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            # long enough for concurrent requests to overlap
+            time.sleep(server.delay)
+            if server.fail_names.intersection(names):
+                self.send_response(500)
+                self.end_headers()
+                return
+            body = json.dumps([{"name": name, "gender": "female", "probability": 0.9, "count": len(name)}
+                               for name in names]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        server = StubServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_names(count):
+    return [f"name{i:03d}" for i in range(count)]
+
+# =============== BATCHING
+
+
+def test_sends_at_most_ten_names_per_request(stub):
+    server = stub()
+    names = make_names(95)
+    random_api.predict(server.url, names, runner=Runner(4))
+    assert len(server.batches) == 10
+    assert sorted(len(batch) for batch in server.batches) == [5] + [10] * 9
+    # every name is sent exactly once
+    assert sorted(name for batch in server.batches for name in batch) == names
+
+
+def test_results_follow_input_order(stub):
+    # a delay makes the batches complete out of order on the stub's threads
+    server = stub(delay=0.02)
+    names = make_names(57)
+    predictions = random_api.predict(server.url, names, runner=Runner(8))
+    assert [p["name"] for p in predictions] == names
+
+
+def test_concurrency_is_bounded(stub):
+    server = stub(delay=0.05)
+    random_api.predict(server.url, make_names(200), runner=Runner(3))
+    assert len(server.batches) == 20
+    assert server.max_in_flight == 3
+
+
+def test_failed_batch_yields_placeholders(stub):
+    server = stub(fail_names={"name015"})
+    names = make_names(30)
+    runner = Runner(4)
+    predictions = random_api.predict(server.url, names, runner=runner)
+    # only the batch holding the failing name is lost, and the others keep their positions
+    assert predictions[10:20] == [None] * 10
+    assert [p["name"] for p in predictions[:10] + predictions[20:]] == names[:10] + names[20:]
+    assert len(runner.errors) == 1
+
+# =============== CACHE
+
+
+def test_cached_names_are_not_requested_again(stub, tmp_path):
+    from commands.config.disk_cache import DiskCache
+
+    server = stub()
+    with DiskCache(tmp_path / "cache.sqlite3") as cache:
+        first = random_api.predict_cached(server.url, make_names(25), runner=Runner(4), cache=cache)
+        # duplicates and already cached names cost no request
+        names = make_names(30) + make_names(5)
+        second = random_api.predict_cached(server.url, names, runner=Runner(4), cache=cache)
+    assert len(server.batches) == 3 + 1
+    assert server.batches[-1] == make_names(30)[25:]
+    assert second[:25] == first
+    assert [p["name"] for p in second] == names
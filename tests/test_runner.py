@@ -0,0 +1,100 @@
+"""
+Ordering, limits and failure handling of the shared bounded-concurrency Runner.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+
+from commands.config.runner import Runner
+
+
+def test_ordered_results_follow_input_order():
+    # later items finish first
+    results = list(Runner(4).map(lambda i: time.sleep((10 - i) / 500) or i, range(10)))
+    assert [r.value for r in results] == list(range(10))
+
+
+def test_per_target_limit():
+    lock = threading.Lock()
+    busy = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+
+    def work(item):
+        with lock:
+            busy[item] += 1
+            peak[item] = max(peak[item], busy[item])
+        time.sleep(0.01)
+        with lock:
+            busy[item] -= 1
+
+    runner = Runner(8, per_target=2, target=lambda item: item)
+    list(runner.map(work, ["a", "b"] * 10))
+    assert peak == {"a": 2, "b": 2}
+
+
+def test_fail_fast_yields_results_held_behind_unstarted_items():
+    started = threading.Event()
+
+    def work(item):
+        if item == "a0":
+            raise ValueError("boom")
+        if item == "b0":
+            # still running when a0 fails, finishes after the stop
+            started.wait(1)
+            time.sleep(0.05)
+        return item
+
+    # a1 waits for the single "a" slot and is never started once a0 fails,
+    # so b0's result would otherwise stay held back behind it
+    runner = Runner(4, fail_fast=True, per_target=1, target=lambda item: item[0])
+    results = []
+    for result in runner.map(work, ["a0", "a1", "b0"]):
+        results.append(result)
+        started.set()
+    assert [r.item for r in results] == ["a0", "b0"]
+    assert results[1].value == "b0"
+    assert runner.stopped and len(runner.errors) == 1
+
+
+async def sleep_and_return(item):
+    await asyncio.sleep((10 - item) / 500)
+    return item
+
+
+def test_coroutine_results_follow_input_order():
+    results = list(Runner(4).map(sleep_and_return, range(10)))
+    assert [r.value for r in results] == list(range(10))
+
+
+def test_coroutine_concurrency_limit_and_context():
+    request = contextvars.ContextVar("request", default=None)
+    busy = peak = 0
+
+    async def work(item):
+        nonlocal busy, peak
+        busy += 1
+        peak = max(peak, busy)
+        await asyncio.sleep(0.01)
+        busy -= 1
+        return request.get()
+
+    request.set("caller")
+    results = list(Runner(3).map(work, range(12), ordered=False))
+    assert peak == 3
+    assert {r.value for r in results} == {"caller"}
+
+
+def test_coroutine_fail_fast():
+    async def work(item):
+        if item == 2:
+            raise ValueError("boom")
+        await asyncio.sleep(0.01)
+        return item
+
+    runner = Runner(2, fail_fast=True)
+    results = list(runner.map(work, range(20)))
+    assert runner.stopped and [type(r.error) for r in runner.errors] == [ValueError]
+    # tasks already started before the failure are still reported, nothing after them
+    assert len(results) < 20 and results[2].error is not None
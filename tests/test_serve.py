@@ -0,0 +1,67 @@
+"""
+Forwarding command lines to a `dev-cli serve` server through the thin client,
+against a server running a small stand-in CLI on a temporary socket.
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+
+import click
+import pytest
+
+from dev_cli import client
+
+
+@click.group()
+def root():
+    pass
+
+
+@root.command()
+def cat():
+    click.echo(sys.stdin.read(), nl=False)
+
+
+def use_streams(monkeypatch, stdin):
+    """Give the test a piped stdin and in-memory stdout/stderr; returns the stdout bytes buffer."""
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, stdin)
+    os.close(write_fd)
+    stdout = io.BytesIO()
+    # set before the server routes the process's streams, so they are restored afterwards
+    monkeypatch.setattr(sys, "stdin", open(read_fd, "r"))
+    monkeypatch.setattr(sys, "stdout", io.TextIOWrapper(stdout, encoding="utf-8"))
+    monkeypatch.setattr(sys, "stderr", io.TextIOWrapper(io.BytesIO(), encoding="utf-8"))
+    return stdout
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    from dev_cli.server import Server
+
+    path = str(tmp_path / "dev-cli.sock")
+    monkeypatch.setenv("DEV_CLI_SOCKET", path)
+    server = Server(path, root, idle_timeout=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_accepted_command_reads_forwarded_stdin(server, monkeypatch):
+    stdout = use_streams(monkeypatch, b"line 1\nline 2\n")
+    assert client.forward(["cat"]) == 0
+    assert stdout.getvalue() == b"line 1\nline 2\n"
+
+
+def test_fallback_leaves_stdin_for_the_in_process_run(server, monkeypatch):
+    use_streams(monkeypatch, b"line 1\nline 2\n")
+    # an environment the server doesn't share: it hands the command back
+    monkeypatch.setenv("DEV_CLI_BENCH_ONLY", "1")
+    assert client.forward(["cat"]) is None
+    # give a stray stdin forwarder the time to swallow the input
+    time.sleep(0.2)
+    assert sys.stdin.read() == "line 1\nline 2\n"